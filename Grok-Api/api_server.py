@@ -1,8 +1,9 @@
 from fastapi      import FastAPI, HTTPException, Response
 from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from urllib.parse import urlparse, ParseResult
 from pydantic     import BaseModel
-from core         import Grok
+from core         import Grok, GrokPool, ProxyPool, key_pool, identity_store, conversation_store, anti_bot_stats
 from uvicorn      import run
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.security import APIKeyHeader
@@ -14,9 +15,10 @@ import logging
 import time
 import secrets
 import json
-import asyncio
 import requests
 from datetime import datetime
+from threading import Lock
+from contextlib import asynccontextmanager
 
 load_dotenv()
 
@@ -40,7 +42,30 @@ logging.basicConfig(
     ]
 )
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_proxy_pool()
+    get_grok_pool()
+    yield
+    # stop() waits for the refill thread, keep that off the event loop
+    if grok_pool is not None:
+        await run_in_threadpool(grok_pool.stop)
+    if proxy_pool is not None:
+        proxy_pool.stop()
+    key_pool.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+# Pre-bootstrapped sessions for new conversations (one pool per worker process)
+GROK_POOL_SIZE = int(os.getenv('GROK_POOL_SIZE', '2'))
+GROK_POOL_TTL = float(os.getenv('GROK_POOL_TTL', '300'))
+grok_pool: GrokPool = None
+
+# SOCKS proxies for Grok sessions, resolved once by get_proxy_pool()
+USE_SOCKS = os.getenv('USE_SOCKS', 'false').lower() == 'true'
+proxy_pool: ProxyPool = None
+proxy_pool_resolved = False
+proxy_pool_lock = Lock()
 
 api_key_header = APIKeyHeader(name="Authorization", auto_error=False)
 
@@ -76,6 +101,82 @@ def format_proxy(proxy: str) -> str:
         # Assume SOCKS5 if no scheme
         return f"socks5://{proxy}"
 
+def resolve_proxy_pool() -> ProxyPool:
+    """
+    Start the SOCKS proxy pool from the environment: SOCKS_POOL (comma or
+    whitespace separated) or the single SOCKS proxy. None when USE_SOCKS is
+    off or no proxy is configured.
+    """
+    if not USE_SOCKS:
+        logging.info("SOCKS5 proxy disabled")
+        return None
+    proxies = [format_proxy(proxy) for proxy in os.getenv('SOCKS_POOL', os.getenv('SOCKS', '')).replace(',', ' ').split()]
+    if not proxies:
+        logging.warning("USE_SOCKS is true but neither SOCKS_POOL nor SOCKS is set")
+        return None
+    pool = ProxyPool(proxies).start()
+    logging.info(f"SOCKS5 proxy pool started ({len(proxies)} proxies, probe every {pool.interval}s)")
+    return pool
+
+def get_proxy_pool() -> ProxyPool:
+    """
+    The SOCKS proxy pool, resolved once per worker. A None result is kept as
+    well, so the configuration is read and logged once, not on every request.
+    """
+    global proxy_pool, proxy_pool_resolved
+    if not proxy_pool_resolved:
+        # Turns run in threadpool workers, only one of them may start the pool
+        with proxy_pool_lock:
+            if not proxy_pool_resolved:
+                proxy_pool = resolve_proxy_pool()
+                proxy_pool_resolved = True
+    return proxy_pool
+
+def get_proxy(sticky: str = None) -> str:
+    """
+    A proxy for a new Grok session from the pool, or None when proxies are
+    disabled. `sticky` (the proxy a conversation started on) is kept while
+    the pool still considers it healthy.
+    """
+    pool = get_proxy_pool()
+    if pool is None:
+        return None
+    if sticky and pool.is_healthy(sticky):
+        return sticky
+    return pool.pick()
+
+def get_grok_pool() -> GrokPool:
+    global grok_pool
+    if grok_pool is None:
+        grok_pool = GrokPool(GROK_POOL_SIZE, GROK_POOL_TTL, proxies=get_proxy_pool()).start()
+        logging.info(f"Grok session pool started (size: {GROK_POOL_SIZE}, ttl: {GROK_POOL_TTL}s)")
+    return grok_pool
+
+def continuation(messages: list):
+    """
+    (last user message, extra_data) when the history before the last user
+    message is a conversation we answered before, else None.
+    """
+    if len(messages) < 2 or messages[-1].get("role") != "user":
+        return None
+    extra_data = conversation_store.get(messages[:-1])
+    if extra_data is None:
+        return None
+    return messages[-1]["content"], extra_data
+
+def grok_error_message(error_data) -> str:
+    """Extract a readable message from a Grok error, given as a JSON string or a dict."""
+    if isinstance(error_data, str):
+        # Try to parse JSON string error
+        try:
+            error_dict = json.loads(error_data)
+            return error_dict.get('error', {}).get('message', 'Unknown error')
+        except (json.JSONDecodeError, KeyError, AttributeError):
+            return str(error_data)
+    elif isinstance(error_data, dict):
+        return error_data.get('error', {}).get('message', error_data.get('message', 'Unknown error'))
+    return str(error_data)
+
 @app.get("/v1/models")
 async def get_models(api_key: str = Depends(get_api_key)):
     logging.info(f"GET /v1/models called with API key: {api_key}")
@@ -106,86 +207,35 @@ async def test_endpoint():
     logging.info(f"Test endpoint called, returning response")
     return Response(content=json.dumps(test_response, ensure_ascii=False), media_type="application/json")
 
+@app.get("/pool")
+async def pool_status():
+    """Grok session pool health - ready sessions, hit rate and bootstrap failures, plus the keypair pool, stored identities and anti-bot retries"""
+    health = get_grok_pool().health()
+    health["key_pool"] = key_pool.health()
+    health["identities"] = identity_store.health()
+    health["anti_bot"] = anti_bot_stats.health()
+    return Response(content=json.dumps(health, ensure_ascii=False), media_type="application/json")
+
 @app.get("/socks")
 @app.post("/socks")
 async def socks_check():
-    """SOCKS5 proxy check endpoint - checks IP address without API key"""
-    try:
-        # Check if SOCKS5 proxy is enabled
-        use_socks = os.getenv('USE_SOCKS', 'false').lower() == 'true'
-        socks_proxy = os.getenv('SOCKS', None)  # Changed from SOCKS5 to SOCKS
-        
-        # Debug: Log all environment variables
-        logging.info(f"SOCKS5 check requested - USE_SOCKS: {use_socks}, SOCKS: {socks_proxy}")
-        logging.info(f"Current working directory: {os.getcwd()}")
-        logging.info(f"All environment variables: {dict(os.environ)}")
-        
-        # Try to load .env file explicitly
-        from dotenv import load_dotenv
-        env_path = os.path.join(os.path.dirname(__file__), '.env')
-        logging.info(f"Loading .env from: {env_path}")
-        load_dotenv(env_path)
-        
-        # Re-read environment variables after loading .env
-        use_socks = os.getenv('USE_SOCKS', 'false').lower() == 'true'
-        socks_proxy = os.getenv('SOCKS', None)  # Changed from SOCKS5 to SOCKS
-        logging.info(f"After loading .env - USE_SOCKS: {use_socks}, SOCKS: {socks_proxy}")
-        
-        # Use requests with pysocks for SOCKS5 proxy support
-        import requests as http_requests
-        
-        # Configure proxy if SOCKS5 is enabled
-        proxies = None
-        if use_socks and socks_proxy:
-            proxy = format_proxy(socks_proxy)
-            proxies = {
-                "http": proxy,
-                "https": proxy
-            }
-            logging.info(f"Using SOCKS5 proxy for IP check: {proxy}")
-        else:
-            logging.warning(f"SOCKS5 proxy not configured - use_socks: {use_socks}, socks_proxy: {socks_proxy}")
-        
-        # Make request to jsonip.com
-        response = http_requests.get('https://jsonip.com/', proxies=proxies, timeout=10)
-        
-        if response.status_code == 200:
-            ip_data = response.json()
-            logging.info(f"IP check result: {ip_data}")
-            
-            result = {
-                "status": "success",
-                "use_socks": use_socks,
-                "socks_proxy": format_proxy(socks_proxy) if use_socks and socks_proxy else None,
-                "ip_address": ip_data.get('ip', 'unknown'),
-                "location": ip_data.get('city', 'unknown') + ', ' + ip_data.get('country', 'unknown'),
-                "isp": ip_data.get('org', 'unknown'),
-                "timestamp": ip_data.get('time', 'unknown')
-            }
-        else:
-            logging.error(f"IP check failed with status code: {response.status_code}")
-            result = {
-                "status": "error",
-                "use_socks": use_socks,
-                "socks_proxy": format_proxy(socks_proxy) if use_socks and socks_proxy else None,
-                "error": f"Failed to check IP address: HTTP {response.status_code}"
-            }
-        
-        return Response(content=json.dumps(result, ensure_ascii=False), media_type="application/json")
-    
-    except Exception as e:
-        logging.error(f"Error in SOCKS5 check: {str(e)}")
-        # Get proxy configuration for error response
-        use_socks = os.getenv('USE_SOCKS', 'false').lower() == 'true'
-        socks_proxy = os.getenv('SOCKS', None)  # Changed from SOCKS5 to SOCKS
-        
+    """SOCKS5 proxy pool state from the background probes - no API key, no live request"""
+    pool = get_proxy_pool()
+    if pool is None:
         result = {
-            "status": "error",
-            "use_socks": use_socks,
-            "socks_proxy": format_proxy(socks_proxy) if use_socks and socks_proxy else None,
-            "error": str(e)
+            "status": "disabled",
+            "use_socks": USE_SOCKS,
+            "proxies": []
         }
-        return Response(content=json.dumps(result, ensure_ascii=False), media_type="application/json", status_code=500)
+        return Response(content=json.dumps(result, ensure_ascii=False), media_type="application/json")
+
+    health = pool.health()
+    result = {
+        "status": "success" if health["healthy"] else "error",
+        "use_socks": True,
+        **health
+    }
+    return Response(content=json.dumps(result, ensure_ascii=False), media_type="application/json", status_code=200 if health["healthy"] else 503)
 
 class ChatCompletionRequest(BaseModel):
     model: str = "grok-3-auto"
@@ -238,24 +288,23 @@ async def chat_completions(request: ChatCompletionRequest, api_key: str = Depend
     # Combine context with current message
     full_message = context + f"User: {user_message}"
 
-    try:
-        # Check if SOCKS5 proxy should be used
-        use_socks = os.getenv('USE_SOCKS', 'false').lower() == 'true'
-        
-        if use_socks:
-            proxy_env = os.getenv('SOCKS', None)  # Changed from SOCKS5 to SOCKS
-            if proxy_env:
-                proxy = format_proxy(proxy_env)
-                logging.info(f"Using SOCKS5 proxy: {proxy}")
-            else:
-                logging.warning("USE_SOCKS is true but SOCKS environment variable is not set")
-                proxy = None
-        else:
-            proxy = None
-            logging.info("SOCKS5 proxy disabled")
+    # Streamed completions relay tokens while Grok is still answering
+    if request.stream:
+        logging.info(f"Streaming response requested")
+        return StreamingResponse(
+            stream_response(full_message, request.model, request.messages),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "X-Accel-Buffering": "no"
+            }
+        )
 
+    try:
         logging.info(f"Processing chat completion with model: {request.model}")
-        grok_response = Grok(request.model, proxy).start_convo(full_message)
+        # The Grok session blocks (bootstrap, anti-bot backoff, the request itself), keep it off the event loop
+        grok_response = await run_in_threadpool(complete_turn, full_message, request.model, request.messages)
 
         # Log the raw response for debugging
         logging.debug(f"Grok response: {grok_response}")
@@ -269,19 +318,7 @@ async def chat_completions(request: ChatCompletionRequest, api_key: str = Depend
         # Check if Grok returned an error
         if "error" in grok_response:
             logging.error(f"Grok API error: {grok_response['error']}")
-            # Handle both string and dict error formats
-            error_data = grok_response['error']
-            if isinstance(error_data, str):
-                # Try to parse JSON string error
-                try:
-                    error_dict = json.loads(error_data)
-                    error_message = error_dict.get('error', {}).get('message', 'Unknown error')
-                except (json.JSONDecodeError, KeyError):
-                    error_message = str(error_data)
-            elif isinstance(error_data, dict):
-                error_message = error_data.get('error', {}).get('message', error_data.get('message', 'Unknown error'))
-            else:
-                error_message = str(error_data)
+            error_message = grok_error_message(grok_response['error'])
 
             # Return error as valid chat completion response with proper status code
             response_id = f"chatcmpl-{secrets.token_hex(16)}"
@@ -324,18 +361,7 @@ async def chat_completions(request: ChatCompletionRequest, api_key: str = Depend
             logging.error("No response content from Grok")
             raise HTTPException(status_code=503, detail="No response from Grok API")
 
-        # Check if streaming is requested
-        if request.stream:
-            logging.info(f"Streaming response requested")
-            return StreamingResponse(
-                stream_response(stream_response_tokens, request.model),
-                media_type="text/event-stream",
-                headers={
-                    "Cache-Control": "no-cache",
-                    "Connection": "keep-alive",
-                    "X-Accel-Buffering": "no"
-                }
-            )
+        await run_in_threadpool(conversation_store.put, request.messages + [{"role": "assistant", "content": response_content}], grok_response.get("extra_data"))
 
         # Format response in OpenAI style (non-streaming)
         response_id = f"chatcmpl-{secrets.token_hex(16)}"
@@ -507,13 +533,60 @@ async def generate_flux(request: ImageGenerationRequest, api_key: str = Depends(
         logging.error(error_msg)
         raise HTTPException(status_code=500, detail=error_msg)
 
-async def stream_response(tokens: list, model: str):
-    """Stream response in OpenAI-compatible SSE format using actual tokens from Grok"""
+def complete_turn(message: str, model: str, messages: list) -> dict:
+    """
+    start_convo result for this turn. A known history continues its stored
+    conversation; if that fails, the full message goes to a new conversation
+    instead. Blocking, so chat_completions runs it in the threadpool.
+    """
+    follow_up = continuation(messages)
+    if follow_up:
+        # Known history: continue that Grok conversation with only the new message
+        try:
+            grok_response = Grok(model, get_proxy(follow_up[1].get("proxy")), get_proxy_pool()).start_convo(*follow_up)
+        except Exception as e:
+            grok_response = {"error": str(e)}
+        if "error" not in grok_response:
+            return grok_response
+        logging.warning(f"Continuing the stored conversation failed, starting a new one: {grok_response['error']}")
+    # Take an already bootstrapped session; the pool bootstraps one inline when empty
+    return get_grok_pool().acquire(model).start_convo(message)
+
+def stream_turn(message: str, model: str, messages: list):
+    """
+    Tokens and the final dict of stream_convo for this turn. A known history
+    continues its stored conversation; if that fails before any token was
+    sent, the full message goes to a new conversation instead.
+    """
+    follow_up = continuation(messages)
+    if follow_up:
+        streamed = False
+        try:
+            for item in Grok(model, get_proxy(follow_up[1].get("proxy")), get_proxy_pool()).stream_convo(*follow_up):
+                if isinstance(item, dict) and "error" in item and not streamed:
+                    logging.warning(f"Continuing the stored conversation failed, starting a new one: {item['error']}")
+                    break
+                streamed = streamed or isinstance(item, str)
+                yield item
+            else:
+                return
+        except Exception as e:
+            if streamed:
+                raise
+            logging.warning(f"Continuing the stored conversation failed, starting a new one: {str(e)}")
+    yield from get_grok_pool().acquire(model).stream_convo(message)
+
+def stream_response(message: str, model: str, messages: list = None):
+    """
+    Stream a Grok answer in OpenAI-compatible SSE format as the tokens arrive.
+    
+    This is a plain generator: StreamingResponse iterates it in the threadpool,
+    so the blocking Grok session never runs on the event loop.
+    """
     response_id = f"chatcmpl-{secrets.token_hex(16)}"
     created = int(time.time())
     
-    # Stream each token as it arrives from Grok
-    for token in tokens:
+    def chunk(delta: dict, finish_reason: str = None) -> str:
         chunk_data = {
             "id": response_id,
             "object": "chat.completion.chunk",
@@ -521,28 +594,31 @@ async def stream_response(tokens: list, model: str):
             "model": model,
             "choices": [{
                 "index": 0,
-                "delta": {
-                    "content": token
-                },
-                "finish_reason": None
+                "delta": delta,
+                "finish_reason": finish_reason
             }]
         }
-        yield f"data: {json.dumps(chunk_data, ensure_ascii=False)}\n\n"
-        await asyncio.sleep(0.01)  # Small delay to simulate streaming
+        return f"data: {json.dumps(chunk_data, ensure_ascii=False)}\n\n"
+    
+    content = []
+    try:
+        for item in stream_turn(message, model, messages or []):
+            if isinstance(item, str):
+                content.append(item)
+                yield chunk({"content": item})
+            elif "extra_data" in item and messages:
+                # The client sends back what it received, the joined tokens
+                conversation_store.put(messages + [{"role": "assistant", "content": "".join(content)}], item["extra_data"])
+            elif "error" in item:
+                # Headers are already sent, so the error goes out as content
+                logging.error(f"Grok API error: {item['error']}")
+                yield chunk({"content": f"Grok API Error: {grok_error_message(item['error'])}"})
+    except Exception as e:
+        logging.error(f"Error in streamed chat completion: {str(e)}")
+        yield chunk({"content": f"Error: {str(e)}"})
     
     # Send final chunk with finish_reason
-    final_chunk = {
-        "id": response_id,
-        "object": "chat.completion.chunk",
-        "created": created,
-        "model": model,
-        "choices": [{
-            "index": 0,
-            "delta": {},
-            "finish_reason": "stop"
-        }]
-    }
-    yield f"data: {json.dumps(final_chunk, ensure_ascii=False)}\n\n"
+    yield chunk({}, "stop")
     yield "data: [DONE]\n\n"
 
 if __name__ == "__main__":
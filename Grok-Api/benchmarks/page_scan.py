@@ -0,0 +1,62 @@
+"""
+Benchmark for Parser.scan_page against the BeautifulSoup tree Grok._load
+used to build for the grok.com/c page: parse time and peak memory.
+
+Usage:
+    python benchmarks/page_scan.py [page.html ...]
+
+Without arguments the saved pages in fixtures/ are used.
+"""
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4  import BeautifulSoup
+from core import Parser
+
+
+def legacy_scan(html: str) -> list:
+    return [s['src'] for s in BeautifulSoup(html, 'html.parser').find_all('script', src=True) if s['src'].startswith('/_next/static/chunks/')]
+
+
+def peak_memory(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def best_of(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main() -> None:
+    paths = sys.argv[1:]
+    if not paths:
+        fixtures = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fixtures')
+        paths = [os.path.join(fixtures, name) for name in sorted(os.listdir(fixtures)) if name.endswith('.html')]
+
+    for path in paths:
+        with open(path, encoding='utf-8') as file:
+            html = file.read()
+
+        assert Parser.scan_page(html)[0] == legacy_scan(html), f"{path}: script list differs from BeautifulSoup"
+
+        legacy_time = best_of(lambda: legacy_scan(html), 5)
+        scan_time = best_of(lambda: Parser.scan_page(html), 50)
+        legacy_peak = peak_memory(lambda: legacy_scan(html))
+        scan_peak = peak_memory(lambda: Parser.scan_page(html))
+
+        print(f"{os.path.basename(path)} ({len(html) / 1024:.0f} KiB)")
+        print(f"  BeautifulSoup   {legacy_time * 1000:8.2f} ms   peak {legacy_peak / 1024:8.0f} KiB")
+        print(f"  scan_page       {scan_time * 1000:8.2f} ms   peak {scan_peak / 1024:8.0f} KiB")
+        print(f"  speedup {legacy_time / scan_time:.1f}x, memory {legacy_peak / max(scan_peak, 1):.1f}x less\n")
+
+
+if __name__ == "__main__":
+    main()
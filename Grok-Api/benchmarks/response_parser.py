@@ -0,0 +1,124 @@
+"""
+Benchmark for core.response.ResponseParser against the per-line parse loop
+it replaced in Grok.start_convo.
+
+Usage:
+    python benchmarks/response_parser.py [transcript.ndjson ...]
+
+Recorded transcripts are raw NDJSON bodies of conversation requests, one file
+each. Without arguments, multi-thousand-token transcripts are synthesized in
+both the new-conversation and the follow-up schema.
+"""
+import os
+import sys
+import json
+import random
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.response as response_module
+from core.response import ResponseParser
+
+
+def synthesize(tokens: int, new_conversation: bool, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = ["the", "model", "streams", "tokens", "über", "quickly", ",", ".", "\n", "🙂", "response"]
+
+    def event(body: dict) -> str:
+        result = {"response": body} if new_conversation else body
+        return json.dumps({"result": result}, ensure_ascii=False)
+
+    lines = []
+    if new_conversation:
+        lines.append(json.dumps({"result": {"conversation": {"conversationId": "c0ffee", "title": "New conversation"}}}))
+    lines.append(event({"userResponse": {"responseId": "u1", "message": "Hello", "sender": "human"}}))
+
+    text = []
+    for index in range(tokens):
+        token = rng.choice(words) + " "
+        text.append(token)
+        lines.append(event({"token": token, "isThinking": False, "isSoftStop": False, "responseId": "r1"}))
+
+    lines.append(event({"modelResponse": {"responseId": "r1", "message": "".join(text), "sender": "ASSISTANT", "generatedImageUrls": []}}))
+    lines.append(event({"finalMetadata": {"followUpSuggestions": []}}))
+    return "\n".join(lines)
+
+
+def legacy_parse(text: str, new_conversation: bool) -> tuple:
+    """The parse loop from Grok.start_convo before ResponseParser, kept for comparison."""
+    response = conversation_id = parent_response = image_urls = None
+    stream_response = []
+
+    for response_dict in text.strip().split('\n'):
+        data = json.loads(response_dict)
+
+        if new_conversation:
+            token = data.get('result', {}).get('response', {}).get('token')
+            if token:
+                stream_response.append(token)
+            if not response and data.get('result', {}).get('response', {}).get('modelResponse', {}).get('message'):
+                response = data['result']['response']['modelResponse']['message']
+            if not conversation_id and data.get('result', {}).get('conversation', {}).get('conversationId'):
+                conversation_id = data['result']['conversation']['conversationId']
+            if not parent_response and data.get('result', {}).get('response', {}).get('modelResponse', {}).get('responseId'):
+                parent_response = data['result']['response']['modelResponse']['responseId']
+            if not image_urls and data.get('result', {}).get('response', {}).get('modelResponse', {}).get('generatedImageUrls', {}):
+                image_urls = data['result']['response']['modelResponse']['generatedImageUrls']
+        else:
+            token = data.get('result', {}).get('token')
+            if token:
+                stream_response.append(token)
+            if not response and data.get('result', {}).get('modelResponse', {}).get('message'):
+                response = data['result']['modelResponse']['message']
+            if not parent_response and data.get('result', {}).get('modelResponse', {}).get('responseId'):
+                parent_response = data['result']['modelResponse']['responseId']
+            if not image_urls and data.get('result', {}).get('modelResponse', {}).get('generatedImageUrls', {}):
+                image_urls = data['result']['modelResponse']['generatedImageUrls']
+
+    return response, stream_response, parent_response, image_urls
+
+
+def parse(text: str) -> tuple:
+    parser = ResponseParser().feed_text(text)
+    return parser.response, parser.tokens, parser.parent_response, parser.image_urls
+
+
+def best_of(func, repeat: int = 5) -> float:
+    number = 3
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def main() -> None:
+    transcripts = []
+    for path in sys.argv[1:]:
+        with open(path, encoding="utf-8") as file:
+            text = file.read()
+        transcripts.append((os.path.basename(path), text, '"conversation"' in text))
+    if not transcripts:
+        print("No recorded transcripts given, using synthesized ones\n")
+        for tokens in (2000, 8000):
+            transcripts.append((f"synthetic new {tokens} tokens", synthesize(tokens, True), True))
+            transcripts.append((f"synthetic follow-up {tokens} tokens", synthesize(tokens, False), False))
+
+    try:
+        import orjson
+        backends = {"json": json.loads, "orjson": orjson.loads}
+    except ImportError:
+        backends = {"json": json.loads}
+
+    for name, text, new_conversation in transcripts:
+        assert legacy_parse(text, new_conversation) == parse(text), f"{name}: parser output differs from the legacy loop"
+
+        legacy = best_of(lambda: legacy_parse(text, new_conversation))
+        print(f"{name} ({len(text) / 1024:.0f} KiB)")
+        print(f"  legacy loop          {legacy * 1000:8.2f} ms")
+        for backend, loads in backends.items():
+            response_module.loads = loads
+            elapsed = best_of(lambda: parse(text))
+            print(f"  parser ({backend:<6})      {elapsed * 1000:8.2f} ms  {legacy / elapsed:5.2f}x")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+pytest-benchmark timings for the signing and handshake hot paths in core.reverse.
+
+    python -m pytest benchmarks/test_reverse_benchmarks.py
+
+Each mean is compared with benchmarks/baseline.json, and a benchmark that gets
+slower than GROK_BENCH_TOLERANCE (default 2.0) times its baseline fails the
+run. On a machine whose timings can't be compared with the baseline, set
+GROK_BENCH_SKIP_BASELINE=1 to only report them, or pass --benchmark-disable to
+run each function once without timing. Set GROK_BENCH_UPDATE_BASELINE=1 to
+record new baselines instead, e.g. after an intended change or on new
+hardware. Inputs are the recorded golden vectors in
+fixtures/reverse_golden.json, so nothing touches the network.
+"""
+import os
+import sys
+import json
+import tempfile
+from pathlib import Path
+from base64 import b64decode
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+GROK_API_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(GROK_API_DIR))
+
+from core.reverse.xctid import Signature, PreparedSigner
+from core.reverse.anon import Anon
+from core.reverse.parser import Parser
+from core.reverse.mappings import MappingStore
+
+BASELINE_FILE = Path(__file__).resolve().parent / "baseline.json"
+TOLERANCE = float(os.getenv("GROK_BENCH_TOLERANCE", "2.0"))
+SKIP_BASELINE = os.getenv("GROK_BENCH_SKIP_BASELINE", "").lower() in ("1", "true")
+UPDATE_BASELINE = os.getenv("GROK_BENCH_UPDATE_BASELINE", "").lower() in ("1", "true")
+
+with open(GROK_API_DIR / "fixtures" / "reverse_golden.json", encoding="utf-8") as f:
+    GOLDEN = json.load(f)
+
+SESSION = GOLDEN["sessions"][0]
+CASE = SESSION["cases"][1]
+ANON = GOLDEN["anon"][0]
+
+_baseline = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+_measured = {}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def baseline_file():
+    yield
+    if UPDATE_BASELINE and _measured:
+        _baseline.update(_measured)
+        BASELINE_FILE.write_text(json.dumps(dict(sorted(_baseline.items())), indent=2) + "\n")
+
+
+@pytest.fixture(scope="module")
+def offline_mappings():
+    previous = Parser.mappings
+    with tempfile.TemporaryDirectory() as tmp:
+        Parser.mappings = MappingStore(Path(tmp) / "grok.db")
+        yield
+    Parser.mappings = previous
+
+
+def check_baseline(benchmark, name: str):
+    if benchmark.stats is None:
+        # --benchmark-disable runs the function once without timing it
+        return
+    mean_us = benchmark.stats.stats.mean * 1e6
+    if UPDATE_BASELINE:
+        _measured[name] = {"mean_us": round(mean_us, 3)}
+        return
+    if not SKIP_BASELINE and name in _baseline:
+        limit = _baseline[name]["mean_us"] * TOLERANCE
+        assert mean_us <= limit, f"{name}: mean {mean_us:.2f} us exceeds {TOLERANCE}x the baseline of {_baseline[name]['mean_us']} us"
+
+
+def test_generate_sign(benchmark):
+    result = benchmark(
+        Signature.generate_sign, CASE["path"], CASE["method"], SESSION["verification"], SESSION["svg"],
+        SESSION["x_values"], CASE["time_n"], CASE["random_float"]
+    )
+    assert result == CASE["expected"]
+    check_baseline(benchmark, "generate_sign")
+
+
+def test_prepared_sign(benchmark):
+    signer = PreparedSigner(SESSION["verification"], SESSION["svg"], SESSION["x_values"])
+    result = benchmark(signer.sign, CASE["path"], CASE["method"], CASE["time_n"], CASE["random_float"])
+    assert result == CASE["expected"]
+    check_baseline(benchmark, "prepared_sign")
+
+
+def test_xs(benchmark):
+    result = benchmark(Signature.xs, b64decode(SESSION["verification"]), SESSION["svg"], SESSION["x_values"])
+    assert result == SESSION["xs"]
+    check_baseline(benchmark, "xs")
+
+
+def test_xa(benchmark):
+    result = benchmark(Signature.xa, SESSION["svg"])
+    assert result == SESSION["xa"]
+    check_baseline(benchmark, "xa")
+
+
+def test_tohex(benchmark):
+    values = [value for value, _ in GOLDEN["tohex"]]
+    result = benchmark(lambda: [Signature.tohex(value) for value in values])
+    assert result == [expected for _, expected in GOLDEN["tohex"]]
+    check_baseline(benchmark, "tohex")
+
+
+def test_sign_challenge(benchmark):
+    result = benchmark(Anon.sign_challenge, bytes.fromhex(ANON["challenge_hex"]), ANON["private_key"])
+    assert result == ANON["signed"]
+    check_baseline(benchmark, "sign_challenge")
+
+
+def test_parse_values(benchmark, offline_mappings):
+    result = benchmark(Parser.parse_values, SESSION["page"], SESSION["anim"], SESSION["script_id"])
+    assert result == (SESSION["svg"], SESSION["x_values"])
+    check_baseline(benchmark, "parse_values")
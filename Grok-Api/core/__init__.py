@@ -2,6 +2,12 @@ from .logger         import Log
 from .runtime        import Run, Utils
 from .headers        import Headers
 from .reverse.parser import Parser
-from .reverse.xctid  import Signature
-from .reverse.anon   import Anon
-from .grok           import Grok
\ No newline at end of file
+from .reverse.xctid  import Signature, PreparedSigner
+from .reverse.anon   import Anon, KeyPool, key_pool
+from .response       import ResponseParser
+from .sqlite_store   import SQLiteStore
+from .bootstrap_cache import BootstrapCache, bootstrap_cache
+from .identity_store import IdentityStore, identity_store
+from .conversation_store import ConversationStore, conversation_store
+from .proxy_pool     import ProxyPool
+from .grok           import Grok, GrokPool, AntiBotStats, anti_bot_stats
\ No newline at end of file
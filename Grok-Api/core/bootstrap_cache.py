@@ -0,0 +1,49 @@
+from json    import dumps, loads
+from os      import getenv
+from pathlib import Path
+from time    import time
+from typing  import Optional
+
+from .sqlite_store import SQLiteStore
+
+
+class BootstrapCache(SQLiteStore):
+    """
+    TTL cache for the values Grok._load scrapes from grok.com/c (actions,
+    xsid_script, baggage, sentry_trace). They only change when grok.com
+    deploys, so one scrape can serve every session until it expires.
+
+    Entries live in the shared SQLite store, so all uvicorn workers share
+    them and a cold worker can skip the page fetch and parse.
+    """
+
+    FIELDS: tuple = ("actions", "xsid_script", "baggage", "sentry_trace")
+    TABLES: tuple = (
+        "CREATE TABLE IF NOT EXISTS artifacts (name TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)",
+    )
+
+    def __init__(self, db_path: Path = None, ttl: float = None) -> None:
+        super().__init__(db_path)
+        self.ttl: float = float(getenv("GROK_BOOTSTRAP_TTL", "900")) if ttl is None else ttl
+
+    def get(self, name: str = "grok.com/c") -> Optional[dict]:
+        if self.ttl <= 0:
+            return None
+        row = self.run(lambda conn: conn.execute("SELECT value, created_at FROM artifacts WHERE name = ?", (name,)).fetchone())
+        if row is None or time() - row[1] > self.ttl:
+            return None
+        return loads(row[0])
+
+    def put(self, artifacts: dict, name: str = "grok.com/c") -> None:
+        if self.ttl <= 0:
+            return
+        value: str = dumps({field: artifacts[field] for field in self.FIELDS})
+        self.run(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO artifacts (name, value, created_at) VALUES (?, ?, ?)", (name, value, time())
+        ))
+
+    def invalidate(self, name: str = "grok.com/c") -> None:
+        self.run(lambda conn: conn.execute("DELETE FROM artifacts WHERE name = ?", (name,)))
+
+
+bootstrap_cache: BootstrapCache = BootstrapCache()
@@ -0,0 +1,66 @@
+import sqlite3
+from json    import dumps, loads
+from hashlib import sha256
+from os      import getenv
+from pathlib import Path
+from time    import time
+from typing  import Optional
+
+from .sqlite_store import SQLiteStore
+
+
+class ConversationStore(SQLiteStore):
+    """
+    Maps a chat history to the Grok conversation that produced it, so a
+    follow-up chat completion continues that conversation and sends only the
+    new user message.
+
+    The key is a hash of the messages up to and including the assistant reply
+    we returned; the value is the start_convo `extra_data` (conversationId,
+    parentResponseId, identity and cookies). A client that sends the history
+    back unchanged plus a new user message hits the entry. Entries live in
+    the shared SQLite store so every worker can continue any conversation,
+    and expire after `ttl` seconds (0 disables the store).
+    """
+
+    TABLES: tuple = (
+        "CREATE TABLE IF NOT EXISTS conversations (key TEXT PRIMARY KEY, extra_data TEXT NOT NULL, created_at REAL NOT NULL)",
+    )
+
+    def __init__(self, db_path: Path = None, ttl: float = None) -> None:
+        super().__init__(db_path)
+        self.ttl: float = float(getenv("GROK_CONVERSATION_TTL", "3600")) if ttl is None else ttl
+
+    @staticmethod
+    def key(messages: list) -> str:
+        # Only role and content identify a turn; clients may add or drop other fields
+        history: list = [[message.get("role"), message.get("content")] for message in messages]
+        return sha256(dumps(history, ensure_ascii=False, separators=(",", ":")).encode()).hexdigest()
+
+    def get(self, messages: list) -> Optional[dict]:
+        """extra_data of the conversation whose history is exactly `messages`, if still live."""
+        if self.ttl <= 0 or not messages:
+            return None
+        key: str = self.key(messages)
+        row = self.run(lambda conn: conn.execute("SELECT extra_data, created_at FROM conversations WHERE key = ?", (key,)).fetchone())
+        if row is None or time() - row[1] > self.ttl:
+            return None
+        return loads(row[0])
+
+    def put(self, messages: list, extra_data: dict) -> None:
+        """Remember the conversation for `messages`, which must end with the assistant reply."""
+        if self.ttl <= 0 or not extra_data:
+            return
+        now: float = time()
+        key: str = self.key(messages)
+
+        def store(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM conversations WHERE created_at < ?", (now - self.ttl,))
+            conn.execute(
+                "INSERT OR REPLACE INTO conversations (key, extra_data, created_at) VALUES (?, ?, ?)",
+                (key, dumps(extra_data), now)
+            )
+        self.run(store)
+
+
+conversation_store: ConversationStore = ConversationStore()
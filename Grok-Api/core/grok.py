@@ -1,12 +1,19 @@
-from core        import Log, Run, Utils, Parser, Signature, Anon, Headers
+from core        import Log, Run, Utils, Parser, PreparedSigner, Anon, Headers, key_pool
+from .response   import ResponseParser
+from .bootstrap_cache import bootstrap_cache
+from .identity_store import identity_store
+from .proxy_pool  import ProxyPool
 from dotenv import load_dotenv
 import os
 from curl_cffi   import requests, CurlMime
 from dataclasses import dataclass, field
-from bs4         import BeautifulSoup
-from json        import dumps, loads
+from json        import dumps
 from secrets     import token_hex
 from uuid        import uuid4
+from collections import deque
+from threading   import Thread, Lock, Condition, current_thread
+from time        import time, sleep
+from random      import uniform
 
 @dataclass
 class Models:
@@ -22,10 +29,41 @@ class Models:
 
 _Models = Models()
 
+# Retries after "rejected by anti-bot rules", each on a new session
+ANTI_BOT_RETRIES: int = int(os.getenv("GROK_ANTI_BOT_RETRIES", "3"))
+ANTI_BOT_BACKOFF: float = float(os.getenv("GROK_ANTI_BOT_BACKOFF", "1.0"))
+ANTI_BOT_BACKOFF_MAX: float = 10.0
+
+class AntiBotStats:
+    """Process-wide counters for anti-bot rejections and the retries they caused."""
+
+    def __init__(self) -> None:
+        self._lock: Lock = Lock()
+        self.rejections: int = 0
+        self.retries: int = 0
+        self.recovered: int = 0
+        self.exhausted: int = 0
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def health(self) -> dict:
+        with self._lock:
+            return {
+                "max_retries": ANTI_BOT_RETRIES,
+                "rejections": self.rejections,
+                "retries": self.retries,
+                "recovered": self.recovered,
+                "exhausted": self.exhausted,
+            }
+
+anti_bot_stats: AntiBotStats = AntiBotStats()
+
 class Grok:
     
     
-    def __init__(self, model: str = "grok-3-auto", proxy: str = None) -> None:
+    def __init__(self, model: str = "grok-3-auto", proxy: str = None, proxies: "list | ProxyPool" = None) -> None:
         self.session: requests.session.Session = requests.Session(impersonate="chrome136", default_headers=False)
         self.headers: Headers = Headers()
         
@@ -33,7 +71,14 @@ class Grok:
         self.model: str = model
         self.mode: str = _Models.get_model_mode(model, 1)
         self.c_run: int = 0
-        self.keys: dict = Anon.generate_keys()
+        # Filled by the handshake: a pooled keypair, or the key of a reused identity
+        self.keys: dict = {}
+        self.bootstrapped_at: float = None
+        self.artifacts_cached: bool = False
+        self.identity_reused: bool = False
+        # Proxies an anti-bot retry rotates through (a list or a ProxyPool), and how many retries led to this session
+        self.proxies: "list | ProxyPool" = proxies or []
+        self.attempt: int = 0
         if proxy:
             self.session.proxies = {
                 "all": proxy
@@ -42,16 +87,30 @@ class Grok:
     def _load(self, extra_data: dict = None) -> None:
         
         if not extra_data:
+            # Page artifacts only change on a grok.com deploy, reuse a recent scrape
+            cached: dict = bootstrap_cache.get()
+            if cached:
+                self.actions: list = cached["actions"]
+                self.xsid_script: str = cached["xsid_script"]
+                self.baggage: str = cached["baggage"]
+                self.sentry_trace: str = cached["sentry_trace"]
+                self.artifacts_cached = True
+                return
+            
             self.session.headers = self.headers.LOAD
             load_site: requests.models.Response = self.session.get('https://grok.com/c')
             self.session.cookies.update(load_site.cookies)
             
-            scripts: list = [s['src'] for s in BeautifulSoup(load_site.text, 'html.parser').find_all('script', src=True) if s['src'].startswith('/_next/static/chunks/')]
+            scripts, self.baggage, self.sentry_trace = Parser.scan_page(load_site.text)
 
             self.actions, self.xsid_script = Parser.parse_grok(scripts)
             
-            self.baggage: str = Utils.between(load_site.text, '<meta name="baggage" content="', '"')
-            self.sentry_trace: str = Utils.between(load_site.text, '<meta name="sentry-trace" content="', '-')
+            bootstrap_cache.put({
+                "actions": self.actions,
+                "xsid_script": self.xsid_script,
+                "baggage": self.baggage,
+                "sentry_trace": self.sentry_trace,
+            })
         else:
             self.session.cookies.update(extra_data["cookies"])
 
@@ -61,6 +120,63 @@ class Grok:
             self.sentry_trace: str = extra_data["sentry_trace"]
             
     
+    def set_model(self, model: str) -> None:
+        self.model_mode: str = _Models.get_model_mode(model, 0)
+        self.model: str = model
+        self.mode: str = _Models.get_model_mode(model, 1)
+    
+    def bootstrap(self) -> "Grok":
+        """
+        Run everything a new conversation needs before the message is sent:
+        load grok.com/c, upload the anonymous key, sign the challenge and
+        parse the verification values. Independent of the message and model,
+        so it can be done ahead of time by GrokPool.
+
+        A stored identity from identity_store skips the key upload; if
+        grok.com no longer accepts it, it is retired and a fresh one is
+        established.
+        """
+        self._load()
+        identity: dict = identity_store.checkout()
+        if identity:
+            # Cookies grok.com/c set, kept when a rejected identity's cookies are dropped
+            page_cookies: dict = self.session.cookies.get_dict()
+            try:
+                self._handshake(identity)
+            except Exception:
+                Log.Error(f"Stored identity {identity['anon_user']} was not accepted, establishing a new one")
+                identity_store.retire(identity["anon_user"])
+                self.session.cookies.clear()
+                self.session.cookies.update(page_cookies)
+                identity = None
+        if not identity:
+            try:
+                self._handshake()
+            except Exception:
+                # Stale actions or xsid script break the handshake or the signer, scrape again next time
+                if self.artifacts_cached:
+                    bootstrap_cache.invalidate()
+                raise
+            identity_store.put(self.anon_user, self.keys["privateKey"], self.session.cookies.get_dict())
+        self.bootstrapped_at = time()
+        return self
+
+    def _handshake(self, identity: dict = None) -> None:
+        if identity:
+            self.session.cookies.update(identity["cookies"])
+            self.anon_user: str = identity["anon_user"]
+            self.keys = {"privateKey": identity["privateKey"]}
+            self.identity_reused = True
+            self.c_run = 1
+        else:
+            if "userPublicKey" not in self.keys:
+                self.keys = key_pool.take()
+            self.identity_reused = False
+            self.c_run = 0
+            self.c_request(self.actions[0])
+        self.c_request(self.actions[1])
+        self.c_request(self.actions[2])
+    
     def c_request(self, next_action: str) -> None:
         
         self.session.headers = self.headers.C_REQUEST
@@ -110,18 +226,21 @@ class Grok:
                 case 2:
                     self.verification_token, self.anim = Parser.get_anim(c_request.text, "grok-site-verification")
                     self.svg_data, self.numbers = Parser.parse_values(c_request.text, self.anim, self.xsid_script)
+                    self.signer: PreparedSigner = PreparedSigner(self.verification_token, self.svg_data, self.numbers)
                     
             self.c_run += 1
         
     
-    def start_convo(self, message: str, extra_data: dict = None) -> dict:
+    def _prepare_convo(self, message: str, extra_data: dict = None) -> tuple[str, dict]:
+        """
+        Bootstrap (or restore) the session, sign the request and set the
+        conversation headers. Returns the URL and JSON body to post.
+        """
         
         if not extra_data:
-            self._load()
-            self.c_request(self.actions[0])
-            self.c_request(self.actions[1])
-            self.c_request(self.actions[2])
-            xsid: str = Signature.generate_sign('/rest/app-chat/conversations/new', 'POST', self.verification_token, self.svg_data, self.numbers)
+            if self.bootstrapped_at is None:
+                self.bootstrap()
+            xsid: str = self.signer.sign('/rest/app-chat/conversations/new', 'POST')
         else:
             self._load(extra_data)
             self.c_run: int = 1
@@ -129,7 +248,7 @@ class Grok:
             self.keys["privateKey"] = extra_data["privateKey"]
             self.c_request(self.actions[1])
             self.c_request(self.actions[2])
-            xsid: str = Signature.generate_sign(f'/rest/app-chat/conversations/{extra_data["conversationId"]}/responses', 'POST', self.verification_token, self.svg_data, self.numbers)
+            xsid: str = self.signer.sign(f'/rest/app-chat/conversations/{extra_data["conversationId"]}/responses', 'POST')
 
         self.session.headers = self.headers.CONVERSATION
         self.session.headers.update({
@@ -171,160 +290,302 @@ class Grok:
                 'modelMode': self.model_mode,
                 'isAsyncChat': False,
             }
+            return 'https://grok.com/rest/app-chat/conversations/new', conversation_data
+        
+        conversation_data: dict = {
+            'message': message,
+            'modelName': self.model,
+            'parentResponseId': extra_data["parentResponseId"],
+            'disableSearch': False,
+            'enableImageGeneration': True,
+            'imageAttachments': [],
+            'returnImageBytes': False,
+            'returnRawGrokInXaiRequest': False,
+            'fileAttachments': [],
+            'enableImageStreaming': True,
+            'imageGenerationCount': 2,
+            'forceConcise': False,
+            'toolOverrides': {},
+            'enableSideBySide': True,
+            'sendFinalMetadata': True,
+            'customPersonality': '',
+            'isReasoning': False,
+            'webpageUrls': [],
+            'metadata': {
+                'requestModelDetails': {
+                    'modelId': self.model,
+                },
+                'request_metadata': {
+                    'model': self.model,
+                    'mode': self.mode,
+                },
+            },
+            'disableTextFollowUps': False,
+            'disableArtifact': False,
+            'isFromGrokFiles': False,
+            'disableMemory': False,
+            'forceSideBySide': False,
+            'modelMode': self.model_mode,
+            'isAsyncChat': False,
+            'skipCancelCurrentInflightRequests': False,
+            'isRegenRequest': False,
+        }
+
+        return f'https://grok.com/rest/app-chat/conversations/{extra_data["conversationId"]}/responses', conversation_data
+    
+    def _extra_data(self, conversation_id: str, parent_response: str) -> dict:
+        return {
+            "anon_user": self.anon_user,
+            "cookies": self.session.cookies.get_dict(),
+            "actions": self.actions,
+            "xsid_script": self.xsid_script,
+            "baggage": self.baggage,
+            "sentry_trace": self.sentry_trace,
+            "conversationId": conversation_id,
+            "parentResponseId": parent_response,
+            "privateKey": self.keys["privateKey"],
+            # Follow-up turns go through the same proxy
+            "proxy": self.session.proxies.get("all")
+        }
+    
+    def _next_proxy(self) -> str:
+        current: str = self.session.proxies.get("all")
+        if isinstance(self.proxies, ProxyPool):
+            self.proxies.report_failure(current, "rejected by anti-bot rules")
+            return self.proxies.pick(exclude=current)
+        if not self.proxies:
+            return current
+        if current in self.proxies:
+            return self.proxies[(self.proxies.index(current) + 1) % len(self.proxies)]
+        return self.proxies[0]
+
+    def _rejected(self) -> "Grok":
+        """
+        Handle an anti-bot rejection: drop the cached artifacts and identity,
+        wait a jittered backoff and return a new session on the next proxy,
+        or None once GROK_ANTI_BOT_RETRIES retries have been used.
+        """
+        anti_bot_stats.count("rejections")
+        bootstrap_cache.invalidate()
+        identity_store.retire(self.anon_user)
+
+        if self.attempt >= ANTI_BOT_RETRIES:
+            anti_bot_stats.count("exhausted")
+            Log.Error(f"Rejected by anti-bot rules, giving up after {self.attempt} retries")
+            return None
+
+        # Full jitter, so workers rejected together do not retry together
+        delay: float = uniform(0, min(ANTI_BOT_BACKOFF_MAX, ANTI_BOT_BACKOFF * 2 ** self.attempt))
+        Log.Error(f"Rejected by anti-bot rules, retry {self.attempt + 1}/{ANTI_BOT_RETRIES} in {delay:.1f}s...")
+        sleep(delay)
+
+        anti_bot_stats.count("retries")
+        retry: Grok = Grok(self.model, self._next_proxy(), self.proxies)
+        retry.attempt = self.attempt + 1
+        return retry
+
+    def start_convo(self, message: str, extra_data: dict = None) -> dict:
+        
+        url, conversation_data = self._prepare_convo(message, extra_data)
+        convo_request: requests.models.Response = self.session.post(url, json=conversation_data, timeout=9999)
+        
+        Log.Info(f"Response status: {convo_request.status_code}")
+        Log.Info(f"Response contains 'modelResponse': {'modelResponse' in convo_request.text}")
+        Log.Info(f"Response text length: {len(convo_request.text)}")
+        
+        if "modelResponse" in convo_request.text:
+            if self.attempt:
+                anti_bot_stats.count("recovered")
+            parser: ResponseParser = ResponseParser().feed_text(convo_request.text)
             
-            convo_request: requests.models.Response = self.session.post('https://grok.com/rest/app-chat/conversations/new', json=conversation_data, timeout=9999)
-            
-            Log.Info(f"Response status: {convo_request.status_code}")
-            Log.Info(f"Response contains 'modelResponse': {'modelResponse' in convo_request.text}")
-            Log.Info(f"Response text length: {len(convo_request.text)}")
+            Log.Info(f"Final response: {parser.response}")
+            Log.Info(f"Stream response tokens: {len(parser.tokens)}")
             
-            if "modelResponse" in convo_request.text:
-                response = conversation_id = parent_response = image_urls = None
-                stream_response: list = []
-                
-                for response_dict in convo_request.text.strip().split('\n'):
-                    data: dict = loads(response_dict)
-
-                    token: str = data.get('result', {}).get('response', {}).get('token')
-                    if token:
-                        stream_response.append(token)
-                        
-                    if not response and data.get('result', {}).get('response', {}).get('modelResponse', {}).get('message'):
-                        response: str = data['result']['response']['modelResponse']['message']
-                        Log.Info(f"Found response message: {response[:100]}...")
-
-                    if not conversation_id and data.get('result', {}).get('conversation', {}).get('conversationId'):
-                        conversation_id: str = data['result']['conversation']['conversationId']
-
-                    if not parent_response and data.get('result', {}).get('response', {}).get('modelResponse', {}).get('responseId'):
-                        parent_response: str = data['result']['response']['modelResponse']['responseId']
-                    
-                    if not image_urls and data.get('result', {}).get('response', {}).get('modelResponse', {}).get('generatedImageUrls', {}):
-                        image_urls: str = data['result']['response']['modelResponse']['generatedImageUrls']
-                
-                Log.Info(f"Final response: {response}")
-                Log.Info(f"Stream response tokens: {len(stream_response)}")
-                    
-                
-                return {
-                    "response": response,
-                    "stream_response": stream_response,
-                    "images": image_urls,
-                    "extra_data": {
-                        "anon_user": self.anon_user,
-                        "cookies": self.session.cookies.get_dict(),
-                        "actions": self.actions,
-                        "xsid_script": self.xsid_script,
-                        "baggage": self.baggage,
-                        "sentry_trace": self.sentry_trace,
-                        "conversationId": conversation_id,
-                        "parentResponseId": parent_response,
-                        "privateKey": self.keys["privateKey"]
-                    }
-                }
-            else:
-                Log.Info(f"Response does not contain 'modelResponse'")
-                Log.Info(f"Response text preview: {convo_request.text[:500]}")
-                if 'rejected by anti-bot rules' in convo_request.text:
-                    Log.Error("Rejected by anti-bot rules, retrying...")
-                    return Grok(self.session.proxies.get("all")).start_convo(message=message, extra_data=extra_data)
-                Log.Error("Something went wrong")
-                Log.Error(convo_request.text)
-                return {"error": convo_request.text}
-        else:
-            conversation_data: dict = {
-                'message': message,
-                'modelName': self.model,
-                'parentResponseId': extra_data["parentResponseId"],
-                'disableSearch': False,
-                'enableImageGeneration': True,
-                'imageAttachments': [],
-                'returnImageBytes': False,
-                'returnRawGrokInXaiRequest': False,
-                'fileAttachments': [],
-                'enableImageStreaming': True,
-                'imageGenerationCount': 2,
-                'forceConcise': False,
-                'toolOverrides': {},
-                'enableSideBySide': True,
-                'sendFinalMetadata': True,
-                'customPersonality': '',
-                'isReasoning': False,
-                'webpageUrls': [],
-                'metadata': {
-                    'requestModelDetails': {
-                        'modelId': self.model,
-                    },
-                    'request_metadata': {
-                        'model': self.model,
-                        'mode': self.mode,
-                    },
-                },
-                'disableTextFollowUps': False,
-                'disableArtifact': False,
-                'isFromGrokFiles': False,
-                'disableMemory': False,
-                'forceSideBySide': False,
-                'modelMode': self.model_mode,
-                'isAsyncChat': False,
-                'skipCancelCurrentInflightRequests': False,
-                'isRegenRequest': False,
+            return {
+                "response": parser.response,
+                "stream_response": parser.tokens,
+                "images": parser.image_urls,
+                "extra_data": self._extra_data(extra_data["conversationId"] if extra_data else parser.conversation_id, parser.parent_response)
             }
+        else:
+            Log.Info(f"Response does not contain 'modelResponse'")
+            Log.Info(f"Response text preview: {convo_request.text[:500]}")
+            if 'rejected by anti-bot rules' in convo_request.text:
+                retry: Grok = self._rejected()
+                if retry:
+                    return retry.start_convo(message=message, extra_data=extra_data)
+            Log.Error("Something went wrong")
+            Log.Error(convo_request.text)
+            return {"error": convo_request.text}
+    
+    def stream_convo(self, message: str, extra_data: dict = None):
+        """
+        Streaming variant of start_convo. Reads the NDJSON body line by line and
+        yields every token (str) as soon as it arrives, then one final dict with
+        the same keys as the start_convo result minus "stream_response", or
+        {"error": ...} when Grok did not answer with a model response.
+        """
+        
+        url, conversation_data = self._prepare_convo(message, extra_data)
+        convo_request: requests.models.Response = self.session.post(url, json=conversation_data, stream=True, timeout=9999)
+        
+        # Tokens are handed to the caller, no need to keep them around
+        parser: ResponseParser = ResponseParser(keep_tokens=False)
+        try:
+            for line in convo_request.iter_lines():
+                token: str = parser.feed(line)
+                if token:
+                    yield token
+        finally:
+            convo_request.close()
+        
+        Log.Info(f"Streamed response tokens: {parser.token_count}")
+        
+        if not parser.model_response_seen:
+            body: str = parser.error_text
+            Log.Info(f"Response text preview: {body[:500]}")
+            if 'rejected by anti-bot rules' in body and not parser.token_count:
+                retry: Grok = self._rejected()
+                if retry:
+                    yield from retry.stream_convo(message=message, extra_data=extra_data)
+                    return
+            Log.Error("Something went wrong")
+            Log.Error(body)
+            yield {"error": body}
+            return
+        
+        if self.attempt:
+            anti_bot_stats.count("recovered")
+        yield {
+            "response": parser.response,
+            "images": parser.image_urls,
+            "extra_data": self._extra_data(extra_data["conversationId"] if extra_data else parser.conversation_id, parser.parent_response)
+        }
+
+
+class GrokPool:
+    """
+    Keeps `size` bootstrapped Grok sessions ready for new conversations.
+
+    A background thread refills the pool whenever a session is handed out or
+    expires. Sessions are single use (a conversation changes their state), are
+    dropped once older than `ttl` seconds, and a failed bootstrap is
+    discarded and retried after a short backoff. When the pool is empty,
+    acquire() bootstraps a session inline, exactly like an unpooled request.
+    """
+
+    def __init__(self, size: int = 2, ttl: float = 300, proxy: str = None, proxies: "list | ProxyPool" = None) -> None:
+        self.size: int = max(0, size)
+        self.ttl: float = ttl
+        self.proxy: str = proxy
+        self.proxies: "list | ProxyPool" = proxies
+
+        self._ready: deque = deque()
+        self._lock: Lock = Lock()
+        self._wakeup: Condition = Condition(self._lock)
+        self._thread: Thread = None
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.expired: int = 0
+        self.bootstrap_failures: int = 0
+        self.last_error: str = None
 
-            convo_request: requests.models.Response = self.session.post(f'https://grok.com/rest/app-chat/conversations/{extra_data["conversationId"]}/responses', json=conversation_data, timeout=9999)
-
-            Log.Info(f"Response status: {convo_request.status_code}")
-            Log.Info(f"Response contains 'modelResponse': {'modelResponse' in convo_request.text}")
-            Log.Info(f"Response text length: {len(convo_request.text)}")
-
-            if "modelResponse" in convo_request.text:
-                response = conversation_id = parent_response = image_urls = None
-                stream_response: list = []
-                
-                for response_dict in convo_request.text.strip().split('\n'):
-                    data: dict = loads(response_dict)
-
-                    token: str = data.get('result', {}).get('token')
-                    if token:
-                        stream_response.append(token)
-                        
-                    if not response and data.get('result', {}).get('modelResponse', {}).get('message'):
-                        response: str = data['result']['modelResponse']['message']
-                        Log.Info(f"Found response message: {response[:100]}...")
-
-                    if not parent_response and data.get('result', {}).get('modelResponse', {}).get('responseId'):
-                        parent_response: str = data['result']['modelResponse']['responseId']
-                        
-                    if not image_urls and data.get('result', {}).get('modelResponse', {}).get('generatedImageUrls', {}):
-                        image_urls: str = data['result']['modelResponse']['generatedImageUrls']
-                
-                Log.Info(f"Final response: {response}")
-                Log.Info(f"Stream response tokens: {len(stream_response)}")
-                
-                return {
-                    "response": response,
-                    "stream_response": stream_response,
-                    "images": image_urls,
-                    "extra_data": {
-                        "anon_user": self.anon_user,
-                        "cookies": self.session.cookies.get_dict(),
-                        "actions": self.actions,
-                        "xsid_script": self.xsid_script,
-                        "baggage": self.baggage,
-                        "sentry_trace": self.sentry_trace,
-                        "conversationId": extra_data["conversationId"],
-                        "parentResponseId": parent_response,
-                        "privateKey": self.keys["privateKey"]
-                    }
-                }
+    def start(self) -> "GrokPool":
+        with self._lock:
+            if self._thread is None and self.size:
+                self._thread = Thread(target=self._fill, name="grok-pool", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5) -> None:
+        """
+        Stop the refill thread and wait up to `timeout` seconds for it to exit.
+        The pool can be started again afterwards; a thread still finishing a
+        bootstrap sees it is no longer the pool's thread and exits on its own.
+        """
+        with self._lock:
+            thread: Thread = self._thread
+            self._thread = None
+            self._wakeup.notify_all()
+        if thread is not None and thread is not current_thread():
+            thread.join(timeout)
+
+    def _proxy(self) -> str:
+        # Each new session gets its own proxy from a ProxyPool and keeps it
+        if isinstance(self.proxies, ProxyPool):
+            return self.proxies.pick()
+        return self.proxy
+
+    def _drop_expired(self) -> None:
+        # Called with the lock held; the oldest sessions are at the left
+        now: float = time()
+        while self._ready and now - self._ready[0].bootstrapped_at > self.ttl:
+            self._ready.popleft()
+            self.expired += 1
+
+    def _fill(self) -> None:
+        backoff: float = 1
+
+        while True:
+            with self._lock:
+                while self._thread is current_thread():
+                    self._drop_expired()
+                    if len(self._ready) < self.size:
+                        break
+                    # Sleep until a session is taken or the oldest one expires
+                    self._wakeup.wait(max(0.1, self._ready[0].bootstrapped_at + self.ttl - time()))
+                if self._thread is not current_thread():
+                    return
+
+            try:
+                grok: Grok = Grok(proxy=self._proxy(), proxies=self.proxies).bootstrap()
+            except Exception as e:
+                with self._lock:
+                    self.bootstrap_failures += 1
+                    self.last_error = str(e)
+                    self._wakeup.wait(backoff)
+                backoff = min(backoff * 2, 60)
+                continue
+
+            backoff = 1
+            with self._lock:
+                self._ready.append(grok)
+
+    def acquire(self, model: str = "grok-3-auto") -> Grok:
+        """
+        Take a bootstrapped session for a new conversation with `model`.
+        The session is removed from the pool and must not be given back.
+        """
+        grok: Grok = None
+        with self._lock:
+            self._drop_expired()
+            if self._ready:
+                # Newest first, it has the most time left
+                grok = self._ready.pop()
+                self.hits += 1
             else:
-                Log.Info(f"Response does not contain 'modelResponse'")
-                Log.Info(f"Response text preview: {convo_request.text[:500]}")
-                if 'rejected by anti-bot rules' in convo_request.text:
-                    Log.Error("Rejected by anti-bot rules, retrying...")
-                    return Grok(self.session.proxies.get("all")).start_convo(message=message, extra_data=extra_data)
-                Log.Error("Something went wrong")
-                Log.Error(convo_request.text)
-                return {"error": convo_request.text}
-            
+                self.misses += 1
+            self._wakeup.notify_all()
 
+        if grok is None:
+            grok = Grok(model, self._proxy(), self.proxies).bootstrap()
+        grok.set_model(model)
+        return grok
+
+    def health(self) -> dict:
+        with self._lock:
+            self._drop_expired()
+            now: float = time()
+            return {
+                "size": self.size,
+                "ready": len(self._ready),
+                "ttl": self.ttl,
+                "oldest_age": round(now - self._ready[0].bootstrapped_at, 1) if self._ready else None,
+                "running": self._thread is not None and self._thread.is_alive(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "bootstrap_failures": self.bootstrap_failures,
+                "last_error": self.last_error,
+            }
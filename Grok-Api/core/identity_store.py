@@ -0,0 +1,91 @@
+import sqlite3
+from json    import dumps, loads
+from os      import getenv
+from pathlib import Path
+from time    import time
+from typing  import Optional
+
+from .sqlite_store import SQLiteStore
+
+
+class IdentityStore(SQLiteStore):
+    """
+    Anonymous grok.com identities (anonUserId, private key and cookies) that
+    new conversations can reuse instead of uploading a fresh public key.
+
+    An identity is stored after a full handshake and checked out by later
+    bootstraps, which then start at the cheaper verification step. Each
+    checkout counts as one use. Identities are rotated out once they are
+    older than `ttl` seconds or have served `max_uses` conversations, and are
+    retired early when grok.com rejects them. Entries live in the shared
+    SQLite store, so they survive restarts and are shared by every uvicorn
+    worker. A `ttl` of 0 disables the store.
+    """
+
+    TABLES: tuple = (
+        "CREATE TABLE IF NOT EXISTS identities ("
+        "anon_user TEXT PRIMARY KEY, private_key TEXT NOT NULL, cookies TEXT NOT NULL, "
+        "created_at REAL NOT NULL, last_used REAL NOT NULL, uses INTEGER NOT NULL)",
+    )
+
+    def __init__(self, db_path: Path = None, ttl: float = None, max_uses: int = None) -> None:
+        super().__init__(db_path)
+        self.ttl: float = float(getenv("GROK_IDENTITY_TTL", "3600")) if ttl is None else ttl
+        self.max_uses: int = int(getenv("GROK_IDENTITY_MAX_USES", "20")) if max_uses is None else max_uses
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM identities WHERE created_at < ? OR uses >= ?", (time() - self.ttl, self.max_uses))
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_uses > 0
+
+    def checkout(self) -> Optional[dict]:
+        """
+        Take the least used live identity and count one use against it.
+        Returns None when there is none, and the caller runs a full handshake.
+        """
+        if not self.enabled:
+            return None
+
+        def take(conn: sqlite3.Connection) -> Optional[tuple]:
+            self._prune(conn)
+            row = conn.execute(
+                "SELECT anon_user, private_key, cookies, uses FROM identities ORDER BY uses, created_at DESC LIMIT 1"
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE identities SET uses = uses + 1, last_used = ? WHERE anon_user = ?", (time(), row[0]))
+            return row
+
+        # Serialises checkouts across workers, so usage counts stay exact
+        row = self.run(take, immediate=True)
+        if row is None:
+            return None
+        return {"anon_user": row[0], "privateKey": row[1], "cookies": loads(row[2]), "uses": row[3] + 1}
+
+    def put(self, anon_user: str, private_key: str, cookies: dict) -> None:
+        """Store an identity that just completed the handshake; that conversation is its first use."""
+        if not self.enabled or not anon_user:
+            return
+        now: float = time()
+        self.run(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO identities (anon_user, private_key, cookies, created_at, last_used, uses) VALUES (?, ?, ?, ?, ?, 1)",
+            (anon_user, private_key, dumps(cookies), now, now)
+        ))
+
+    def retire(self, anon_user: str) -> None:
+        """Drop an identity grok.com no longer accepts."""
+        if not anon_user:
+            return
+        self.run(lambda conn: conn.execute("DELETE FROM identities WHERE anon_user = ?", (anon_user,)))
+
+    def health(self) -> dict:
+        stored: int = 0
+        if self.enabled:
+            stored = self.run(lambda conn: conn.execute(
+                "SELECT COUNT(*) FROM identities WHERE created_at >= ? AND uses < ?", (time() - self.ttl, self.max_uses)
+            ).fetchone()[0], default=0)
+        return {"stored": stored, "ttl": self.ttl, "max_uses": self.max_uses}
+
+
+identity_store: IdentityStore = IdentityStore()
@@ -0,0 +1,164 @@
+from curl_cffi          import requests
+from concurrent.futures import ThreadPoolExecutor
+from threading          import Thread, Lock, Event
+from urllib.parse       import urlsplit
+from random             import choices
+from os                 import getenv
+from time               import time, perf_counter
+from typing             import Optional
+
+
+class ProxyState:
+    """Probe results and failure count of one proxy."""
+
+    def __init__(self, url: str) -> None:
+        self.url: str = url
+        self.latency: float = None
+        self.failures: int = 0
+        self.ejected: bool = False
+        self.last_check: float = None
+        self.last_error: str = None
+        self.ip: str = None
+        self.assigned: int = 0
+
+    def display_url(self) -> str:
+        # The pool state is served without authentication, keep passwords out of it
+        parts = urlsplit(self.url)
+        if parts.password is None:
+            return self.url
+        return self.url.replace(f":{parts.password}@", ":***@", 1)
+
+
+class ProxyPool:
+    """
+    Health-scored pool of (SOCKS) proxies for Grok sessions.
+
+    A background thread probes every proxy concurrently each `interval`
+    seconds and keeps a smoothed latency per proxy. A proxy that fails
+    `max_failures` probes or requests in a row is ejected from selection
+    until a probe succeeds again. pick() draws a healthy proxy weighted by
+    1 / latency; the caller keeps it for the whole Grok session (and its
+    conversation), so assignment is sticky. When every proxy is ejected,
+    pick() falls back to the one with the fewest failures rather than
+    sending traffic without a proxy.
+    """
+
+    SMOOTHING: float = 0.3
+
+    def __init__(self, proxies: list, probe_url: str = None, interval: float = None, timeout: float = 10, max_failures: int = None) -> None:
+        self.probe_url: str = probe_url or getenv("GROK_PROXY_PROBE_URL", "https://jsonip.com/")
+        self.interval: float = float(getenv("GROK_PROXY_PROBE_INTERVAL", "60")) if interval is None else interval
+        self.timeout: float = timeout
+        self.max_failures: int = int(getenv("GROK_PROXY_MAX_FAILURES", "3")) if max_failures is None else max_failures
+
+        self._states: dict[str, ProxyState] = {url: ProxyState(url) for url in dict.fromkeys(proxies)}
+        self._lock: Lock = Lock()
+        self._stopped: Event = Event()
+        self._thread: Thread = None
+
+    @property
+    def proxies(self) -> list:
+        return list(self._states)
+
+    def start(self) -> "ProxyPool":
+        with self._lock:
+            if self._thread is None and self._states:
+                self._stopped.clear()
+                self._thread = Thread(target=self._probe_loop, name="grok-proxy-probe", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _probe_loop(self) -> None:
+        with ThreadPoolExecutor(max_workers=min(len(self._states), 16), thread_name_prefix="grok-proxy-probe") as executor:
+            while not self._stopped.is_set():
+                list(executor.map(self.probe, self.proxies))
+                self._stopped.wait(self.interval)
+
+    def probe(self, url: str) -> bool:
+        """Check one proxy against the probe URL and record the result."""
+        started: float = perf_counter()
+        try:
+            response = requests.get(self.probe_url, proxies={"all": url}, timeout=self.timeout, impersonate="chrome136")
+            if response.status_code != 200:
+                raise ValueError(f"HTTP {response.status_code}")
+            latency: float = perf_counter() - started
+            try:
+                ip: str = response.json().get("ip")
+            except ValueError:
+                ip = None
+        except Exception as e:
+            self.report_failure(url, str(e))
+            return False
+
+        with self._lock:
+            state: ProxyState = self._states[url]
+            state.latency = latency if state.latency is None else state.latency + self.SMOOTHING * (latency - state.latency)
+            state.failures = 0
+            state.ejected = False
+            state.last_check = time()
+            state.last_error = None
+            state.ip = ip or state.ip
+        return True
+
+    def report_failure(self, url: str, error: str = None) -> None:
+        """Count a failed probe or request; ejects the proxy after max_failures in a row."""
+        with self._lock:
+            state: ProxyState = self._states.get(url)
+            if state is None:
+                return
+            state.failures += 1
+            state.last_check = time()
+            state.last_error = error
+            if state.failures >= self.max_failures:
+                state.ejected = True
+
+    def is_healthy(self, url: str) -> bool:
+        with self._lock:
+            state: ProxyState = self._states.get(url)
+            return state is not None and not state.ejected
+
+    def pick(self, exclude: str = None) -> Optional[str]:
+        """
+        A proxy for a new Grok session, latency weighted among healthy
+        proxies. `exclude` (the proxy that just failed) is avoided when
+        another one is available.
+        """
+        with self._lock:
+            if not self._states:
+                return None
+            healthy: list = [state for state in self._states.values() if not state.ejected]
+            candidates: list = [state for state in healthy if state.url != exclude] or healthy
+            if not candidates:
+                state: ProxyState = min(self._states.values(), key=lambda state: (state.url == exclude, state.failures))
+            else:
+                # Unprobed proxies get the average latency, so they are neither favoured nor starved
+                known: list = [state.latency for state in candidates if state.latency is not None]
+                default: float = sum(known) / len(known) if known else 1.0
+                weights: list = [1 / max(state.latency if state.latency is not None else default, 0.001) for state in candidates]
+                state = choices(candidates, weights)[0]
+            state.assigned += 1
+            return state.url
+
+    def health(self) -> dict:
+        with self._lock:
+            states: list = list(self._states.values())
+            return {
+                "size": len(states),
+                "healthy": sum(not state.ejected for state in states),
+                "probe_url": self.probe_url,
+                "interval": self.interval,
+                "running": self._thread is not None and self._thread.is_alive(),
+                "proxies": [{
+                    "proxy": state.display_url(),
+                    "healthy": not state.ejected,
+                    "latency_ms": round(state.latency * 1000, 1) if state.latency is not None else None,
+                    "failures": state.failures,
+                    "assigned": state.assigned,
+                    "ip_address": state.ip,
+                    "last_check": state.last_check,
+                    "last_error": state.last_error,
+                } for state in states],
+            }
@@ -0,0 +1,76 @@
+from typing import Optional
+
+try:
+    from orjson import loads  # noticeably faster on long NDJSON bodies
+except ImportError:
+    from json import loads
+
+
+class ResponseParser:
+    """
+    Incremental parser for the NDJSON body of a Grok conversation request.
+
+    New conversations nest every event under result.response (and send the
+    conversation id under result.conversation), follow-ups put the events
+    straight under result. Both are handled by one code path: the event body
+    is `result.get("response", result)`.
+
+    Feed lines one at a time; feed() returns the token carried by the line,
+    if any. The first message, response id and image urls win, as Grok
+    repeats them in later events.
+    """
+
+    def __init__(self, keep_tokens: bool = True) -> None:
+        self.keep_tokens: bool = keep_tokens
+        self.tokens: list = []
+        self.token_count: int = 0
+        self.response: Optional[str] = None
+        self.conversation_id: Optional[str] = None
+        self.parent_response: Optional[str] = None
+        self.image_urls: Optional[list] = None
+        self.model_response_seen: bool = False
+        self.unparsed: list = []
+
+    def feed(self, line) -> Optional[str]:
+        if not line:
+            return None
+        try:
+            data = loads(line)
+        except ValueError:
+            data = None
+
+        result: dict = data.get('result') if isinstance(data, dict) else None
+        if not result:
+            # Errors and anti-bot rejections come back as non-result bodies
+            self.unparsed.append(line.decode(errors="replace") if isinstance(line, bytes) else line)
+            return None
+
+        conversation: dict = result.get('conversation')
+        if conversation and not self.conversation_id:
+            self.conversation_id = conversation.get('conversationId')
+
+        body: dict = result.get('response', result)
+
+        model_response: dict = body.get('modelResponse')
+        if model_response:
+            self.model_response_seen = True
+            self.response = self.response or model_response.get('message') or None
+            self.parent_response = self.parent_response or model_response.get('responseId') or None
+            self.image_urls = self.image_urls or model_response.get('generatedImageUrls') or None
+
+        token: str = body.get('token')
+        if token:
+            self.token_count += 1
+            if self.keep_tokens:
+                self.tokens.append(token)
+            return token
+        return None
+
+    def feed_text(self, text: str) -> "ResponseParser":
+        for line in text.strip().split('\n'):
+            self.feed(line)
+        return self
+
+    @property
+    def error_text(self) -> str:
+        return "\n".join(self.unparsed)
@@ -2,10 +2,14 @@ from base64    import b64encode, b64decode
 from secrets   import token_bytes
 from coincurve import PrivateKey
 from hashlib   import sha256
+from functools import lru_cache
+from collections import deque
+from threading import Thread, Lock, Condition
+from os        import getenv
 
 class Anon:
-    
-    
+
+
     @staticmethod
     def publicKeyCreate(e) -> list:
         privkey = PrivateKey(bytes(e))
@@ -14,30 +18,108 @@ class Anon:
 
     @staticmethod
     def xor(e) -> str:
-        t = ""
-        for n in range(len(e)):
-            t += chr(e[n])
-        return b64encode(t.encode('latin-1')).decode()
+        return b64encode(bytes(e)).decode()
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def load_key(key: str) -> PrivateKey:
+        """Parsed PrivateKey for a base64 private key, kept for the challenge signature."""
+        return PrivateKey(b64decode(key))
 
     @staticmethod
     def generate_keys() -> dict:
         e = token_bytes(32)
-        n = Anon.publicKeyCreate(e)
         r = Anon.xor(e)
-        
+        n = list(Anon.load_key(r).public_key.format(compressed=True))
+
         return {
             "privateKey": r,
             "userPublicKey": n
         }
-    
+
     @staticmethod
     def sign_challenge(challenge_data: bytes, key: str) -> dict:
 
-        key_bytes: bytes = b64decode(key)
-        privkey: PrivateKey = PrivateKey(key_bytes)
+        privkey: PrivateKey = Anon.load_key(key)
         signature: bytes = privkey.sign_recoverable(sha256(challenge_data).digest(), hasher=None)[:64]
-        
+
         return {
             "challenge": b64encode(challenge_data).decode(),
             "signature": b64encode(signature).decode()
         }
+
+
+class KeyPool:
+    """
+    Bounded pool of ready anonymous keypairs (Anon.generate_keys results).
+
+    A background thread, started on first use, tops the pool up to `size`
+    whenever keys are taken, so bursts of new sessions do not generate keys
+    on the request path. take() falls back to generating inline when the
+    pool is empty or disabled (size 0). Each keypair is handed out once.
+    """
+
+    def __init__(self, size: int = 32) -> None:
+        self.size: int = max(0, size)
+
+        self._ready: deque = deque()
+        self._lock: Lock = Lock()
+        self._wakeup: Condition = Condition(self._lock)
+        self._thread: Thread = None
+        self._stopped: bool = False
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def start(self) -> "KeyPool":
+        with self._lock:
+            if self._thread is None and self.size:
+                self._stopped = False
+                self._thread = Thread(target=self._fill, name="grok-key-pool", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopped = True
+            self._wakeup.notify_all()
+
+    def _fill(self) -> None:
+        while True:
+            with self._lock:
+                while not self._stopped and len(self._ready) >= self.size:
+                    self._wakeup.wait()
+                if self._stopped:
+                    return
+
+            keys: dict = Anon.generate_keys()
+            with self._lock:
+                self._ready.append(keys)
+
+    def take(self) -> dict:
+        if self._thread is None:
+            self.start()
+
+        keys: dict = None
+        with self._lock:
+            if self._ready:
+                keys = self._ready.popleft()
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._wakeup.notify_all()
+
+        return keys or Anon.generate_keys()
+
+    def health(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "ready": len(self._ready),
+                "running": self._thread is not None and self._thread.is_alive(),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+key_pool: KeyPool = KeyPool(int(getenv("GROK_KEY_POOL_SIZE", "32")))
@@ -0,0 +1,152 @@
+import sqlite3
+from json       import load, loads, dumps
+from pathlib    import Path
+from threading  import Lock
+from contextlib import contextmanager
+from typing     import Optional
+
+from ..sqlite_store import SQLiteStore
+
+try:
+    import fcntl
+except ImportError:  # Windows, fall back to in-process locking only
+    fcntl = None
+
+CORE_DIR = Path(__file__).resolve().parent.parent
+
+
+class MappingStore(SQLiteStore):
+    """
+    Scraped script mappings shared by every worker process.
+
+    - txid: script link -> the x[...] indices used by the signature
+    - grok: action script -> server actions and xsid script of a grok.com deploy
+
+    Entries live in the shared SQLite store (core/cache/grok.db) and are
+    mirrored in memory. New entries are single-row inserts, never a rewrite of
+    the whole store. It uses transaction() rather than run(), so SQLite errors
+    are raised instead of being turned into a default. The
+    database is seeded once from the JSON files in core/mappings (again when
+    they change), and every path is resolved from this file instead of the
+    working directory. locked() holds a cross-process file lock, so on a miss
+    only one worker scrapes while the others wait and then find the entry.
+    """
+
+    TABLES: tuple = (
+        "CREATE TABLE IF NOT EXISTS txid (script_link TEXT PRIMARY KEY, numbers TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS grok (action_script TEXT PRIMARY KEY, actions TEXT NOT NULL, xsid_script TEXT NOT NULL)",
+        # Seed files already imported, so other workers and restarts skip them until they change
+        "CREATE TABLE IF NOT EXISTS mapping_seeds (name TEXT PRIMARY KEY, version TEXT NOT NULL)",
+    )
+
+    def __init__(self, db_path: Path = None, seed_dir: Path = None) -> None:
+        super().__init__(db_path)
+        self.seed_dir: Path = seed_dir or CORE_DIR / "mappings"
+        self.lock_path: Path = self.db_path.parent / "mappings.lock"
+
+        self.txid: dict = {}
+        self.grok: dict = {}
+        self._loaded: bool = False
+        self._thread_lock: Lock = Lock()
+
+    def _seed(self, conn: sqlite3.Connection) -> None:
+        txid_file: Path = self.seed_dir / "txid.json"
+        if self._needs_seed(conn, txid_file):
+            with open(txid_file, 'r') as f:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO txid (script_link, numbers) VALUES (?, ?)",
+                    [(link, dumps(numbers)) for link, numbers in load(f).items()]
+                )
+
+        grok_file: Path = self.seed_dir / "grok.json"
+        if self._needs_seed(conn, grok_file):
+            with open(grok_file, 'r') as f:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO grok (action_script, actions, xsid_script) VALUES (?, ?, ?)",
+                    [(entry["action_script"], dumps(entry["actions"]), entry["xsid_script"]) for entry in load(f)]
+                )
+
+    @staticmethod
+    def _needs_seed(conn: sqlite3.Connection, seed_file: Path) -> bool:
+        # Records the file version as it checks, the import runs in the same transaction
+        if not seed_file.exists():
+            return False
+        stat = seed_file.stat()
+        version: str = f"{stat.st_mtime_ns}:{stat.st_size}"
+        row = conn.execute("SELECT version FROM mapping_seeds WHERE name = ?", (seed_file.name,)).fetchone()
+        if row and row[0] == version:
+            return False
+        conn.execute("INSERT OR REPLACE INTO mapping_seeds (name, version) VALUES (?, ?)", (seed_file.name, version))
+        return True
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        with self._thread_lock:
+            if self._loaded:
+                return
+            # Write lock up front, so workers starting together import the seeds once
+            with self.transaction(immediate=True) as conn:
+                self._seed(conn)
+                self.txid = {link: loads(numbers) for link, numbers in conn.execute("SELECT script_link, numbers FROM txid")}
+                self._read_grok(conn)
+            self._loaded = True
+
+    def _read_grok(self, conn: sqlite3.Connection) -> None:
+        self.grok = {
+            action_script: (loads(actions), xsid_script)
+            for action_script, actions, xsid_script in conn.execute("SELECT action_script, actions, xsid_script FROM grok")
+        }
+
+    @contextmanager
+    def locked(self):
+        """Hold the cross-process mapping lock (blocks until it is free)."""
+        self._load()
+        if fcntl is None:
+            with self._thread_lock:
+                yield
+            return
+
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get_numbers(self, script_link: str) -> Optional[list]:
+        self._load()
+        numbers: Optional[list] = self.txid.get(script_link)
+        if numbers is None:
+            # Another worker may have added it since we loaded
+            with self.transaction() as conn:
+                row = conn.execute("SELECT numbers FROM txid WHERE script_link = ?", (script_link,)).fetchone()
+            if row:
+                numbers = self.txid[script_link] = loads(row[0])
+        return numbers
+
+    def add_numbers(self, script_link: str, numbers: list) -> None:
+        self._load()
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO txid (script_link, numbers) VALUES (?, ?)", (script_link, dumps(numbers)))
+        self.txid[script_link] = numbers
+
+    def find_actions(self, scripts: list) -> Optional[tuple[list, str]]:
+        self._load()
+        for refresh in (False, True):
+            if refresh:
+                with self.transaction() as conn:
+                    self._read_grok(conn)
+            for script in scripts:
+                if script in self.grok:
+                    return self.grok[script]
+        return None
+
+    def add_actions(self, action_script: str, actions: list, xsid_script: str) -> None:
+        self._load()
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO grok (action_script, actions, xsid_script) VALUES (?, ?, ?)",
+                (action_script, dumps(actions), xsid_script)
+            )
+        self.grok[action_script] = (actions, xsid_script)
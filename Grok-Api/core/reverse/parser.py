@@ -1,37 +1,47 @@
-from re        import findall, search
-from json      import load, dump
+from re        import findall, search, compile, DOTALL, IGNORECASE
+from html      import unescape
 from base64    import b64decode
 from typing    import Optional
 from curl_cffi import requests
-from core      import Utils
-from os        import path
+from core      import Log, Utils
+from os        import replace, getenv
+from pathlib   import Path
+from hashlib   import sha256
+from secrets   import token_hex
+from time      import time
+from threading import Event, Lock, local
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .mappings import MappingStore
+
+# One pass over the page: comments and script bodies are consumed whole, so
+# tags quoted inside them are skipped the way an HTML parser would skip them
+_PAGE_TAGS = compile(r'<!--.*?-->|<script\b([^>]*)>.*?</script\s*>|<meta\b([^>]*)>', DOTALL | IGNORECASE)
+_TAG_ATTRS = compile(r'([^\s=/>"\']+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+
+# Chunk URLs are content hashed, so a cached body never goes stale, but
+# chunks of old deploys are never requested again and are pruned by age
+CHUNK_CACHE_DIR = Path(__file__).resolve().parent.parent / "cache" / "chunks"
+CHUNK_CACHE_MAX_AGE = float(getenv("GROK_CHUNK_CACHE_MAX_AGE", "604800"))
+CHUNK_FETCH_WORKERS = int(getenv("GROK_CHUNK_FETCH_WORKERS", "8"))
+
+# Shared by every scrape, so the per-thread curl sessions are reused instead of
+# leaking with a new executor each time
+_chunk_executor: Optional[ThreadPoolExecutor] = None
+_chunk_executor_lock: Lock = Lock()
+
+def _chunk_fetcher() -> ThreadPoolExecutor:
+    global _chunk_executor
+    with _chunk_executor_lock:
+        if _chunk_executor is None:
+            _chunk_executor = ThreadPoolExecutor(max_workers=max(1, CHUNK_FETCH_WORKERS), thread_name_prefix="grok-chunks")
+        return _chunk_executor
 
 class Parser:
     
-    mapping: dict = {}
-    _mapping_loaded: bool = False
-    
-    grok_mapping: list = []
-    _grok_mapping_loaded: bool = False
-    
-    @classmethod
-    def _load__xsid_mapping(cls):
-        if not cls._mapping_loaded and path.exists('core/mappings/txid.json'):
-            with open('core/mappings/txid.json', 'r') as f:
-                cls.mapping = load(f)
-            cls._mapping_loaded = True
-            
-    @classmethod
-    def _load_grok_mapping(cls):
-        if not cls._grok_mapping_loaded and path.exists('core/mappings/grok.json'):
-            with open('core/mappings/grok.json', 'r') as f:
-                cls.grok_mapping = load(f)
-            cls._grok_mapping_loaded = True
+    mappings: MappingStore = MappingStore()
     
     @staticmethod
     def parse_values(html: str, loading: str = "loading-x-anim-0", scriptId: str = "") -> tuple[str, Optional[str]]:
-
-        Parser._load__xsid_mapping()
         
         all_d_values = findall(r'"d":"(M[^"]{200,})"', html)
         svg_data = all_d_values[int(loading.split("loading-x-anim-")[1])]
@@ -43,15 +53,15 @@ class Parser:
             else:
                 script_link: str = f'https://grok.com/_next/{scriptId}'
 
-            if script_link in Parser.mapping:
-                numbers: list = Parser.mapping[script_link]
-                
-            else:
-                script_content: str = requests.get(script_link, impersonate="chrome136").text
-                numbers: list = [int(x) for x in findall(r'x\[(\d+)\]\s*,\s*16', script_content)]
-                Parser.mapping[script_link] = numbers
-                with open('core/mappings/txid.json', 'w') as f:
-                    dump(Parser.mapping, f)
+            numbers: list = Parser.mappings.get_numbers(script_link)
+            if numbers is None:
+                with Parser.mappings.locked():
+                    # Another worker may have scraped it while we waited for the lock
+                    numbers = Parser.mappings.get_numbers(script_link)
+                    if numbers is None:
+                        script_content: str = requests.get(script_link, impersonate="chrome136").text
+                        numbers = [int(x) for x in findall(r'x\[(\d+)\]\s*,\s*16', script_content)]
+                        Parser.mappings.add_numbers(script_link, numbers)
 
             return svg_data, numbers
 
@@ -59,6 +69,42 @@ class Parser:
             return svg_data
 
     
+    @staticmethod
+    def scan_page(html: str) -> tuple[list, Optional[str], Optional[str]]:
+        """
+        Extract what Grok._load needs from the grok.com/c page: the
+        /_next/static/chunks/ script sources (in document order, entity
+        decoded), the baggage meta content and the sentry-trace id (the meta
+        content up to the first '-'). Meta values are returned as written in
+        the page, the same way they were read with Utils.between.
+        """
+        scripts: list = []
+        baggage: Optional[str] = None
+        sentry_trace: Optional[str] = None
+        
+        for match in _PAGE_TAGS.finditer(html):
+            script_attrs, meta_attrs = match.group(1), match.group(2)
+            
+            if script_attrs is not None:
+                for name, double, single, bare in _TAG_ATTRS.findall(script_attrs):
+                    if name.lower() == "src":
+                        src: str = unescape(double or single or bare)
+                        if src.startswith('/_next/static/chunks/'):
+                            scripts.append(src)
+                        break
+            
+            elif meta_attrs is not None and (baggage is None or sentry_trace is None):
+                attrs: dict = {}
+                for name, double, single, bare in _TAG_ATTRS.findall(meta_attrs):
+                    attrs.setdefault(name.lower(), double or single or bare)
+                
+                if attrs.get("name") == "baggage" and baggage is None:
+                    baggage = attrs.get("content")
+                elif attrs.get("name") == "sentry-trace" and sentry_trace is None:
+                    sentry_trace = attrs.get("content", "").split("-")[0]
+        
+        return scripts, baggage, sentry_trace
+    
     @staticmethod
     def get_anim(html:  str, verification: str = "grok-site-verification") -> tuple[str, str]:
         
@@ -68,38 +114,116 @@ class Parser:
 
         return verification_token, anim
     
+    _fetch_local = local()
+    
+    @staticmethod
+    def fetch_chunk(script: str) -> str:
+        cache_file: Path = CHUNK_CACHE_DIR / (sha256(script.encode()).hexdigest() + ".js")
+        try:
+            content: str = cache_file.read_text(encoding="utf-8")
+            # Chunks of the current deploy stay fresh for prune_chunk_cache
+            cache_file.touch()
+            return content
+        except (FileNotFoundError, UnicodeDecodeError):
+            pass
+        
+        # curl_cffi sessions are not thread safe, keep one per fetch thread for keep-alive
+        session = getattr(Parser._fetch_local, "session", None)
+        if session is None:
+            session = Parser._fetch_local.session = requests.Session(impersonate="chrome136")
+        
+        response = session.get(f'https://grok.com{script}')
+        content: str = response.text
+        if response.status_code == 200:
+            CHUNK_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            temp_file: Path = cache_file.with_suffix(f".{token_hex(4)}.tmp")
+            temp_file.write_text(content, encoding="utf-8")
+            replace(temp_file, cache_file)
+        return content
+    
+    @staticmethod
+    def prune_chunk_cache(max_age: float = None) -> int:
+        """
+        Delete cached chunks not used for `max_age` seconds (GROK_CHUNK_CACHE_MAX_AGE,
+        0 keeps everything) and return how many were removed.
+        """
+        max_age = CHUNK_CACHE_MAX_AGE if max_age is None else max_age
+        if max_age <= 0 or not CHUNK_CACHE_DIR.is_dir():
+            return 0
+        
+        removed: int = 0
+        cutoff: float = time() - max_age
+        for cache_file in CHUNK_CACHE_DIR.iterdir():
+            try:
+                if cache_file.stat().st_mtime < cutoff:
+                    cache_file.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                # Pruned by another worker
+                pass
+        return removed
+    
     @staticmethod
     def parse_grok(scripts: list) -> tuple[list, str]:
         
-        Parser._load_grok_mapping()
+        found: Optional[tuple] = Parser.mappings.find_actions(scripts)
+        if found:
+            return found
         
-        for index in Parser.grok_mapping:
-            if index.get("action_script") in scripts:
-                return index["actions"], index["xsid_script"]
-            
-        for script in scripts:
-            content: str = requests.get(f'https://grok.com{script}', impersonate="chrome136").text
-            if "anonPrivateKey" in content:
-                script_content1: str = content
-                action_script: str = script
-            elif "880932)" in content:
-                script_content2: str = content
+        with Parser.mappings.locked():
+            # Only one worker scrapes a new deploy, the others pick up its result
+            return Parser.mappings.find_actions(scripts) or Parser._scrape_grok(scripts)
+    
+    @staticmethod
+    def _scrape_grok(scripts: list) -> tuple[list, str]:
+        
+        script_content1 = script_content2 = action_script = None
+        stop: Event = Event()
+        
+        def fetch(script: str) -> Optional[str]:
+            # Queued fetches become no-ops once both markers are found
+            return None if stop.is_set() else Parser.fetch_chunk(script)
+        
+        executor: ThreadPoolExecutor = _chunk_fetcher()
+        futures: dict = {}
+        try:
+            futures = {executor.submit(fetch, script): script for script in scripts}
+            for future in as_completed(futures):
+                try:
+                    content: Optional[str] = future.result()
+                except Exception as e:
+                    Log.Error(f"Failed to fetch {futures[future]}: {e}")
+                    continue
+                if content is None:
+                    continue
+                
+                if script_content1 is None and "anonPrivateKey" in content:
+                    script_content1 = content
+                    action_script = futures[future]
+                elif script_content2 is None and "880932)" in content:
+                    script_content2 = content
+                
+                if script_content1 is not None and script_content2 is not None:
+                    stop.set()
+                    break
+        finally:
+            # Drop whatever is still queued, in-flight fetches finish on their own
+            for future in futures:
+                future.cancel()
+        
+        # A scrape means grok.com deployed, so the previous chunks are now unused
+        Parser.prune_chunk_cache()
+        
+        if script_content1 is None or script_content2 is None:
+            print("Something went wrong while parsing script and actions")
+            return None
 
         actions: list = findall(r'createServerReference\)\("([a-f0-9]+)"', script_content1)
-        xsid_script: str = search(r'"(static/chunks/[^"]+\.js)"[^}]*?\(880932\)', script_content2).group(1)
+        xsid_match = search(r'"(static/chunks/[^"]+\.js)"[^}]*?\(880932\)', script_content2)
+        xsid_script: str = xsid_match.group(1) if xsid_match else None
         
         if actions and xsid_script:
-            Parser.grok_mapping.append({
-                "xsid_script": xsid_script,
-                "action_script": action_script,
-                "actions": actions
-            })
-            
-            with open('core/mappings/grok.json', 'w') as f:
-                dump(Parser.grok_mapping, f, indent=2)
-                
+            Parser.mappings.add_actions(action_script, actions, xsid_script)
             return actions, xsid_script
         else:
             print("Something went wrong while parsing script and actions")
-        
-        
\ No newline at end of file
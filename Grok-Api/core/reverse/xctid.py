@@ -6,6 +6,7 @@ from random    import random
 from hashlib   import sha256
 from struct    import pack
 from time      import time
+from functools import lru_cache
 
 
 class Signature:
@@ -22,25 +23,38 @@ class Signature:
         return rounded
 
     @staticmethod
-    def cubicBezierEased(t: float, x1: float, y1: float, x2: float, y2: float) -> float:
-        def bezier(u: float):
-            omu = 1.0 - u
-            b1 = 3.0 * omu * omu * u
-            b2 = 3.0 * omu * u * u
-            b3 = u * u * u
-            x = b1 * x1 + b2 * x2 + b3
-            y = b1 * y1 + b2 * y2 + b3
-            return x, y
-
+    @lru_cache(maxsize=4096)
+    def _bezier_u(t: float, x1: float, x2: float) -> float:
+        # Bisect for the curve parameter whose x equals t. Inputs come from a
+        # small quantized domain, so results are memoized. Once an update no
+        # longer moves lo or hi the interval is at a fixed point and the
+        # remaining iterations could not change it, so stopping early gives
+        # the same bits as running all 80.
         lo, hi = 0.0, 1.0
         for _ in range(80):
             mid = 0.5 * (lo + hi)
-            if bezier(mid)[0] < t:
+            omu = 1.0 - mid
+            b1 = 3.0 * omu * omu * mid
+            b2 = 3.0 * omu * mid * mid
+            b3 = mid * mid * mid
+            if b1 * x1 + b2 * x2 + b3 < t:
+                if mid == lo:
+                    break
                 lo = mid
             else:
+                if mid == hi:
+                    break
                 hi = mid
-        u = 0.5 * (lo + hi)
-        return bezier(u)[1]
+        return 0.5 * (lo + hi)
+
+    @staticmethod
+    def cubicBezierEased(t: float, x1: float, y1: float, x2: float, y2: float) -> float:
+        u = Signature._bezier_u(t, x1, x2)
+        omu = 1.0 - u
+        b1 = 3.0 * omu * omu * u
+        b2 = 3.0 * omu * u * u
+        b3 = u * u * u
+        return b1 * y1 + b2 * y2 + b3
 
     @staticmethod
     def xa(svg: str) -> List[List[int]]:
@@ -159,22 +173,39 @@ class Signature:
 
     @staticmethod
     def generate_sign(path: str, method: str, verification: str, svg: str, x_values: list, time_n: int = None, random_float: float = None) -> str:
+        return PreparedSigner(verification, svg, x_values).sign(path, method, time_n, random_float)
 
-        n = int(time() - 1682924400) if not time_n else time_n
-        t = pack('<I', n)
-        r = b64decode(verification)
-        o = Signature.xs(r, svg, x_values)
 
-        msg = "!".join([method, path, str(n)]) + "obfiowerehiring" + o
+class PreparedSigner:
+    """
+    Signer for one session. The verification token, svg and x values do not
+    change between requests, so the decoded verification bytes and the xs()
+    output are computed once; sign() only packs the timestamp, hashes and
+    applies the XOR. Output is identical to Signature.generate_sign.
+    """
+    
+    # XOR tables for bytes.translate, built on first use of each prefix byte
+    _xor_tables: Dict[int, bytes] = {}
+    
+    def __init__(self, verification: str, svg: str, x_values: list) -> None:
+        self.verification_bytes: bytes = b64decode(verification)
+        self.xs: str = Signature.xs(self.verification_bytes, svg, x_values)
+        self._suffix: str = "obfiowerehiring" + self.xs
+    
+    def sign(self, path: str, method: str, time_n: int = None, random_float: float = None) -> str:
+        
+        n = int(time() - 1682924400) if not time_n else time_n
+        msg = "!".join([method, path, str(n)]) + self._suffix
         digest = sha256(msg.encode('utf-8')).digest()[:16]
-
+        
         prefix_byte = int(floor(random() if not random_float else random_float * 256))
-        assembled = bytes([prefix_byte]) + r + t + digest + bytes([3])
-
-        arr = bytearray(assembled)
-        if len(arr) > 0:
-            first = arr[0]
-            for i in range(1, len(arr)):
-                arr[i] = arr[i] ^ first
-
-        return b64encode(bytes(arr)).decode('ascii').replace('=', '')
+        body = self.verification_bytes + pack('<I', n) + digest + b'\x03'
+        
+        # Every byte after the prefix is XORed with it
+        if prefix_byte:
+            table = PreparedSigner._xor_tables.get(prefix_byte)
+            if table is None:
+                table = PreparedSigner._xor_tables[prefix_byte] = bytes(i ^ prefix_byte for i in range(256))
+            body = body.translate(table)
+        
+        return b64encode(bytes([prefix_byte]) + body).decode('ascii').replace('=', '')
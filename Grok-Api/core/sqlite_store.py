@@ -0,0 +1,66 @@
+import sqlite3
+from contextlib import contextmanager
+from pathlib    import Path
+from typing     import Any, Callable, Iterator
+
+CACHE_DB: Path = Path(__file__).resolve().parent / "cache" / "grok.db"
+
+
+class SQLiteStore:
+    """
+    Base for the small SQLite stores that share state between uvicorn workers
+    (bootstrap artifacts, identities, conversations). They default to one
+    database, core/cache/grok.db, with a table each.
+
+    Subclasses list their CREATE TABLE statements in TABLES; the schema is
+    created on first use. Connections are opened per call, which keeps a
+    store safe to use from any thread. The stores only hold values that can
+    be rebuilt, so run() turns a SQLite error into a default instead of
+    failing the request.
+    """
+
+    TABLES: tuple = ()
+
+    def __init__(self, db_path: Path = None) -> None:
+        self.db_path: Path = db_path or CACHE_DB
+        self._ready: bool = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn: sqlite3.Connection = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+        if not self._ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for table in self.TABLES:
+                conn.execute(table)
+            self._ready = True
+        return conn
+
+    @contextmanager
+    def transaction(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        """
+        A connection inside a transaction, committed when the block succeeds
+        and rolled back when it raises. `immediate` takes the write lock up
+        front, for read-modify-write blocks that must not interleave across
+        workers.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def run(self, work: Callable[[sqlite3.Connection], Any], default: Any = None, immediate: bool = False) -> Any:
+        """Return work(conn) run in a transaction, or `default` on a SQLite error."""
+        try:
+            with self.transaction(immediate) as conn:
+                return work(conn)
+        except sqlite3.Error:
+            return default
@@ -0,0 +1,85 @@
+import unittest
+import json
+from unittest import mock
+from core import grok
+
+REJECTED = '{"error":{"code":7,"message":"Request rejected by anti-bot rules."}}'
+ANSWER = "\n".join(json.dumps(line) for line in [
+    {"result": {"conversation": {"conversationId": "conv-1"}}},
+    {"result": {"response": {"token": "Hi"}}},
+    {"result": {"response": {"modelResponse": {"message": "Hi", "responseId": "resp-1"}}}},
+])
+
+def response(text):
+    return mock.Mock(status_code=200, text=text, iter_lines=lambda: iter(text.encode().split(b"\n")))
+
+class TestAntiBotRetry(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(mock.patch.stopall)
+        self.stats = grok.AntiBotStats()
+        mock.patch.object(grok, 'anti_bot_stats', self.stats).start()
+        mock.patch.object(grok, 'ANTI_BOT_RETRIES', 2).start()
+        self.sleep = mock.patch.object(grok, 'sleep').start()
+        mock.patch.object(grok.bootstrap_cache, 'invalidate').start()
+        self.retire = mock.patch.object(grok.identity_store, 'retire').start()
+
+        self.sessions = []
+        def prepare(session, message, extra_data=None):
+            session.anon_user = f'anon-{len(self.sessions)}'
+            session.actions, session.xsid_script, session.baggage, session.sentry_trace = [], '', '', ''
+            session.keys = {'privateKey': 'key'}
+            self.sessions.append(session)
+            return 'https://grok.com/rest/app-chat/conversations/new', {}
+        mock.patch.object(grok.Grok, '_prepare_convo', prepare).start()
+
+    def post(self, *texts):
+        return mock.patch.object(grok.requests.Session, 'post', side_effect=[response(text) for text in texts]).start()
+
+    def test_recovers_on_a_new_session_and_proxy(self):
+        self.post(REJECTED, ANSWER)
+        result = grok.Grok('grok-4', 'socks5://a:1', ['socks5://a:1', 'socks5://b:1']).start_convo('hello')
+
+        self.assertEqual(result['response'], 'Hi')
+        self.assertEqual(len(self.sessions), 2)
+        retry = self.sessions[1]
+        self.assertIsNot(retry.session, self.sessions[0].session)
+        self.assertEqual(retry.model, 'grok-4')
+        self.assertEqual(retry.session.proxies.get('all'), 'socks5://b:1')
+        self.retire.assert_called_once_with('anon-0')
+        self.assertEqual(self.stats.health(), {'max_retries': 2, 'rejections': 1, 'retries': 1, 'recovered': 1, 'exhausted': 0})
+
+    def test_retries_are_bounded(self):
+        post = self.post(REJECTED, REJECTED, REJECTED, ANSWER)
+        result = grok.Grok(proxy='socks5://a:1').start_convo('hello')
+
+        self.assertEqual(result, {'error': REJECTED})
+        self.assertEqual(post.call_count, 3)
+        # Same single proxy on every retry, never passed as the model
+        self.assertEqual([session.session.proxies.get('all') for session in self.sessions], ['socks5://a:1'] * 3)
+        self.assertEqual({session.model for session in self.sessions}, {'grok-3-auto'})
+        self.assertEqual(self.stats.health(), {'max_retries': 2, 'rejections': 3, 'retries': 2, 'recovered': 0, 'exhausted': 1})
+
+    def test_jittered_backoff_grows(self):
+        self.post(REJECTED, REJECTED, REJECTED)
+        with mock.patch.object(grok, 'uniform', side_effect=lambda low, high: high) as uniform:
+            grok.Grok().start_convo('hello')
+        self.assertEqual([call.args for call in uniform.call_args_list], [(0, grok.ANTI_BOT_BACKOFF), (0, grok.ANTI_BOT_BACKOFF * 2)])
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_stream_retry(self):
+        self.post(REJECTED, ANSWER)
+        items = list(grok.Grok(proxy='socks5://a:1', proxies=['socks5://a:1', 'socks5://b:1']).stream_convo('hello'))
+
+        self.assertEqual(items[0], 'Hi')
+        self.assertEqual(items[1]['response'], 'Hi')
+        self.assertEqual(self.sessions[1].session.proxies.get('all'), 'socks5://b:1')
+        self.assertEqual(self.stats.recovered, 1)
+
+    def test_stream_retries_are_bounded(self):
+        self.post(REJECTED, REJECTED, REJECTED)
+        self.assertEqual(list(grok.Grok().stream_convo('hello')), [{'error': REJECTED}])
+        self.assertEqual(self.stats.exhausted, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import tempfile
+from pathlib import Path
+from unittest import mock
+from core import grok
+from core.bootstrap_cache import BootstrapCache
+
+ARTIFACTS = {
+    'actions': ['upload', 'verify', 'challenge'],
+    'xsid_script': 'static/chunks/xsid.js',
+    'baggage': 'sentry-environment=production',
+    'sentry_trace': 'trace-1',
+}
+REJECTED = '{"error":{"code":7,"message":"Request rejected by anti-bot rules."}}'
+
+class TestBootstrapCache(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache = BootstrapCache(Path(tmp.name) / 'bootstrap.db', ttl=900)
+
+        self.addCleanup(mock.patch.stopall)
+        mock.patch.object(grok, 'bootstrap_cache', self.cache).start()
+        self.get = mock.patch.object(grok.requests.Session, 'get', return_value=mock.Mock(cookies={}, text='<html>')).start()
+        mock.patch.object(grok.Parser, 'scan_page', return_value=([], ARTIFACTS['baggage'], ARTIFACTS['sentry_trace'])).start()
+        mock.patch.object(grok.Parser, 'parse_grok', return_value=(ARTIFACTS['actions'], ARTIFACTS['xsid_script'])).start()
+
+    def load(self):
+        session = grok.Grok()
+        session._load()
+        return session
+
+    def test_reused_within_ttl(self):
+        first = self.load()
+        self.assertFalse(first.artifacts_cached)
+        self.assertEqual(self.cache.get(), ARTIFACTS)
+
+        second = self.load()
+        self.assertTrue(second.artifacts_cached)
+        self.assertEqual(second.actions, ARTIFACTS['actions'])
+        self.assertEqual(second.xsid_script, ARTIFACTS['xsid_script'])
+        # Only the first session fetched grok.com/c
+        self.assertEqual(self.get.call_count, 1)
+
+    def test_expired_entry_is_scraped_again(self):
+        self.load()
+        with mock.patch('core.bootstrap_cache.time', return_value=grok.time() + 901):
+            self.assertIsNone(self.cache.get())
+            self.assertFalse(self.load().artifacts_cached)
+        self.assertEqual(self.get.call_count, 2)
+
+    def test_dropped_on_anti_bot_rejection(self):
+        self.load()
+        mock.patch.object(grok, 'ANTI_BOT_RETRIES', 0).start()
+        mock.patch.object(grok.identity_store, 'retire').start()
+        mock.patch.object(grok.Grok, '_prepare_convo', return_value=('https://grok.com/rest/app-chat/conversations/new', {})).start()
+        mock.patch.object(grok.requests.Session, 'post', return_value=mock.Mock(status_code=200, text=REJECTED)).start()
+
+        session = self.load()
+        session.anon_user = 'anon-1'
+        self.assertEqual(session.start_convo('hello'), {'error': REJECTED})
+        self.assertIsNone(self.cache.get())
+        self.assertFalse(self.load().artifacts_cached)
+
+    def test_dropped_when_cached_artifacts_break_the_handshake(self):
+        self.load()
+        mock.patch.object(grok.identity_store, 'checkout', return_value=None).start()
+        mock.patch.object(grok.Grok, '_handshake', side_effect=ValueError('unknown action')).start()
+
+        with self.assertRaises(ValueError):
+            grok.Grok().bootstrap()
+        self.assertIsNone(self.cache.get())
+
+    def test_disabled(self):
+        self.cache.ttl = 0
+        self.load()
+        self.assertFalse(self.load().artifacts_cached)
+        self.assertEqual(self.get.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
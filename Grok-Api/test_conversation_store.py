@@ -0,0 +1,139 @@
+import unittest
+import json
+import asyncio
+import tempfile
+from pathlib import Path
+from unittest import mock
+from fastapi.testclient import TestClient
+from core.conversation_store import ConversationStore
+from core.bootstrap_cache import BootstrapCache
+import api_server
+
+HEADERS = {'Authorization': 'Bearer test'}
+
+class TestConversationStore(unittest.TestCase):
+
+    HISTORY = [{'role': 'user', 'content': 'hi'}, {'role': 'assistant', 'content': 'hello'}]
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_path = Path(tmp.name) / 'grok.db'
+        self.store = ConversationStore(self.db_path, ttl=3600)
+
+    def test_exact_history_only(self):
+        history = self.HISTORY
+        self.store.put(history, {'conversationId': 'conv-1'})
+
+        self.assertEqual(self.store.get(history), {'conversationId': 'conv-1'})
+        # Extra fields do not matter, a different turn does
+        self.assertEqual(self.store.get([dict(history[0], name='me'), history[1]]), {'conversationId': 'conv-1'})
+        self.assertIsNone(self.store.get(history[:1]))
+        self.assertIsNone(self.store.get([history[0], {'role': 'assistant', 'content': 'hello!'}]))
+
+    def test_expired(self):
+        self.store.put(self.HISTORY, {'conversationId': 'conv-1'})
+        with mock.patch('core.conversation_store.time', return_value=10 ** 12):
+            self.assertIsNone(self.store.get(self.HISTORY))
+
+    def test_disabled(self):
+        store = ConversationStore(self.db_path, ttl=0)
+        store.put(self.HISTORY, {'conversationId': 'conv-1'})
+        self.assertIsNone(store.get(self.HISTORY))
+        self.assertFalse(self.db_path.exists())
+
+    def test_shares_the_database_with_the_other_stores(self):
+        cache = BootstrapCache(self.db_path, ttl=900)
+        cache.put({'actions': ['a'], 'xsid_script': 'x', 'baggage': 'b', 'sentry_trace': 's'})
+        self.store.put(self.HISTORY, {'conversationId': 'conv-1'})
+        self.assertEqual(self.store.get(self.HISTORY), {'conversationId': 'conv-1'})
+        self.assertEqual(cache.get()['actions'], ['a'])
+
+class TestChatCompletionFollowUp(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(mock.patch.stopall)
+        mock.patch.object(api_server, 'conversation_store', ConversationStore(Path(tmp.name) / 'grok.db', ttl=3600)).start()
+        mock.patch.object(api_server, 'get_proxy', return_value=None).start()
+
+        self.new = mock.MagicMock()
+        self.new.start_convo.return_value = {'response': 'Paris', 'stream_response': ['Paris'], 'extra_data': {'conversationId': 'conv-1', 'parentResponseId': 'resp-1'}}
+        self.new.stream_convo.return_value = iter(['Par', 'is', {'response': 'Paris', 'extra_data': {'conversationId': 'conv-1', 'parentResponseId': 'resp-1'}}])
+        mock.patch.object(api_server, 'get_grok_pool', return_value=mock.Mock(acquire=mock.Mock(return_value=self.new))).start()
+
+        self.follow_up = mock.MagicMock()
+        self.follow_up.start_convo.return_value = {'response': 'Berlin', 'stream_response': ['Berlin'], 'extra_data': {'conversationId': 'conv-1', 'parentResponseId': 'resp-2'}}
+        self.follow_up.stream_convo.return_value = iter(['Berlin', {'response': 'Berlin', 'extra_data': {'conversationId': 'conv-1', 'parentResponseId': 'resp-2'}}])
+        self.grok = mock.patch.object(api_server, 'Grok', return_value=self.follow_up).start()
+
+        self.client = TestClient(api_server.app)
+        self.first = [{'role': 'user', 'content': 'Capital of France?'}]
+
+    def complete(self, messages, stream=False):
+        response = self.client.post('/v1/chat/completions', headers=HEADERS, json={'messages': messages, 'stream': stream})
+        self.assertEqual(response.status_code, 200)
+        if not stream:
+            return response.json()['choices'][0]['message']['content']
+        chunks = [json.loads(line[6:]) for line in response.text.split('\n\n') if line.startswith('data: {')]
+        return ''.join(chunk['choices'][0]['delta'].get('content', '') for chunk in chunks)
+
+    def test_follow_up_sends_only_the_new_message(self):
+        self.assertEqual(self.complete(self.first), 'Paris')
+        self.new.start_convo.assert_called_once_with('User: Capital of France?')
+
+        messages = self.first + [{'role': 'assistant', 'content': 'Paris'}, {'role': 'user', 'content': 'And Germany?'}]
+        self.assertEqual(self.complete(messages), 'Berlin')
+        self.follow_up.start_convo.assert_called_once_with('And Germany?', {'conversationId': 'conv-1', 'parentResponseId': 'resp-1'})
+        self.assertEqual(self.new.start_convo.call_count, 1)
+
+        # The answer to the follow-up is stored as well
+        self.assertEqual(api_server.conversation_store.get(messages + [{'role': 'assistant', 'content': 'Berlin'}])['parentResponseId'], 'resp-2')
+
+    def test_grok_runs_off_the_event_loop(self):
+        loops = []
+        def start_convo(message):
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                loops.append(None)
+            return {'response': 'Paris', 'extra_data': {'conversationId': 'conv-1'}}
+        self.new.start_convo.side_effect = start_convo
+
+        self.assertEqual(self.complete(self.first), 'Paris')
+        # A blocking session (or its anti-bot backoff) must not stall other requests
+        self.assertEqual(loops, [None])
+
+    def test_unknown_history_starts_a_new_conversation(self):
+        messages = self.first + [{'role': 'assistant', 'content': 'Lyon'}, {'role': 'user', 'content': 'And Germany?'}]
+        self.complete(messages)
+        self.grok.assert_not_called()
+        self.assertIn('Assistant: Lyon', self.new.start_convo.call_args.args[0])
+
+    def test_failed_follow_up_falls_back(self):
+        self.complete(self.first)
+        self.follow_up.start_convo.return_value = {'error': 'conversation not found'}
+        self.new.start_convo.return_value = {'response': 'Berlin', 'extra_data': {'conversationId': 'conv-2', 'parentResponseId': 'resp-9'}}
+
+        messages = self.first + [{'role': 'assistant', 'content': 'Paris'}, {'role': 'user', 'content': 'And Germany?'}]
+        self.assertEqual(self.complete(messages), 'Berlin')
+        self.assertTrue(self.new.start_convo.call_args.args[0].endswith('User: And Germany?'))
+
+    def test_streamed_follow_up(self):
+        self.assertEqual(self.complete(self.first, stream=True), 'Paris')
+
+        messages = self.first + [{'role': 'assistant', 'content': 'Paris'}, {'role': 'user', 'content': 'And Germany?'}]
+        self.assertEqual(self.complete(messages, stream=True), 'Berlin')
+        self.follow_up.stream_convo.assert_called_once_with('And Germany?', {'conversationId': 'conv-1', 'parentResponseId': 'resp-1'})
+
+    def test_streamed_follow_up_error_falls_back(self):
+        self.complete(self.first, stream=True)
+        self.follow_up.stream_convo.return_value = iter([{'error': 'conversation not found'}])
+        self.new.stream_convo.return_value = iter(['Berlin', {'response': 'Berlin', 'extra_data': {'conversationId': 'conv-2'}}])
+
+        messages = self.first + [{'role': 'assistant', 'content': 'Paris'}, {'role': 'user', 'content': 'And Germany?'}]
+        self.assertEqual(self.complete(messages, stream=True), 'Berlin')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+from time import sleep
+from unittest import mock
+from core import grok
+
+class FakeGrok:
+    """Stands in for Grok; bootstrap() only records when it ran."""
+
+    created: list = []
+    failures: int = 0
+
+    def __init__(self, model: str = "grok-3-auto", proxy: str = None, proxies=None) -> None:
+        self.model = model
+        self.proxy = proxy
+        self.bootstrapped_at = None
+        FakeGrok.created.append(self)
+
+    def bootstrap(self) -> "FakeGrok":
+        if FakeGrok.failures:
+            FakeGrok.failures -= 1
+            raise ConnectionError("bootstrap failed")
+        self.bootstrapped_at = grok.time()
+        return self
+
+    def set_model(self, model: str) -> None:
+        self.model = model
+
+class TestGrokPool(unittest.TestCase):
+
+    def setUp(self):
+        FakeGrok.created = []
+        FakeGrok.failures = 0
+        patcher = mock.patch.object(grok, 'Grok', FakeGrok)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def start(self, size, ttl=300):
+        pool = grok.GrokPool(size, ttl, proxy='socks5://a:1').start()
+        self.addCleanup(pool.stop)
+        return pool
+
+    def wait_ready(self, pool, count):
+        for _ in range(200):
+            if pool.health()['ready'] == count:
+                return
+            sleep(0.01)
+        self.fail(f"pool did not reach {count} ready sessions: {pool.health()}")
+
+    def test_background_refill(self):
+        pool = self.start(2)
+        self.wait_ready(pool, 2)
+
+        first = pool.acquire('grok-4')
+        self.assertIn(first, FakeGrok.created)
+        self.assertEqual(first.model, 'grok-4')
+        self.assertEqual(first.proxy, 'socks5://a:1')
+        # Taking a session wakes the thread to replace it
+        self.wait_ready(pool, 2)
+        self.assertEqual(len(FakeGrok.created), 3)
+
+        health = pool.health()
+        self.assertEqual((health['hits'], health['misses']), (1, 0))
+        self.assertTrue(health['running'])
+
+    def test_stopped_pool_can_be_restarted(self):
+        pool = self.start(1)
+        self.wait_ready(pool, 1)
+        pool.stop()
+        self.assertFalse(pool.health()['running'])
+
+        pool.acquire()
+        pool.start()
+        self.assertTrue(pool.health()['running'])
+        self.wait_ready(pool, 1)
+
+    def test_failed_bootstrap_is_retried(self):
+        FakeGrok.failures = 1
+        pool = self.start(1)
+        # The retry comes after a one second backoff
+        sleep(1)
+        self.wait_ready(pool, 1)
+        health = pool.health()
+        self.assertEqual(health['bootstrap_failures'], 1)
+        self.assertEqual(health['last_error'], 'bootstrap failed')
+
+    def test_expired_sessions_are_dropped(self):
+        pool = grok.GrokPool(3, ttl=60)
+        now = 1000.0
+        with mock.patch.object(grok, 'time', side_effect=lambda: now):
+            for age in (90, 61, 30):
+                session = FakeGrok()
+                session.bootstrapped_at = now - age
+                pool._ready.append(session)
+
+            health = pool.health()
+        self.assertEqual(health['ready'], 1)
+        self.assertEqual(health['expired'], 2)
+        self.assertEqual(health['oldest_age'], 30)
+
+    def test_expired_session_is_never_handed_out(self):
+        pool = grok.GrokPool(1, ttl=60)
+        stale = FakeGrok()
+        stale.bootstrapped_at = grok.time() - 120
+        pool._ready.append(stale)
+
+        session = pool.acquire()
+        self.assertIsNot(session, stale)
+        self.assertEqual(pool.expired, 1)
+        self.assertEqual(pool.misses, 1)
+
+    def test_empty_pool_bootstraps_inline(self):
+        # Not started, so nothing is ever prepared in the background
+        pool = grok.GrokPool(2, proxy='socks5://a:1')
+        session = pool.acquire('grok-3-fast')
+
+        self.assertEqual(FakeGrok.created, [session])
+        self.assertIsNotNone(session.bootstrapped_at)
+        self.assertEqual((session.model, session.proxy), ('grok-3-fast', 'socks5://a:1'))
+        self.assertEqual((pool.hits, pool.misses), (0, 1))
+
+    def test_inline_bootstrap_failure_reaches_the_caller(self):
+        FakeGrok.failures = 1
+        pool = grok.GrokPool(0)
+        with self.assertRaises(ConnectionError):
+            pool.acquire()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import tempfile
+from pathlib import Path
+from unittest import mock
+from core.identity_store import IdentityStore
+from core import grok
+
+class TestIdentityStore(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_path = Path(tmp.name) / 'grok.db'
+        self.store = IdentityStore(self.db_path, ttl=3600, max_uses=3)
+
+    def test_checkout_counts_uses_and_rotates(self):
+        self.assertIsNone(self.store.checkout())
+        self.store.put('anon-1', 'key-1', {'sso': 'a'})
+
+        identity = self.store.checkout()
+        self.assertEqual(identity, {'anon_user': 'anon-1', 'privateKey': 'key-1', 'cookies': {'sso': 'a'}, 'uses': 2})
+        self.assertEqual(self.store.checkout()['uses'], 3)
+        # Served max_uses conversations, a new identity is needed
+        self.assertIsNone(self.store.checkout())
+        self.assertEqual(self.store.health()['stored'], 0)
+
+    def test_least_used_first(self):
+        self.store.put('anon-1', 'key-1', {})
+        self.store.checkout()
+        self.store.put('anon-2', 'key-2', {})
+        self.assertEqual(self.store.checkout()['anon_user'], 'anon-2')
+
+    def test_shared_between_instances(self):
+        self.store.put('anon-1', 'key-1', {})
+        other = IdentityStore(self.db_path, ttl=3600, max_uses=3)
+        self.assertEqual(other.checkout()['anon_user'], 'anon-1')
+        self.assertEqual(self.store.checkout()['uses'], 3)
+
+    def test_expired(self):
+        self.store.put('anon-1', 'key-1', {})
+        with mock.patch('core.identity_store.time', return_value=10 ** 12):
+            self.assertIsNone(self.store.checkout())
+
+    def test_retire(self):
+        self.store.put('anon-1', 'key-1', {})
+        self.store.retire('anon-1')
+        self.assertIsNone(self.store.checkout())
+
+    def test_disabled(self):
+        store = IdentityStore(self.db_path, ttl=0)
+        store.put('anon-1', 'key-1', {})
+        self.assertIsNone(store.checkout())
+        self.assertFalse(self.db_path.exists())
+
+class TestBootstrapIdentity(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = IdentityStore(Path(tmp.name) / 'grok.db', ttl=3600, max_uses=5)
+        self.addCleanup(mock.patch.stopall)
+        mock.patch.object(grok, 'identity_store', self.store).start()
+
+        def load(session, extra_data=None):
+            session.actions = ['upload', 'verify', 'challenge']
+            session.session.cookies.set('__cf_bm', 'page')
+        mock.patch.object(grok.Grok, '_load', load).start()
+
+    def bootstrap(self, c_request):
+        session = grok.Grok()
+        with mock.patch.object(grok.Grok, 'c_request', autospec=True, side_effect=c_request) as calls:
+            session.bootstrap()
+        return session, [call.args[1] for call in calls.call_args_list]
+
+    def test_new_identity_is_stored_and_reused(self):
+        def c_request(session, action):
+            if action == 'upload':
+                session.anon_user = 'anon-1'
+                session.session.cookies.set('sso', 'a')
+
+        first, actions = self.bootstrap(c_request)
+        self.assertEqual(actions, ['upload', 'verify', 'challenge'])
+        self.assertFalse(first.identity_reused)
+
+        second, actions = self.bootstrap(c_request)
+        self.assertEqual(actions, ['verify', 'challenge'])
+        self.assertTrue(second.identity_reused)
+        self.assertEqual(second.anon_user, 'anon-1')
+        self.assertEqual(second.keys['privateKey'], first.keys['privateKey'])
+        self.assertEqual(second.session.cookies.get('sso'), 'a')
+
+    def test_rejected_identity_is_retired(self):
+        self.store.put('anon-old', 'key-old', {'sso': 'old'})
+
+        def c_request(session, action):
+            if action == 'upload':
+                session.anon_user = 'anon-new'
+            elif session.anon_user == 'anon-old':
+                raise ValueError('challenge rejected')
+
+        session, actions = self.bootstrap(c_request)
+        self.assertEqual(actions, ['verify', 'upload', 'verify', 'challenge'])
+        self.assertEqual(session.anon_user, 'anon-new')
+        self.assertIsNone(session.session.cookies.get('sso'))
+        # Cookies from the grok.com/c load survive dropping the old identity
+        self.assertEqual(session.session.cookies.get('__cf_bm'), 'page')
+        self.assertEqual(self.store.checkout()['anon_user'], 'anon-new')
+
+if __name__ == '__main__':
+    unittest.main()
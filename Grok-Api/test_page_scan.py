@@ -0,0 +1,46 @@
+import unittest
+import os
+from core import Parser, Utils
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def legacy_scan(html: str) -> tuple:
+    # What Grok._load extracted before Parser.scan_page
+    scripts = [s['src'] for s in BeautifulSoup(html, 'html.parser').find_all('script', src=True) if s['src'].startswith('/_next/static/chunks/')]
+    baggage = Utils.between(html, '<meta name="baggage" content="', '"')
+    sentry_trace = Utils.between(html, '<meta name="sentry-trace" content="', '-')
+    return scripts, baggage, sentry_trace
+
+@unittest.skipIf(BeautifulSoup is None, "beautifulsoup4 is not installed")
+class TestPageScanParity(unittest.TestCase):
+
+    def test_saved_pages(self):
+        pages = [name for name in sorted(os.listdir(FIXTURES)) if name.endswith('.html')]
+        self.assertTrue(pages)
+
+        for name in pages:
+            with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+                html = f.read()
+            with self.subTest(page=name):
+                self.assertEqual(Parser.scan_page(html), legacy_scan(html))
+
+    def test_tricky_markup(self):
+        html = (
+            '<meta name="sentry-trace" content="abc-def-0"/>'
+            '<meta content="x" name="other"/><meta name="baggage" content="a=1,b=2"/>'
+            '<!-- <script src="/_next/static/chunks/commented.js"></script> -->'
+            '<script>var s = "<script src=\'/_next/static/chunks/quoted.js\'>";</script>'
+            '<SCRIPT SRC="/_next/static/chunks/upper.js"></SCRIPT>'
+            "<script async src='/_next/static/chunks/single.js?a=1&amp;b=2'></script>"
+            '<script src=/_next/static/chunks/bare.js></script>'
+            '<script src="/other/static.js"></script>'
+        )
+        self.assertEqual(Parser.scan_page(html), legacy_scan(html))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+from collections import Counter
+from unittest import mock
+from core import proxy_pool
+from core.proxy_pool import ProxyPool
+
+A, B, C = 'socks5://a:1', 'socks5://user:secret@b:1', 'socks5://c:1'
+
+def probe_response(ip):
+    return mock.Mock(status_code=200, json=lambda: {'ip': ip})
+
+class TestProxyPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ProxyPool([A, B, C], interval=60, max_failures=2)
+        self.addCleanup(self.pool.stop)
+
+    def probe(self, url, latency=None, error=None):
+        clock = mock.patch.object(proxy_pool, 'perf_counter', side_effect=[0, latency or 0])
+        get = mock.patch.object(proxy_pool.requests, 'get', side_effect=error, return_value=probe_response('1.2.3.4'))
+        with clock, get:
+            return self.pool.probe(url)
+
+    def test_failing_proxy_is_ejected_until_a_probe_succeeds(self):
+        self.assertFalse(self.probe(A, error=OSError('connection refused')))
+        self.assertTrue(self.pool.is_healthy(A))
+        self.probe(A, error=OSError('connection refused'))
+        self.assertFalse(self.pool.is_healthy(A))
+        self.assertNotIn(A, {self.pool.pick() for _ in range(50)})
+
+        self.assertTrue(self.probe(A, latency=0.1))
+        self.assertTrue(self.pool.is_healthy(A))
+
+    def test_latency_weighted(self):
+        self.probe(A, latency=0.05)
+        self.probe(B, latency=0.5)
+        self.probe(C, latency=0.5)
+        picks = Counter(self.pool.pick() for _ in range(2000))
+        # A is ten times faster, so it gets about ten times the traffic of each other proxy
+        self.assertGreater(picks[A], 4 * picks[B])
+        self.assertGreater(picks[B], 0)
+
+    def test_exclude_and_fallback(self):
+        self.pool.report_failure(A)
+        self.pool.report_failure(A)
+        self.assertEqual({self.pool.pick(exclude=B) for _ in range(20)}, {C})
+
+        for url in (B, C):
+            self.pool.report_failure(url)
+            self.pool.report_failure(url)
+        # Everything is ejected: the least failing proxy beats no proxy
+        self.pool.report_failure(A)
+        self.pool.report_failure(C)
+        self.assertEqual(self.pool.pick(), B)
+
+    def test_health_reports_cached_state(self):
+        self.probe(B, latency=0.25)
+        health = self.pool.health()
+        self.assertEqual((health['size'], health['healthy']), (3, 3))
+        state = health['proxies'][1]
+        self.assertEqual(state['proxy'], 'socks5://user:***@b:1')
+        self.assertEqual(state['latency_ms'], 250.0)
+        self.assertEqual(state['ip_address'], '1.2.3.4')
+        self.assertIsNone(health['proxies'][0]['latency_ms'])
+
+class TestGrokProxyAssignment(unittest.TestCase):
+
+    def test_sessions_and_retries_use_the_pool(self):
+        from core import grok
+        pool = ProxyPool([A, C], max_failures=1)
+        session = grok.Grok(proxy=A, proxies=pool)
+        self.assertEqual(session._next_proxy(), C)
+        self.assertFalse(pool.is_healthy(A))
+
+        grok_pool = grok.GrokPool(0, proxies=pool)
+        self.assertEqual(grok_pool._proxy(), C)
+
+class TestProxyPoolConfiguration(unittest.TestCase):
+
+    def setUp(self):
+        import api_server
+        self.api_server = api_server
+        self.addCleanup(mock.patch.stopall)
+        mock.patch.object(api_server, 'proxy_pool', None).start()
+        mock.patch.object(api_server, 'proxy_pool_resolved', False).start()
+        self.start = mock.patch.object(ProxyPool, 'start', autospec=True, side_effect=lambda pool: pool).start()
+
+    def resolve_twice(self, use_socks, environ):
+        mock.patch.object(self.api_server, 'USE_SOCKS', use_socks).start()
+        with mock.patch.dict('os.environ', environ, clear=True), self.assertLogs(level='INFO') as logs:
+            first = self.api_server.get_proxy_pool()
+            second = self.api_server.get_proxy_pool()
+        self.assertIs(first, second)
+        return first, logs.output
+
+    def test_disabled_is_resolved_once(self):
+        pool, logs = self.resolve_twice(False, {'SOCKS': A})
+        self.assertIsNone(pool)
+        self.assertEqual(len(logs), 1)
+        self.assertIn('SOCKS5 proxy disabled', logs[0])
+
+    def test_missing_proxies_are_resolved_once(self):
+        pool, logs = self.resolve_twice(True, {})
+        self.assertIsNone(pool)
+        self.assertEqual(len(logs), 1)
+        self.assertIn('neither SOCKS_POOL nor SOCKS is set', logs[0])
+
+    def test_pool_is_started_once(self):
+        pool, logs = self.resolve_twice(True, {'SOCKS_POOL': f'{A}, c:1'})
+        self.assertEqual([state['proxy'] for state in pool.health()['proxies']], [A, C])
+        self.assertEqual(self.start.call_count, 1)
+        self.assertEqual(len(logs), 1)
+
+if __name__ == '__main__':
+    unittest.main()
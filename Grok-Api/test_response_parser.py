@@ -0,0 +1,50 @@
+import unittest
+import json
+from core.response import ResponseParser
+
+class TestResponseParser(unittest.TestCase):
+
+    def test_new_conversation_schema(self):
+        lines = [
+            {"result": {"conversation": {"conversationId": "conv-1"}}},
+            {"result": {"response": {"token": "Hel"}}},
+            {"result": {"response": {"token": "lo"}}},
+            {"result": {"response": {"modelResponse": {"message": "Hello", "responseId": "resp-1", "generatedImageUrls": []}}}},
+        ]
+        parser = ResponseParser().feed_text("\n".join(json.dumps(line) for line in lines))
+
+        self.assertEqual(parser.tokens, ["Hel", "lo"])
+        self.assertEqual(parser.response, "Hello")
+        self.assertEqual(parser.conversation_id, "conv-1")
+        self.assertEqual(parser.parent_response, "resp-1")
+        # Empty image lists are reported as None, like the old parse loop did
+        self.assertIsNone(parser.image_urls)
+        self.assertTrue(parser.model_response_seen)
+
+    def test_follow_up_schema(self):
+        lines = [
+            {"result": {"token": "Hi"}},
+            {"result": {"modelResponse": {"message": "Hi", "responseId": "resp-2", "generatedImageUrls": ["https://img"]}}},
+            {"result": {"modelResponse": {"message": "later", "responseId": "resp-3"}}},
+        ]
+        parser = ResponseParser()
+        tokens = [parser.feed(json.dumps(line)) for line in lines]
+
+        self.assertEqual(tokens, ["Hi", None, None])
+        # The first model response wins
+        self.assertEqual(parser.response, "Hi")
+        self.assertEqual(parser.parent_response, "resp-2")
+        self.assertEqual(parser.image_urls, ["https://img"])
+        self.assertIsNone(parser.conversation_id)
+
+    def test_error_body(self):
+        parser = ResponseParser()
+        parser.feed(b'{"error":{"code":7,"message":"rejected by anti-bot rules"}}')
+        parser.feed("not json")
+
+        self.assertFalse(parser.model_response_seen)
+        self.assertIn("rejected by anti-bot rules", parser.error_text)
+        self.assertIn("not json", parser.error_text)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,258 @@
+import unittest
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+from base64 import b64decode
+from core.reverse.xctid import Signature, PreparedSigner
+from core.reverse.anon import Anon, KeyPool
+from core.reverse import parser
+from core.reverse.parser import Parser
+from core.reverse import mappings
+from core.reverse.mappings import MappingStore
+
+# Recorded inputs and outputs of the signing and handshake code, checked offline
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'reverse_golden.json')
+
+with open(GOLDEN_FILE, encoding='utf-8') as f:
+    GOLDEN = json.load(f)
+
+class TestSignature(unittest.TestCase):
+
+    def test_generate_sign(self):
+        for session in GOLDEN['sessions']:
+            for case in session['cases']:
+                with self.subTest(x_values=session['x_values'], path=case['path'], time_n=case['time_n']):
+                    self.assertEqual(
+                        Signature.generate_sign(case['path'], case['method'], session['verification'], session['svg'], session['x_values'], case['time_n'], case['random_float']),
+                        case['expected']
+                    )
+
+    def test_prepared_signer(self):
+        for session in GOLDEN['sessions']:
+            signer = PreparedSigner(session['verification'], session['svg'], session['x_values'])
+            self.assertEqual(signer.xs, session['xs'])
+            for case in session['cases']:
+                with self.subTest(x_values=session['x_values'], path=case['path'], time_n=case['time_n']):
+                    self.assertEqual(signer.sign(case['path'], case['method'], case['time_n'], case['random_float']), case['expected'])
+
+    def test_xa_and_xs(self):
+        for session in GOLDEN['sessions']:
+            self.assertEqual(Signature.xa(session['svg']), session['xa'])
+            self.assertEqual(Signature.xs(b64decode(session['verification']), session['svg'], session['x_values']), session['xs'])
+
+    def test_tohex(self):
+        for value, expected in GOLDEN['tohex']:
+            with self.subTest(value=value):
+                self.assertEqual(Signature.tohex(value), expected)
+
+class TestAnon(unittest.TestCase):
+
+    def test_public_key(self):
+        for entry in GOLDEN['anon']:
+            self.assertEqual(Anon.publicKeyCreate(bytes.fromhex(entry['private_key_hex'])), entry['public_key'])
+
+    def test_private_key_encoding(self):
+        for entry in GOLDEN['anon']:
+            self.assertEqual(Anon.xor(bytes.fromhex(entry['private_key_hex'])), entry['private_key'])
+
+    def test_sign_challenge(self):
+        # secp256k1 signatures use RFC 6979 nonces, so they are deterministic
+        for entry in GOLDEN['anon']:
+            self.assertEqual(Anon.sign_challenge(bytes.fromhex(entry['challenge_hex']), entry['private_key']), entry['signed'])
+
+    def test_generate_keys(self):
+        keys = Anon.generate_keys()
+        self.assertEqual(len(b64decode(keys['privateKey'])), 32)
+        self.assertEqual(Anon.publicKeyCreate(b64decode(keys['privateKey'])), keys['userPublicKey'])
+
+    def test_sign_challenge_with_loaded_key(self):
+        entry = GOLDEN['anon'][0]
+        challenge = bytes.fromhex(entry['challenge_hex'])
+        Anon.load_key(entry['private_key'])
+        self.assertEqual(Anon.sign_challenge(challenge, entry['private_key']), entry['signed'])
+        self.assertIs(Anon.load_key(entry['private_key']), Anon.load_key(entry['private_key']))
+
+class TestKeyPool(unittest.TestCase):
+
+    def test_fills_to_size(self):
+        pool = KeyPool(4).start()
+        self.addCleanup(pool.stop)
+        for _ in range(100):
+            if pool.health()['ready'] == 4:
+                break
+            time.sleep(0.01)
+        self.assertEqual(pool.health()['ready'], 4)
+
+        keys = pool.take()
+        self.assertEqual(Anon.publicKeyCreate(b64decode(keys['privateKey'])), keys['userPublicKey'])
+        self.assertEqual(pool.health()['hits'], 1)
+
+    def test_keys_are_unique(self):
+        pool = KeyPool(4)
+        self.addCleanup(pool.stop)
+        keys = [pool.take()['privateKey'] for _ in range(20)]
+        self.assertEqual(len(set(keys)), 20)
+
+    def test_disabled_pool_generates_inline(self):
+        pool = KeyPool(0)
+        keys = pool.take()
+        self.assertEqual(len(b64decode(keys['privateKey'])), 32)
+        self.assertEqual(pool.health(), {'size': 0, 'ready': 0, 'running': False, 'hits': 0, 'misses': 1})
+
+class TestParser(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Mapping hits only: a throwaway store seeded from core/mappings keeps the test offline
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.mappings = Parser.mappings
+        Parser.mappings = MappingStore(Path(cls.tmp.name) / 'grok.db')
+
+    @classmethod
+    def tearDownClass(cls):
+        Parser.mappings = cls.mappings
+        cls.tmp.cleanup()
+
+    def test_get_anim(self):
+        for session in GOLDEN['sessions']:
+            self.assertEqual(Parser.get_anim(session['page']), (session['verification'], session['anim']))
+
+    def test_parse_values(self):
+        for session in GOLDEN['sessions']:
+            svg, numbers = Parser.parse_values(session['page'], session['anim'], session['script_id'])
+            self.assertEqual(svg, session['svg'])
+            self.assertEqual(numbers, session['x_values'])
+
+class TestMappingStore(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_path = Path(tmp.name) / 'grok.db'
+        self.seed_dir = Path(tmp.name) / 'seed'
+        shutil.copytree(mappings.CORE_DIR / 'mappings', self.seed_dir)
+        with open(self.seed_dir / 'txid.json', encoding='utf-8') as f:
+            self.seeded = len(json.load(f))
+
+    def store(self):
+        return MappingStore(self.db_path, self.seed_dir)
+
+    def run_threads(self, target, count=4):
+        barrier = threading.Barrier(count)
+        def run(index):
+            barrier.wait()
+            target(index)
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_concurrent_writers_lose_nothing(self):
+        def write(index):
+            # Each worker has its own store, like separate uvicorn processes
+            store = self.store()
+            for i in range(25):
+                store.add_numbers(f'https://grok.com/_next/{index}/{i}.js', [index, i])
+        self.run_threads(write)
+
+        store = self.store()
+        for index in range(4):
+            for i in range(25):
+                self.assertEqual(store.get_numbers(f'https://grok.com/_next/{index}/{i}.js'), [index, i])
+        self.assertEqual(len(store.txid), self.seeded + 100)
+
+    def test_only_one_worker_scrapes_a_miss(self):
+        link = 'https://grok.com/_next/static/chunks/new.js'
+        scrapes = []
+        def worker(index):
+            store = self.store()
+            if store.get_numbers(link) is None:
+                with store.locked():
+                    if store.get_numbers(link) is None:
+                        scrapes.append(index)
+                        time.sleep(0.05)
+                        store.add_numbers(link, [1, 2, 3])
+            self.assertEqual(store.get_numbers(link), [1, 2, 3])
+        self.run_threads(worker)
+        self.assertEqual(len(scrapes), 1)
+
+    def test_seed_files_are_imported_once(self):
+        with mock.patch.object(mappings, 'load', wraps=json.load) as load:
+            self.run_threads(lambda index: self.store().get_numbers('missing'))
+            self.assertEqual(load.call_count, 2)
+            self.store().get_numbers('missing')
+            self.assertEqual(load.call_count, 2)
+
+            # An updated seed file is imported again
+            with open(self.seed_dir / 'txid.json', 'w', encoding='utf-8') as f:
+                json.dump({'https://grok.com/_next/seeded.js': [4, 5]}, f)
+            store = self.store()
+            self.assertEqual(store.get_numbers('https://grok.com/_next/seeded.js'), [4, 5])
+            self.assertEqual(load.call_count, 3)
+
+class TestScrapeGrok(unittest.TestCase):
+
+    ACTION_SCRIPT = '/_next/static/chunks/actions.js'
+    XSID_SCRIPT = '/_next/static/chunks/xsid.js'
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = Path(tmp.name) / 'chunks'
+        self.addCleanup(mock.patch.stopall)
+        mock.patch.object(parser, 'CHUNK_CACHE_DIR', self.cache_dir).start()
+        mock.patch.object(Parser, 'mappings', MappingStore(Path(tmp.name) / 'grok.db', seed_dir=Path(tmp.name))).start()
+
+    def chunk(self, script):
+        if script == self.ACTION_SCRIPT:
+            return 'anonPrivateKey;(0,a.createServerReference)("7f01");(0,a.createServerReference)("7f02")'
+        if script == self.XSID_SCRIPT:
+            return '{x:()=>n.e("static/chunks/abc.js").then(()=>n(880932))}'
+        time.sleep(0.05)
+        return 'filler'
+
+    def test_stops_once_both_markers_are_found(self):
+        scripts = [self.ACTION_SCRIPT, self.XSID_SCRIPT] + [f'/_next/static/chunks/{i}.js' for i in range(20)]
+        with mock.patch.object(parser, '_chunk_executor', parser.ThreadPoolExecutor(max_workers=1)) as executor, \
+                mock.patch.object(Parser, 'fetch_chunk', side_effect=self.chunk) as fetch_chunk:
+            self.assertEqual(Parser._scrape_grok(scripts), (['7f01', '7f02'], 'static/chunks/abc.js'))
+            executor.shutdown(wait=True)
+        # At most the fetch already running when the markers were found; the queue was dropped
+        self.assertLessEqual(fetch_chunk.call_count, 3)
+        self.assertEqual(Parser.mappings.find_actions(scripts), (['7f01', '7f02'], 'static/chunks/abc.js'))
+
+    def test_executor_is_shared(self):
+        scripts = [self.ACTION_SCRIPT, self.XSID_SCRIPT]
+        with mock.patch.object(Parser, 'fetch_chunk', side_effect=self.chunk):
+            Parser._scrape_grok(scripts)
+            executor = parser._chunk_executor
+            Parser._scrape_grok(scripts)
+        self.assertIsNotNone(executor)
+        self.assertIs(parser._chunk_executor, executor)
+
+    def test_cache_hit_skips_the_request(self):
+        with mock.patch.object(parser.requests, 'Session') as session:
+            session.return_value.get.return_value = mock.Mock(status_code=200, text='body')
+            self.assertEqual(Parser.fetch_chunk(self.ACTION_SCRIPT), 'body')
+            self.assertEqual(Parser.fetch_chunk(self.ACTION_SCRIPT), 'body')
+        self.assertEqual(session.return_value.get.call_count, 1)
+
+    def test_prune_chunk_cache(self):
+        self.cache_dir.mkdir()
+        old, recent = self.cache_dir / 'old.js', self.cache_dir / 'recent.js'
+        old.write_text('old')
+        recent.write_text('recent')
+        os.utime(old, (time.time() - 3600, time.time() - 3600))
+
+        self.assertEqual(Parser.prune_chunk_cache(max_age=0), 0)
+        self.assertEqual(Parser.prune_chunk_cache(max_age=600), 1)
+        self.assertEqual(sorted(path.name for path in self.cache_dir.iterdir()), ['recent.js'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import os
+from unittest import mock
+from core.reverse.xctid import Signature, PreparedSigner
+
+# Fixed session inputs: a 48 byte verification token and an svg path with 16
+# segments of 11 values, like the ones scraped during the handshake
+VERIFICATION = '8F2bZtGHff+11G+eqSZp70ts0h2y1e4/R6fHqbBmptrUom3QdWgUcwmEo9c5qXZ4'
+SVG = (
+    'M 10,30 C237 187 69 103 188 252 72 134 198 172 171C238 86 67 169 105 33 50 88 2 77 224C120 179 117 4'
+    '1 100 145 122 236 134 246 223C212 102 36 154 154 142 69 128 51 253 111C100 198 90 114 163 181 23 193'
+    ' 37 60 117C28 64 107 44 88 120 249 84 82 44 64C53 15 55 92 161 0 62 143 14 93 31C53 107 106 97 236 9'
+    '5 242 160 139 232 224C111 204 229 214 68 107 82 159 203 100 91C182 233 7 61 171 1 114 214 19 109 237'
+    'C254 25 220 170 5 174 130 80 115 55 220C34 68 89 12 173 157 129 253 82 185 238C222 251 167 81 19 62 '
+    '61 186 217 92 48C27 223 13 139 118 60 162 70 108 55 220C52 136 222 81 118 0 63 101 193 208 228C88 12'
+    '6 149 141 182 230 57 207 203 144 162'
+)
+
+# (x_values, path, method, time_n, random_float, expected x-statsig-id)
+# recorded with Signature.generate_sign before PreparedSigner was introduced
+GOLDEN = [
+    ([6, 14, 12, 16], '/rest/app-chat/conversations/new', 'POST', 12345678, None, 'APBdm2bRh33/tdRvnqkmae9LbNIdstXuP0enx6mwZqba1KJt0HVoFHMJhKPXOal2eE5hvAANJaprtlnhFNIRKc5D7zxOAw'),
+    ([6, 14, 12, 16], '/rest/app-chat/conversations/new', 'POST', 98765432, 0.5, 'gHDdG+ZRB/1/NVTvHimm6W/L7FKdMlVuv8cnRykw5iZaVCLtUPXolPOJBCNXuSn2+PiKY4XFWeTMGKkHZteVkfhyOL4wgw'),
+    ([6, 14, 12, 16], '/rest/app-chat/conversations/new', 'POST', 1, 0.999, '/w+iZJkueIIASiuQYVbZlhC0ky3iTSoRwLhYOFZPmVklK12SL4qX64z2e1woxlaJh/7///+nK4F2qbCIVn7OJbdoxKiA/A'),
+    ([6, 14, 12, 16], '/rest/app-chat/conversations/new', 'POST', 55555555, 0.01, 'AvJfmWTThX/9t9ZtnKska+1JbtAfsNfsPUWlxauyZKTY1qBv0ndqFnELhqHVO6t0euG3TQGhE33YjebVXP7LCwgo+wghAQ'),
+    ([6, 14, 12, 16], '/rest/app-chat/conversations/0f1e/responses', 'POST', 12345678, None, 'APBdm2bRh33/tdRvnqkmae9LbNIdstXuP0enx6mwZqba1KJt0HVoFHMJhKPXOal2eE5hvABhlsbU4rvBmbLq6V0Shhx9Aw'),
+    ([6, 14, 12, 16], '/rest/app-chat/conversations/0f1e/responses', 'POST', 98765432, 0.5, 'gHDdG+ZRB/1/NVTvHimm6W/L7FKdMlVuv8cnRykw5iZaVCLtUPXolPOJBCNXuSn2+PiKY4XyIO+WX3WzhYi3ZM1YhqNAgw'),
+    ([6, 14, 12, 16], '/rest/app-chat/conversations/0f1e/responses', 'POST', 1, 0.999, '/w+iZJkueIIASiuQYVbZlhC0ky3iTSoRwLhYOFZPmVklK12SL4qX64z2e1woxlaJh/7///+1hj9yfgudqZSK+2XzSMKg/A'),
+    ([6, 14, 12, 16], '/rest/app-chat/conversations/0f1e/responses', 'POST', 55555555, 0.01, 'AvJfmWTThX/9t9ZtnKska+1JbtAfsNfsPUWlxauyZKTY1qBv0ndqFnELhqHVO6t0euG3TQE8z03co9PU8c/ZokNhC6YsAQ'),
+    ([13, 33, 11, 36], '/rest/app-chat/conversations/new', 'POST', 12345678, None, 'APBdm2bRh33/tdRvnqkmae9LbNIdstXuP0enx6mwZqba1KJt0HVoFHMJhKPXOal2eE5hvAAAs9SeFoSYjFGkpwLHXLu0Aw'),
+    ([13, 33, 11, 36], '/rest/app-chat/conversations/new', 'POST', 98765432, 0.5, 'gHDdG+ZRB/1/NVTvHimm6W/L7FKdMlVuv8cnRykw5iZaVCLtUPXolPOJBCNXuSn2+PiKY4UccV9HY0rTar1kL0wAXh7Xgw'),
+    ([13, 33, 11, 36], '/rest/app-chat/conversations/new', 'POST', 1, 0.999, '/w+iZJkueIIASiuQYVbZlhC0ky3iTSoRwLhYOFZPmVklK12SL4qX64z2e1woxlaJh/7////0JksvfcnneGYLPh2FX5L3/A'),
+    ([13, 33, 11, 36], '/rest/app-chat/conversations/new', 'POST', 55555555, 0.01, 'AvJfmWTThX/9t9ZtnKska+1JbtAfsNfsPUWlxauyZKTY1qBv0ndqFnELhqHVO6t0euG3TQHAUXhpyeNySKVrF/DT4SD1AQ'),
+    ([13, 33, 11, 36], '/rest/app-chat/conversations/0f1e/responses', 'POST', 12345678, None, 'APBdm2bRh33/tdRvnqkmae9LbNIdstXuP0enx6mwZqba1KJt0HVoFHMJhKPXOal2eE5hvACu3llmNBGOwwc8dWwidPQtAw'),
+    ([13, 33, 11, 36], '/rest/app-chat/conversations/0f1e/responses', 'POST', 98765432, 0.5, 'gHDdG+ZRB/1/NVTvHimm6W/L7FKdMlVuv8cnRykw5iZaVCLtUPXolPOJBCNXuSn2+PiKY4Wb48R0Ztw3fcQl46MuI2Sggw'),
+    ([13, 33, 11, 36], '/rest/app-chat/conversations/0f1e/responses', 'POST', 1, 0.999, '/w+iZJkueIIASiuQYVbZlhC0ky3iTSoRwLhYOFZPmVklK12SL4qX64z2e1woxlaJh/7///8H5cPRSdMt0m6a23uJf9pX/A'),
+    ([13, 33, 11, 36], '/rest/app-chat/conversations/0f1e/responses', 'POST', 55555555, 0.01, 'AvJfmWTThX/9t9ZtnKska+1JbtAfsNfsPUWlxauyZKTY1qBv0ndqFnELhqHVO6t0euG3TQGM6fO4og3eMcP7GREKlEHOAQ'),
+    ([0, 37, 0, 45], '/rest/app-chat/conversations/new', 'POST', 12345678, None, 'APBdm2bRh33/tdRvnqkmae9LbNIdstXuP0enx6mwZqba1KJt0HVoFHMJhKPXOal2eE5hvAAHDopYXZcFsUiFEspWELrkAw'),
+    ([0, 37, 0, 45], '/rest/app-chat/conversations/new', 'POST', 98765432, 0.5, 'gHDdG+ZRB/1/NVTvHimm6W/L7FKdMlVuv8cnRykw5iZaVCLtUPXolPOJBCNXuSn2+PiKY4VpNAHzzC+ptIU7keWYla0dgw'),
+    ([0, 37, 0, 45], '/rest/app-chat/conversations/new', 'POST', 1, 0.999, '/w+iZJkueIIASiuQYVbZlhC0ky3iTSoRwLhYOFZPmVklK12SL4qX64z2e1woxlaJh/7///9McFFMDLEemHW9xWKiWAJu/A'),
+    ([0, 37, 0, 45], '/rest/app-chat/conversations/new', 'POST', 55555555, 0.01, 'AvJfmWTThX/9t9ZtnKska+1JbtAfsNfsPUWlxauyZKTY1qBv0ndqFnELhqHVO6t0euG3TQGFmRGFkwYl52P/72LMy3evAQ'),
+    ([0, 37, 0, 45], '/rest/app-chat/conversations/0f1e/responses', 'POST', 12345678, None, 'APBdm2bRh33/tdRvnqkmae9LbNIdstXuP0enx6mwZqba1KJt0HVoFHMJhKPXOal2eE5hvAAU6iXeF51aVT0tkfTe97m1Aw'),
+    ([0, 37, 0, 45], '/rest/app-chat/conversations/0f1e/responses', 'POST', 98765432, 0.5, 'gHDdG+ZRB/1/NVTvHimm6W/L7FKdMlVuv8cnRykw5iZaVCLtUPXolPOJBCNXuSn2+PiKY4XqtwXd/xsRBnMW+WcWI0YIgw'),
+    ([0, 37, 0, 45], '/rest/app-chat/conversations/0f1e/responses', 'POST', 1, 0.999, '/w+iZJkueIIASiuQYVbZlhC0ky3iTSoRwLhYOFZPmVklK12SL4qX64z2e1woxlaJh/7///9T58Mf3tNzyMMsWN52Dhv8/A'),
+    ([0, 37, 0, 45], '/rest/app-chat/conversations/0f1e/responses', 'POST', 55555555, 0.01, 'AvJfmWTThX/9t9ZtnKska+1JbtAfsNfsPUWlxauyZKTY1qBv0ndqFnELhqHVO6t0euG3TQFz5NeLSo0lHSf7svoRjtEjAQ'),
+]
+
+class TestSignatureGoldenVectors(unittest.TestCase):
+
+    def test_generate_sign(self):
+        for x_values, path, method, time_n, random_float, expected in GOLDEN:
+            with self.subTest(x_values=x_values, path=path, time_n=time_n, random_float=random_float):
+                self.assertEqual(Signature.generate_sign(path, method, VERIFICATION, SVG, x_values, time_n, random_float), expected)
+
+    def test_prepared_signer(self):
+        signers = {}
+        for x_values, path, method, time_n, random_float, expected in GOLDEN:
+            # One signer per session, reused across requests
+            signer = signers.setdefault(tuple(x_values), PreparedSigner(VERIFICATION, SVG, x_values))
+            with self.subTest(x_values=x_values, path=path, time_n=time_n, random_float=random_float):
+                self.assertEqual(signer.sign(path, method, time_n, random_float), expected)
+
+    def test_prepared_signer_caches_session_values(self):
+        signer = PreparedSigner(VERIFICATION, SVG, GOLDEN[0][0])
+        self.assertEqual(signer.xs, Signature.xs(signer.verification_bytes, SVG, GOLDEN[0][0]))
+        # Without random_float the prefix byte is 0 and the payload is not masked
+        self.assertTrue(signer.sign('/p', 'POST', 1).startswith('AP'))
+
+def reference_cubic_bezier_eased(t: float, x1: float, y1: float, x2: float, y2: float) -> float:
+    # Signature.cubicBezierEased before memoization and the early exit
+    def bezier(u: float):
+        omu = 1.0 - u
+        b1 = 3.0 * omu * omu * u
+        b2 = 3.0 * omu * u * u
+        b3 = u * u * u
+        x = b1 * x1 + b2 * x2 + b3
+        y = b1 * y1 + b2 * y2 + b3
+        return x, y
+
+    lo, hi = 0.0, 1.0
+    for _ in range(80):
+        mid = 0.5 * (lo + hi)
+        if bezier(mid)[0] < t:
+            lo = mid
+        else:
+            hi = mid
+    u = 0.5 * (lo + hi)
+    return bezier(u)[1]
+
+# Every input simulateStyle can produce: t from c (a product of three nibbles,
+# rounded to tens), x control points from bytes scaled to 0..1 and y control
+# points from bytes scaled to -1..1, all rounded to two decimals
+DOMAIN_T = sorted({round(a * b * c / 10.0) * 10 / 4096 for a in range(16) for b in range(16) for c in range(16)})
+DOMAIN_X = sorted({Signature._h(v, 0, 1, False) for v in range(256)})
+DOMAIN_Y = sorted({Signature._h(v, -1, 1, False) for v in range(256)})
+
+class TestCubicBezierEased(unittest.TestCase):
+
+    def assert_domain_identical(self, x1_values: list) -> None:
+        # u only depends on (t, x1, x2); y1 and y2 are cycled through their domain
+        count = 0
+        for x1 in x1_values:
+            for x2 in DOMAIN_X:
+                for t in DOMAIN_T:
+                    y1 = DOMAIN_Y[count % len(DOMAIN_Y)]
+                    y2 = DOMAIN_Y[(count * 7) % len(DOMAIN_Y)]
+                    expected = reference_cubic_bezier_eased(t, x1, y1, x2, y2)
+                    actual = Signature.cubicBezierEased(t, x1, y1, x2, y2)
+                    if actual != expected:
+                        self.fail(f"t={t} x1={x1} y1={y1} x2={x2} y2={y2}: {actual!r} != {expected!r}")
+                    count += 1
+
+    def test_domain_size(self):
+        self.assertEqual((len(DOMAIN_T), len(DOMAIN_X), len(DOMAIN_Y)), (180, 101, 201))
+
+    def test_sampled_domain(self):
+        # Every t and x2 against a spread of x1 values, a few seconds
+        self.assert_domain_identical(DOMAIN_X[::25])
+
+    def test_prepared_signer_sampled_grid(self):
+        # Always on: PreparedSigner over a fixed grid of x values, against the
+        # same signer running the reference curve. Each x value combination
+        # picks a different svg row and t for simulateStyle
+        grid = range(0, 48, 7)
+        x_grid = [[a, b, c, d] for a in grid for b in grid for c in grid for d in grid[::2]]
+        with mock.patch.object(Signature, 'cubicBezierEased', staticmethod(reference_cubic_bezier_eased)):
+            expected = [PreparedSigner(VERIFICATION, SVG, x_values).xs for x_values in x_grid]
+        for x_values, xs in zip(x_grid, expected):
+            actual = PreparedSigner(VERIFICATION, SVG, x_values)
+            if actual.xs != xs:
+                self.fail(f"x_values={x_values}: {actual.xs!r} != {xs!r}")
+
+    @unittest.skipUnless(os.getenv('GROK_EXHAUSTIVE_TESTS'), "set GROK_EXHAUSTIVE_TESTS=1 to check all 1.8M (t, x1, x2) inputs")
+    def test_exhaustive_domain(self):
+        self.assert_domain_identical(DOMAIN_X)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import sqlite3
+import tempfile
+from pathlib import Path
+from core.sqlite_store import SQLiteStore
+from core.bootstrap_cache import BootstrapCache
+from core.identity_store import IdentityStore
+from core.reverse.mappings import MappingStore
+
+class CounterStore(SQLiteStore):
+
+    TABLES: tuple = ("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",)
+
+    def value(self, name: str) -> int:
+        row = self.run(lambda conn: conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone())
+        return row[0] if row else None
+
+class TestSQLiteStore(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_path = Path(tmp.name) / 'cache' / 'grok.db'
+        self.store = CounterStore(self.db_path)
+
+    def test_schema_created_on_first_use(self):
+        self.assertFalse(self.db_path.exists())
+        self.assertIsNone(self.store.value('a'))
+        with sqlite3.connect(self.db_path) as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+
+    def test_transaction_commits_and_rolls_back(self):
+        with self.store.transaction(immediate=True) as conn:
+            conn.execute("INSERT INTO counters VALUES ('a', 1)")
+        with self.assertRaises(ZeroDivisionError):
+            with self.store.transaction() as conn:
+                conn.execute("UPDATE counters SET value = 2 WHERE name = 'a'")
+                1 / 0
+        self.assertEqual(self.store.value('a'), 1)
+
+    def test_sqlite_errors_return_the_default(self):
+        self.assertEqual(self.store.run(lambda conn: conn.execute("SELECT * FROM missing"), default='fallback'), 'fallback')
+        self.store.db_path = Path(self.db_path.parent) / 'missing' / 'grok.db'
+        self.assertEqual(self.store.run(lambda conn: 1, default=0), 0)
+
+    def test_stores_share_one_database(self):
+        cache = BootstrapCache(self.db_path, ttl=900)
+        identities = IdentityStore(self.db_path, ttl=3600, max_uses=3)
+        mappings = MappingStore(self.db_path, seed_dir=self.db_path.parent)
+        cache.put({'actions': ['a'], 'xsid_script': 'x', 'baggage': 'b', 'sentry_trace': 's'})
+        identities.put('anon-1', 'key-1', {})
+        mappings.add_numbers('https://grok.com/_next/a.js', [1, 2])
+        self.store.run(lambda conn: conn.execute("INSERT INTO counters VALUES ('a', 1)"))
+
+        with sqlite3.connect(self.db_path) as conn:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertEqual(tables, {'artifacts', 'identities', 'txid', 'grok', 'mapping_seeds', 'counters'})
+        self.assertEqual(cache.get()['actions'], ['a'])
+        self.assertEqual(identities.checkout()['anon_user'], 'anon-1')
+        self.assertEqual(MappingStore(self.db_path, seed_dir=self.db_path.parent).get_numbers('https://grok.com/_next/a.js'), [1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
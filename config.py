@@ -1,19 +1,78 @@
 import os
 from dotenv import load_dotenv
 
-load_dotenv()
-
 class Config:
-    PIXAZO_API_KEY = os.getenv("PIXAZO_API_KEY")
-    LOG_FILE = os.getenv("LOG_FILE", "logs/mcp_errors.log")
-    PIXAZO_CURRENT_MODEL_URL = os.getenv("PIXAZO_CURRENT_MODEL_URL", "https://gateway.pixazo.ai/getImage/v1/getSDXLImage")
+    """
+    Server settings. Importing this module only reads the process
+    environment; initialize() calls load() to read the .env file as well, so
+    nothing touches the disk before the first tool call or server start.
+    """
     DATABASE_PATH = "data/metadata.db"
     GENERATED_IMAGES_DIR = "data/generated"
+    CACHE_DIR = "data/cache"
     PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
     
-    # Generation defaults from environment variables
-    DEFAULT_WIDTH = int(os.getenv("PIXAZO_DEFAULT_WIDTH", "768"))
-    DEFAULT_HEIGHT = int(os.getenv("PIXAZO_DEFAULT_HEIGHT", "1024"))
-    DEFAULT_NUM_STEPS = int(os.getenv("PIXAZO_DEFAULT_NUM_STEPS", "20"))
-    DEFAULT_GUIDANCE_SCALE = int(os.getenv("PIXAZO_DEFAULT_GUIDANCE", "8"))  # Minimum of 7
-    DEFAULT_SEED = int(os.getenv("PIXAZO_DEFAULT_SEED", "-1"))
+    # Image download engine read sizes
+    DOWNLOAD_MIN_CHUNK = 64 * 1024
+    DOWNLOAD_MAX_CHUNK = 1024 * 1024
+    
+    @classmethod
+    def load(cls, dotenv: bool = True):
+        """
+        Read the settings from the environment.
+        
+        Args:
+            dotenv (bool): Load the .env file into the environment first
+        """
+        if dotenv:
+            load_dotenv()
+        
+        cls.PIXAZO_API_KEY = os.getenv("PIXAZO_API_KEY")
+        cls.LOG_FILE = os.getenv("LOG_FILE", "logs/mcp_errors.log")
+        cls.PIXAZO_CURRENT_MODEL_URL = os.getenv("PIXAZO_CURRENT_MODEL_URL", "https://gateway.pixazo.ai/getImage/v1/getSDXLImage")
+
+        # Generation defaults from environment variables
+        cls.DEFAULT_WIDTH = int(os.getenv("PIXAZO_DEFAULT_WIDTH", "768"))
+        cls.DEFAULT_HEIGHT = int(os.getenv("PIXAZO_DEFAULT_HEIGHT", "1024"))
+        cls.DEFAULT_NUM_STEPS = int(os.getenv("PIXAZO_DEFAULT_NUM_STEPS", "20"))
+        cls.DEFAULT_GUIDANCE_SCALE = int(os.getenv("PIXAZO_DEFAULT_GUIDANCE", "8"))  # Minimum of 7
+        cls.DEFAULT_SEED = int(os.getenv("PIXAZO_DEFAULT_SEED", "-1"))
+
+        # Pixazo HTTP client settings
+        cls.MAX_CONCURRENT_GENERATIONS = int(os.getenv("PIXAZO_MAX_CONCURRENCY", "4"))
+        cls.HTTP_MAX_CONNECTIONS = int(os.getenv("PIXAZO_HTTP_MAX_CONNECTIONS", "10"))
+        cls.HTTP_KEEPALIVE_EXPIRY = float(os.getenv("PIXAZO_HTTP_KEEPALIVE_EXPIRY", "30"))
+        cls.HTTP_TIMEOUT = float(os.getenv("PIXAZO_HTTP_TIMEOUT", "120"))
+
+        # pix_generate_batch limits
+        cls.BATCH_CONCURRENCY = int(os.getenv("PIXAZO_BATCH_CONCURRENCY", "4"))
+        cls.BATCH_MAX_ITEMS = int(os.getenv("PIXAZO_BATCH_MAX_ITEMS", "64"))
+
+        # Metadata writer batching
+        cls.DB_BATCH_SIZE = int(os.getenv("PIXAZO_DB_BATCH_SIZE", "100"))
+        cls.DB_FLUSH_INTERVAL = float(os.getenv("PIXAZO_DB_FLUSH_INTERVAL", "0.05"))
+
+        # Result cache for fixed-seed generations
+        cls.CACHE_ENABLED = os.getenv("PIXAZO_CACHE_ENABLED", "true").lower() == "true"
+        cls.CACHE_MAX_BYTES = int(os.getenv("PIXAZO_CACHE_MAX_MB", "1024")) * 1024 * 1024
+
+        # Image download engine
+        cls.DOWNLOAD_TIMEOUT = float(os.getenv("PIXAZO_DOWNLOAD_TIMEOUT", "30"))
+        cls.DOWNLOAD_MAX_RETRIES = int(os.getenv("PIXAZO_DOWNLOAD_MAX_RETRIES", "5"))
+        cls.DOWNLOAD_BACKOFF_BASE = float(os.getenv("PIXAZO_DOWNLOAD_BACKOFF_BASE", "0.5"))
+        cls.DOWNLOAD_BACKOFF_MAX = float(os.getenv("PIXAZO_DOWNLOAD_BACKOFF_MAX", "8"))
+
+        # Startup budget checked by --profile-startup
+        cls.STARTUP_BUDGET_MS = int(os.getenv("PIXAZO_STARTUP_BUDGET_MS", "1500"))
+
+        # Asynchronous job mode (pix_submit)
+        cls.JOB_WORKERS = int(os.getenv("PIXAZO_JOB_WORKERS", "2"))
+
+        # Pacing and retries for Pixazo API calls
+        cls.PIXAZO_RATE_LIMIT = float(os.getenv("PIXAZO_RATE_LIMIT", "2"))  # Requests per second, 0 for no limit
+        cls.PIXAZO_RATE_BURST = int(os.getenv("PIXAZO_RATE_BURST", "4"))
+        cls.PIXAZO_MAX_RETRIES = int(os.getenv("PIXAZO_MAX_RETRIES", "3"))
+        cls.PIXAZO_RETRY_BACKOFF_BASE = float(os.getenv("PIXAZO_RETRY_BACKOFF_BASE", "1"))
+        cls.PIXAZO_RETRY_BACKOFF_MAX = float(os.getenv("PIXAZO_RETRY_BACKOFF_MAX", "30"))
+
+Config.load(dotenv=False)
@@ -1,50 +1,313 @@
 import sqlite3
 import json
+import base64
+import os
+import sys
+import time
+import queue
+import atexit
+import threading
 from datetime import datetime
 from config import Config
 
+# Pragmas applied to every connection. WAL lets readers run while the writer
+# commits, and synchronous=NORMAL skips the fsync on each commit in WAL mode.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Bump whenever SCHEMA_STATEMENTS changes, so existing databases rerun them
+SCHEMA_VERSION = 3
+
+SCHEMA_STATEMENTS = (
+    '''
+    CREATE TABLE IF NOT EXISTS generations (
+        id INTEGER PRIMARY KEY,
+        timestamp TEXT NOT NULL,
+        prompt TEXT NOT NULL,
+        parameters_json TEXT,
+        image_url TEXT,
+        status TEXT NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS result_cache (
+        cache_key TEXT PRIMARY KEY,
+        file_path TEXT NOT NULL,
+        size_bytes INTEGER NOT NULL,
+        created_at TEXT NOT NULL,
+        last_access REAL NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS cache_stats (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        status TEXT NOT NULL,
+        arguments_json TEXT NOT NULL,
+        result_json TEXT
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_generations_timestamp ON generations (timestamp, id)",
+    "CREATE INDEX IF NOT EXISTS idx_generations_status ON generations (status, timestamp, id)",
+)
+
+# Full-text index over generation prompts, kept in sync by triggers. Applied
+# separately because some SQLite builds ship without FTS5.
+FTS_SCHEMA_STATEMENTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS generations_fts USING fts5(prompt, content='generations', content_rowid='id')",
+    '''
+    CREATE TRIGGER IF NOT EXISTS generations_fts_insert AFTER INSERT ON generations BEGIN
+        INSERT INTO generations_fts (rowid, prompt) VALUES (new.id, new.prompt);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS generations_fts_delete AFTER DELETE ON generations BEGIN
+        INSERT INTO generations_fts (generations_fts, rowid, prompt) VALUES ('delete', old.id, old.prompt);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS generations_fts_update AFTER UPDATE OF prompt ON generations BEGIN
+        INSERT INTO generations_fts (generations_fts, rowid, prompt) VALUES ('delete', old.id, old.prompt);
+        INSERT INTO generations_fts (rowid, prompt) VALUES (new.id, new.prompt);
+    END
+    ''',
+    # Index rows written before the FTS table existed
+    "INSERT INTO generations_fts (generations_fts) VALUES ('rebuild')",
+)
+
+def connect(db_path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Open a SQLite connection with the tuned pragmas applied.
+
+    Args:
+        db_path (str): Path to the SQLite database file
+        check_same_thread (bool): Passed through to sqlite3.connect
+
+    Returns:
+        sqlite3.Connection: Configured connection
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def ensure_schema(conn: sqlite3.Connection):
+    """
+    Create all tables used by the MCP server if they do not exist yet.
+
+    The schema version is stored in PRAGMA user_version, so an up-to-date
+    database costs a single pragma read instead of the full set of DDL statements.
+
+    Args:
+        conn (sqlite3.Connection): Open connection to the metadata database
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return
+
+    with conn:
+        for statement in SCHEMA_STATEMENTS:
+            conn.execute(statement)
+        try:
+            for statement in FTS_SCHEMA_STATEMENTS:
+                conn.execute(statement)
+        except sqlite3.OperationalError as e:
+            print(f"Full-text prompt search unavailable, falling back to LIKE: {e}", file=sys.stderr)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+class MetadataWriter:
+    """
+    Long-lived writer that owns one connection to the metadata database.
+
+    Write statements are queued from any thread and applied by a background
+    thread, which groups everything queued within Config.DB_FLUSH_INTERVAL
+    (up to Config.DB_BATCH_SIZE statements) into a single transaction.
+    """
+
+    _STOP = object()
+
+    def __init__(self, db_path: str, batch_size: int = None, flush_interval: float = None):
+        """
+        Open the connection, create the schema and start the writer thread.
+
+        Args:
+            db_path (str): Path to the SQLite database file
+            batch_size (int): Maximum statements per transaction
+            flush_interval (float): Seconds to wait for more statements before committing
+        """
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self.db_path = db_path
+        self.batch_size = batch_size or Config.DB_BATCH_SIZE
+        self.flush_interval = Config.DB_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self._queue = queue.Queue()
+        self._closed = False
+
+        # The connection is created here but only used by the writer thread afterwards
+        self._conn = connect(db_path, check_same_thread=False)
+        ensure_schema(self._conn)
+
+        self._thread = threading.Thread(target=self._run, name="metadata-writer", daemon=True)
+        self._thread.start()
+
+    def execute(self, sql: str, params: tuple = ()):
+        """
+        Queue a write statement for the next batch.
+
+        Args:
+            sql (str): SQL statement to execute
+            params (tuple): Statement parameters
+
+        Raises:
+            RuntimeError: If the writer has been closed
+        """
+        if self._closed:
+            raise RuntimeError(f"Metadata writer for {self.db_path} is closed")
+        self._queue.put((sql, params))
+
+    def flush(self):
+        """Block until every queued statement has been committed."""
+        self._queue.join()
+
+    def close(self):
+        """Commit everything still queued, stop the writer thread and close the connection."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._thread.join()
+        self._conn.close()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+
+            # Collect whatever else arrives before the deadline into the same transaction
+            while batch[-1] is not self._STOP and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            statements = [item for item in batch if item is not self._STOP]
+            if statements:
+                self._write_batch(statements)
+
+            for _ in batch:
+                self._queue.task_done()
+
+            if batch[-1] is self._STOP:
+                break
+
+    def _write_batch(self, statements: list):
+        try:
+            with self._conn:
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+        except Exception as e:
+            # Retry one by one so a single bad statement does not drop the whole batch
+            print(f"Error writing metadata batch, retrying individually: {e}", file=sys.stderr)
+            for sql, params in statements:
+                try:
+                    with self._conn:
+                        self._conn.execute(sql, params)
+                except Exception as e:
+                    print(f"Error saving metadata: {e}", file=sys.stderr)
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+def get_writer(db_path: str = None) -> MetadataWriter:
+    """
+    Return the shared writer for a database, creating it on first use.
+
+    Args:
+        db_path (str): Path to the SQLite database file. If None, uses Config.DATABASE_PATH.
+
+    Returns:
+        MetadataWriter: Writer bound to db_path
+    """
+    if db_path is None:
+        db_path = Config.DATABASE_PATH
+
+    db_path = os.path.abspath(db_path)
+    with _writers_lock:
+        writer = _writers.get(db_path)
+        if writer is None:
+            writer = MetadataWriter(db_path)
+            _writers[db_path] = writer
+        return writer
+
+def flush_metadata(db_path: str = None):
+    """
+    Block until queued metadata writes are committed.
+
+    Args:
+        db_path (str): Database to flush. If None, flushes every open writer.
+    """
+    if db_path is not None:
+        get_writer(db_path).flush()
+        return
+
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.flush()
+
+def close_writers():
+    """Flush and close every open writer. Called on shutdown."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
+
+atexit.register(close_writers)
+
 def initialize_db(db_path: str = None):
     """
     Initialize the SQLite database and create the generations table.
-    
+
+    Opens the long-lived writer for the database, which creates the schema
+    on the same connection that later handles inserts.
+
     Args:
         db_path (str): Path to the SQLite database file. If None, uses Config.DATABASE_PATH.
     """
     if db_path is None:
         db_path = Config.DATABASE_PATH
-    
+
     try:
-        # Ensure the directory exists
-        import os
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Create the generations table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS generations (
-                id INTEGER PRIMARY KEY,
-                timestamp TEXT NOT NULL,
-                prompt TEXT NOT NULL,
-                parameters_json TEXT,
-                image_url TEXT,
-                status TEXT NOT NULL
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-        print(f"Database initialized successfully at {db_path}")
-        
+        get_writer(db_path)
+        print(f"Database initialized successfully at {db_path}", file=sys.stderr)
+
     except Exception as e:
-        print(f"Error initializing database: {e}")
+        print(f"Error initializing database: {e}", file=sys.stderr)
         raise
 
 def save_metadata(db_path: str, data: dict):
     """
-    Save generation metadata to the database.
-    
+    Queue generation metadata for the database writer.
+
+    The row is committed in the background together with other pending
+    rows; call flush_metadata() when it must be visible to readers.
+
     Args:
         db_path (str): Path to the SQLite database file
         data (dict): Dictionary containing metadata with keys:
@@ -55,16 +318,13 @@ def save_metadata(db_path: str, data: dict):
             - status: str
     """
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
         # Convert parameters to JSON string if it's a dict
         parameters_json = data.get('parameters_json', {})
         if isinstance(parameters_json, dict):
             parameters_json = json.dumps(parameters_json)
-        
-        # Insert the metadata
-        cursor.execute('''
+
+        # Queue the insert
+        get_writer(db_path).execute('''
             INSERT INTO generations (timestamp, prompt, parameters_json, image_url, status)
             VALUES (?, ?, ?, ?, ?)
         ''', (
@@ -74,14 +334,201 @@ def save_metadata(db_path: str, data: dict):
             data.get('image_url'),
             data['status']
         ))
-        
-        conn.commit()
-        conn.close()
-        
+
     except Exception as e:
-        print(f"Error saving metadata: {e}")
+        print(f"Error saving metadata: {e}", file=sys.stderr)
         raise
 
+def save_job(db_path: str, job: dict):
+    """
+    Queue an insert or update of an asynchronous generation job.
+
+    Args:
+        db_path (str): Path to the SQLite database file
+        job (dict): Job with keys id, created_at, updated_at, status, arguments and result
+    """
+    result = job.get('result')
+    get_writer(db_path).execute('''
+        INSERT OR REPLACE INTO jobs (id, created_at, updated_at, status, arguments_json, result_json)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (
+        job['id'],
+        job['created_at'],
+        job['updated_at'],
+        job['status'],
+        json.dumps(job['arguments']),
+        json.dumps(result) if result is not None else None
+    ))
+
+def _job_from_row(row: tuple) -> dict:
+    job_id, created_at, updated_at, status, arguments_json, result_json = row
+    return {
+        'id': job_id,
+        'status': status,
+        'created_at': created_at,
+        'updated_at': updated_at,
+        'arguments': json.loads(arguments_json),
+        'result': json.loads(result_json) if result_json else None,
+    }
+
+def load_job(db_path: str, job_id: str):
+    """
+    Read a job from the database, after committing any queued writes.
+
+    Args:
+        db_path (str): Path to the SQLite database file
+        job_id (str): Job id
+
+    Returns:
+        dict or None: The job, or None if it does not exist
+    """
+    get_writer(db_path).flush()
+
+    conn = connect(db_path)
+    try:
+        row = conn.execute('''
+            SELECT id, created_at, updated_at, status, arguments_json, result_json
+            FROM jobs WHERE id = ?
+        ''', (job_id,)).fetchone()
+    finally:
+        conn.close()
+
+    return _job_from_row(row) if row else None
+
+def load_unfinished_jobs(db_path: str) -> list:
+    """
+    Read every job that is still queued or running, oldest first.
+
+    Args:
+        db_path (str): Path to the SQLite database file
+
+    Returns:
+        list[dict]: Unfinished jobs
+    """
+    get_writer(db_path).flush()
+
+    conn = connect(db_path)
+    try:
+        rows = conn.execute('''
+            SELECT id, created_at, updated_at, status, arguments_json, result_json
+            FROM jobs WHERE status IN ('QUEUED', 'RUNNING') ORDER BY created_at
+        ''').fetchall()
+    finally:
+        conn.close()
+
+    return [_job_from_row(row) for row in rows]
+
+def _encode_cursor(timestamp: str, row_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([timestamp, row_id]).encode()).decode()
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(timestamp), int(row_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+def query_generations(db_path: str, status: str = None, since: str = None, until: str = None,
+                      parameters: dict = None, search: str = None, limit: int = 20, cursor: str = None) -> dict:
+    """
+    Query generation history, newest first, with keyset pagination.
+
+    Args:
+        db_path (str): Path to the SQLite database file
+        status (str): Only rows with this status (e.g. SUCCESS, HTTP_429)
+        since (str): Only rows with timestamp >= since (ISO date or timestamp)
+        until (str): Only rows with timestamp <= until (ISO date or timestamp, a date covers the whole day)
+        parameters (dict): Only rows whose stored parameters_json has these values (e.g. {"seed": 42})
+        search (str): Full-text query over prompts (FTS5 syntax when available)
+        limit (int): Page size, capped at 200
+        cursor (str): next_cursor from the previous page
+
+    Returns:
+        dict: 'items' (list of generation dicts), 'has_more' (bool) and 'next_cursor' (str or None)
+
+    Raises:
+        ValueError: On an invalid cursor, parameter name or value, or search query
+    """
+    get_writer(db_path).flush()
+
+    limit = max(1, min(int(limit or 20), 200))
+    conditions = []
+    params = []
+
+    if status:
+        conditions.append("status = ?")
+        params.append(status)
+    if since:
+        conditions.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        conditions.append("timestamp <= ?")
+        # A bare date includes every timestamp on that day
+        params.append(f"{until}T99" if len(until) == 10 else until)
+    if parameters is not None and not isinstance(parameters, dict):
+        raise ValueError("'parameters' must be an object of parameter names and values")
+    for key, value in (parameters or {}).items():
+        if not key.replace("_", "").isalnum():
+            raise ValueError(f"Invalid parameter name: {key}")
+        if value is None:
+            # json_extract gives NULL for a missing key too, so match the stored type
+            conditions.append(f"json_type(parameters_json, '$.{key}') = 'null'")
+            continue
+        if not isinstance(value, (str, int, float, bool)):
+            raise ValueError(f"Parameter '{key}' must be a string, number, boolean or null")
+        conditions.append(f"json_extract(parameters_json, '$.{key}') = ?")
+        params.append(value)
+    if cursor:
+        conditions.append("(timestamp, id) < (?, ?)")
+        params.extend(_decode_cursor(cursor))
+
+    conn = connect(db_path)
+    try:
+        if search:
+            has_fts = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'generations_fts'"
+            ).fetchone()
+            if has_fts:
+                conditions.append("id IN (SELECT rowid FROM generations_fts WHERE generations_fts MATCH ?)")
+            else:
+                conditions.append("prompt LIKE '%' || ? || '%'")
+            params.append(search)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        try:
+            rows = conn.execute(f'''
+                SELECT id, timestamp, prompt, parameters_json, image_url, status
+                FROM generations {where}
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ?
+            ''', (*params, limit + 1)).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid history query: {e}")
+    finally:
+        conn.close()
+
+    items = []
+    for row_id, timestamp, prompt, parameters_json, image_url, row_status in rows[:limit]:
+        try:
+            parameters_value = json.loads(parameters_json) if parameters_json else {}
+        except json.JSONDecodeError:
+            parameters_value = parameters_json
+        items.append({
+            'id': row_id,
+            'timestamp': timestamp,
+            'prompt': prompt,
+            'parameters': parameters_value,
+            'image_url': image_url,
+            'status': row_status,
+        })
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = _encode_cursor(last['timestamp'], last['id'])
+
+    return {'items': items, 'has_more': next_cursor is not None, 'next_cursor': next_cursor}
+
 if __name__ == "__main__":
     # Initialize database when module is run directly
     initialize_db()
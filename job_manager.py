@@ -0,0 +1,140 @@
+import sys
+import uuid
+import asyncio
+from datetime import datetime
+from db_manager import save_job, load_job, load_unfinished_jobs
+
+class JobManager:
+    """
+    Queue of asynchronous generation jobs drained by a pool of worker tasks.
+
+    Every state change is written to the jobs table, so queued and running
+    jobs are picked up again after a server restart. Live jobs are also kept
+    in memory for cheap status polling.
+    """
+
+    def __init__(self, db_path: str, runner, workers: int):
+        """
+        Args:
+            db_path (str): Path to the metadata database
+            runner: Coroutine function called as runner(arguments, progress=callback) and
+                returning a result dict; the callback takes (progress, total, message)
+            workers (int): Number of worker tasks draining the queue
+        """
+        self.db_path = db_path
+        self.runner = runner
+        self.worker_count = max(1, workers)
+        self._jobs = {}
+        self._queue = None
+        self._workers = []
+
+    @property
+    def started(self) -> bool:
+        return self._queue is not None
+
+    async def start(self):
+        """Start the worker pool and requeue jobs left unfinished by a previous run."""
+        if self.started:
+            return
+        self._queue = asyncio.Queue()
+
+        unfinished = await asyncio.to_thread(load_unfinished_jobs, self.db_path)
+        for job in unfinished:
+            # A job that was running when the server stopped starts over
+            job['status'] = 'QUEUED'
+            self._jobs[job['id']] = job
+            self._queue.put_nowait(job['id'])
+        if unfinished:
+            print(f"Requeued {len(unfinished)} unfinished job(s)", file=sys.stderr)
+
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+
+    async def stop(self):
+        """Cancel the worker tasks. Unfinished jobs stay in the database for the next start."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    async def submit(self, arguments: dict) -> dict:
+        """
+        Persist and enqueue a new job.
+
+        Args:
+            arguments (dict): Arguments passed to the runner
+
+        Returns:
+            dict: The queued job
+        """
+        await self.start()
+
+        now = datetime.now().isoformat()
+        job = {
+            'id': uuid.uuid4().hex,
+            'status': 'QUEUED',
+            'created_at': now,
+            'updated_at': now,
+            'arguments': arguments,
+            'result': None,
+        }
+        self._jobs[job['id']] = job
+        save_job(self.db_path, job)
+        self._queue.put_nowait(job['id'])
+        return job
+
+    async def get(self, job_id: str):
+        """
+        Look up a job, falling back to the database for finished jobs and jobs from earlier runs.
+
+        Args:
+            job_id (str): Job id returned by submit
+
+        Returns:
+            dict or None: The job, with 'queue_position' set while it is queued
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return await asyncio.to_thread(load_job, self.db_path, job_id)
+
+        job = dict(job)
+        if job['status'] == 'QUEUED':
+            # Jobs are stored in submission order, so count the queued ones ahead of this one
+            position = 1
+            for other_id, other in self._jobs.items():
+                if other_id == job_id:
+                    break
+                if other['status'] == 'QUEUED':
+                    position += 1
+            job['queue_position'] = position
+        return job
+
+    def _progress_callback(self, job: dict):
+        # Progress is only kept in memory: it is cheap to lose and changes too often to persist
+        async def report(progress: float, total: float = None, message: str = None):
+            job['progress'] = {'progress': progress, 'total': total, 'message': message}
+        return report
+
+    def _update(self, job: dict, **changes):
+        job.update(changes, updated_at=datetime.now().isoformat())
+        save_job(self.db_path, job)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            try:
+                if job is None or job['status'] != 'QUEUED':
+                    continue
+                self._update(job, status='RUNNING')
+                try:
+                    result = await self.runner(job['arguments'], progress=self._progress_callback(job))
+                    self._update(job, status='COMPLETED', result=result)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self._update(job, status='FAILED', result={'status': 'EXCEPTION', 'message': f"Unexpected error: {e}"})
+                # Finished jobs are served from the database from now on
+                self._jobs.pop(job_id, None)
+            finally:
+                self._queue.task_done()
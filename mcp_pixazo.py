@@ -1,18 +1,30 @@
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 import mcp.server.stdio
 import mcp.types as types
 from mcp.server import Server
 from config import Config
 import os
 import sys
-import requests
+import asyncio
+import threading
+import httpx
 import json
 from datetime import datetime
-from db_manager import initialize_db, save_metadata
-from dotenv import load_dotenv
+import itertools
+from db_manager import initialize_db, save_metadata, close_writers, query_generations
+from result_cache import ResultCache, make_cache_key, is_cacheable
+from job_manager import JobManager
+from rate_limiter import AdaptiveRateLimiter, parse_retry_after
 import uuid
+import hashlib
 
-# Load environment variables from .env file
-load_dotenv()
+# Environment variables from .env are loaded by initialize(), not on import
+
+def log(message: str):
+    """Print a diagnostic message to stderr, keeping stdout free for the MCP stdio protocol."""
+    print(message, file=sys.stderr)
 
 # Determine project root path from command line arguments
 def get_project_root():
@@ -31,65 +43,263 @@ def get_project_root():
                     root_path = provided_path
                 else:
                     root_path = os.path.abspath(provided_path)
-                print(f"Using project root from --project-dir: {root_path}")
+                log(f"Using project root from --project-dir: {root_path}")
             else:
-                print("Warning: Found --project-dir flag but no path specified. Using script directory.")
+                log("Warning: Found --project-dir flag but no path specified. Using script directory.")
         except IndexError:
-            print("Warning: Found --project-dir flag but no path specified. Using script directory.")
+            log("Warning: Found --project-dir flag but no path specified. Using script directory.")
     
     return root_path
 
-# Set global project root
-GLOBAL_PROJECT_ROOT = get_project_root()
-print(f"Project root determined as: {GLOBAL_PROJECT_ROOT}")
+server = Server("MCP_PIXAZO")
 
-# Update config paths to use the global project root
-Config.DATABASE_PATH = os.path.join(GLOBAL_PROJECT_ROOT, "data", "metadata.db")
-Config.GENERATED_IMAGES_DIR = os.path.join(GLOBAL_PROJECT_ROOT, "data", "generated")
-Config.LOG_FILE = os.path.join(GLOBAL_PROJECT_ROOT, "logs", "mcp_errors.log")
+# Filled in by initialize(), which runs on the first tool call or when the server starts
+GLOBAL_PROJECT_ROOT = None
+GENERATED_IMAGES_DIR = None
+result_cache = None
+job_manager = None
 
-# Define absolute image storage path
-GENERATED_IMAGES_DIR = os.path.join(GLOBAL_PROJECT_ROOT, "data", "generated", "default")
+_initialized = False
+_initialize_lock = threading.Lock()
 
-# Ensure the directory structure exists
-os.makedirs(GENERATED_IMAGES_DIR, exist_ok=True)
+# Startup profiling (--profile-startup)
+PROFILE_STARTUP = "--profile-startup" in sys.argv
+_startup_timings = {}
 
-server = Server("MCP_PIXAZO")
+def report_startup_timing(name: str, started: float):
+    """
+    Record a startup phase duration and report it when --profile-startup is set.
+    
+    Args:
+        name (str): Phase name (import, initialize, first_list_tools)
+        started (float): time.perf_counter() value when the phase started
+    """
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    _startup_timings[name] = round(elapsed_ms, 1)
+    if PROFILE_STARTUP:
+        log(f"[startup] {name}: {elapsed_ms:.1f} ms")
+        if name == "first_list_tools" and elapsed_ms > Config.STARTUP_BUDGET_MS:
+            log(f"[startup] Warning: time to first list_tools exceeds the {Config.STARTUP_BUDGET_MS} ms budget")
 
-# Load API Key and validate environment
-PIXAZO_API_KEY = os.getenv("PIXAZO_API_KEY")
-if not PIXAZO_API_KEY:
-    print("Warning: PIXAZO_API_KEY environment variable not set. Tool registration will proceed but API calls will fail.")
+def initialize():
+    """
+    Resolve the project root, create the data directories and open the metadata database.
+    
+    Safe to call repeatedly and from several threads; the work runs only once.
+    """
+    global GLOBAL_PROJECT_ROOT, GENERATED_IMAGES_DIR, result_cache, job_manager, _initialized
+    
+    if _initialized:
+        return
+    
+    with _initialize_lock:
+        if _initialized:
+            return
+        started = time.perf_counter()
+        
+        # Read the .env file now that the server is actually starting
+        Config.load()
+        
+        # Set global project root
+        GLOBAL_PROJECT_ROOT = get_project_root()
+        log(f"Project root determined as: {GLOBAL_PROJECT_ROOT}")
+        
+        # Update config paths to use the global project root
+        Config.DATABASE_PATH = os.path.join(GLOBAL_PROJECT_ROOT, "data", "metadata.db")
+        Config.GENERATED_IMAGES_DIR = os.path.join(GLOBAL_PROJECT_ROOT, "data", "generated")
+        Config.CACHE_DIR = os.path.join(GLOBAL_PROJECT_ROOT, "data", "cache")
+        Config.LOG_FILE = os.path.join(GLOBAL_PROJECT_ROOT, "logs", "mcp_errors.log")
+        
+        # Define absolute image storage path
+        GENERATED_IMAGES_DIR = os.path.join(GLOBAL_PROJECT_ROOT, "data", "generated", "default")
+        
+        # Ensure the directory structure exists
+        os.makedirs(GENERATED_IMAGES_DIR, exist_ok=True)
+        
+        if not Config.PIXAZO_API_KEY:
+            log("Warning: PIXAZO_API_KEY environment variable not set. Tool registration will proceed but API calls will fail.")
+        
+        # Open the metadata database (the schema check is skipped when it is already current)
+        try:
+            initialize_db(Config.DATABASE_PATH)
+        except Exception as e:
+            log(f"Warning: Could not initialize database: {e}")
+        
+        # Cache of fixed-seed generations, keyed by the normalized request payload
+        result_cache = ResultCache(Config.DATABASE_PATH, Config.CACHE_DIR, Config.CACHE_MAX_BYTES)
+        
+        # Persistent queue behind pix_submit / pix_status / pix_result
+        job_manager = JobManager(Config.DATABASE_PATH, run_generation, Config.JOB_WORKERS)
+        
+        _initialized = True
+        report_startup_timing("initialize", started)
+
+async def ensure_initialized():
+    """
+    Run initialize() in a worker thread, so waiting on the initialization lock
+    (held while start_background_services() initializes) never blocks the loop.
+    """
+    if not _initialized:
+        await asyncio.to_thread(initialize)
 
-# Initialize database on startup
-try:
-    initialize_db(Config.DATABASE_PATH)
-except Exception as e:
-    print(f"Warning: Could not initialize database: {e}")
+# Shared HTTP client and concurrency cap, created lazily inside the running event loop
+_http_client = None
+_generation_semaphore = None
 
-def download_image(image_url: str, save_path: str) -> bool:
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared async HTTP client used for Pixazo calls and image downloads.
+    
+    The client keeps connections alive between tool calls, so consecutive
+    generations reuse the same TLS connection to the gateway.
+    
+    Returns:
+        httpx.AsyncClient: Pooled keep-alive client
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(Config.HTTP_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=Config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=Config.HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _http_client
+
+def get_generation_semaphore() -> asyncio.Semaphore:
+    """
+    Return the semaphore that caps how many generations run at once.
+    
+    Returns:
+        asyncio.Semaphore: Semaphore sized by Config.MAX_CONCURRENT_GENERATIONS
+    """
+    global _generation_semaphore
+    if _generation_semaphore is None:
+        _generation_semaphore = asyncio.Semaphore(max(1, Config.MAX_CONCURRENT_GENERATIONS))
+    return _generation_semaphore
+
+async def close_http_client():
+    """Close the shared HTTP client and drop its pooled connections."""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
+class IncompleteDownload(Exception):
+    """Raised when a response body ends before the advertised size was received."""
+
+def _download_chunk_size(expected_size: int = None) -> int:
+    """
+    Pick a read size for a download: about an eighth of the body, clamped
+    between Config.DOWNLOAD_MIN_CHUNK and Config.DOWNLOAD_MAX_CHUNK.
+    """
+    if not expected_size:
+        return Config.DOWNLOAD_MAX_CHUNK
+    return max(Config.DOWNLOAD_MIN_CHUNK, min(Config.DOWNLOAD_MAX_CHUNK, expected_size // 8))
+
+def _download_expected_size(response: httpx.Response, offset: int):
+    """
+    Return the full body size advertised by a (possibly partial) response,
+    or None when it is unknown or the body is content-encoded.
+    """
+    if response.headers.get('Content-Encoding', 'identity') != 'identity':
+        return None
+    content_range = response.headers.get('Content-Range', '')
+    if response.status_code == 206 and '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        return int(total) if total.isdigit() else None
+    content_length = response.headers.get('Content-Length')
+    if content_length and content_length.isdigit():
+        return offset + int(content_length)
+    return None
+
+def _remove_partial_download(temp_path: str):
+    try:
+        os.remove(temp_path)
+    except OSError:
+        pass
+
+async def download_image(image_url: str, save_path: str, progress=None):
     """
     Download image from remote URL and save locally.
     
+    The body is streamed into '<save_path>.part' and hashed as it arrives.
+    After a dropped connection or a short body the download is retried with
+    bounded exponential backoff, resuming from the bytes already on disk with
+    an HTTP Range request. The temp file is renamed into place only once the
+    full advertised size has been received, so save_path never holds a
+    truncated image.
+    
     Args:
         image_url (str): URL of the image to download
         save_path (str): Local path to save the image
+        progress: Optional coroutine function called as progress(received, expected_size)
+            after every chunk; expected_size is None when the server does not advertise it
     
     Returns:
-        bool: True if download successful, False otherwise
+        str or None: SHA-256 hex digest of the image if download successful, None otherwise
+    
+    Raises:
+        asyncio.CancelledError: If the caller is cancelled; the partial file is removed first
     """
+    temp_path = f"{save_path}.part"
+    timeout = httpx.Timeout(Config.DOWNLOAD_TIMEOUT, connect=Config.DOWNLOAD_TIMEOUT)
+    
     try:
-        response = requests.get(image_url, stream=True)
-        response.raise_for_status()
+        client = get_http_client()
+        hasher = hashlib.sha256()
+        received = 0
         
-        with open(save_path, 'wb') as file:
-            for chunk in response.iter_content(chunk_size=8192):
-                file.write(chunk)
+        with open(temp_path, 'wb') as file:
+            for attempt in range(Config.DOWNLOAD_MAX_RETRIES + 1):
+                headers = {'Range': f'bytes={received}-'} if received else {}
+                try:
+                    async with client.stream("GET", image_url, headers=headers, timeout=timeout) as response:
+                        if received and response.status_code != 206:
+                            # Server ignored or rejected the Range request, start over
+                            file.seek(0)
+                            file.truncate()
+                            hasher = hashlib.sha256()
+                            received = 0
+                            if response.status_code == 416:
+                                raise IncompleteDownload("Range not satisfiable, restarting download")
+                        response.raise_for_status()
+                        
+                        expected_size = _download_expected_size(response, received)
+                        async for chunk in response.aiter_bytes(chunk_size=_download_chunk_size(expected_size)):
+                            file.write(chunk)
+                            hasher.update(chunk)
+                            received += len(chunk)
+                            if progress is not None:
+                                await progress(received, expected_size)
+                    
+                    if expected_size is not None and received != expected_size:
+                        raise IncompleteDownload(f"Received {received} of {expected_size} bytes")
+                    break
+                
+                except (httpx.TransportError, httpx.HTTPStatusError, IncompleteDownload) as e:
+                    retryable = not isinstance(e, httpx.HTTPStatusError) or e.response.status_code in (408, 429) or e.response.status_code >= 500
+                    if not retryable or attempt == Config.DOWNLOAD_MAX_RETRIES:
+                        raise
+                    
+                    file.flush()
+                    delay = min(Config.DOWNLOAD_BACKOFF_MAX, Config.DOWNLOAD_BACKOFF_BASE * (2 ** attempt))
+                    log(f"Download interrupted at {received} bytes ({e}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
         
-        return True
+        # Only a complete body reaches the final path
+        os.replace(temp_path, save_path)
+        return hasher.hexdigest()
+    except asyncio.CancelledError:
+        # Closing the stream above already aborted the request, drop what we have
+        _remove_partial_download(temp_path)
+        raise
     except Exception as e:
-        print(f"Error downloading image: {e}")
-        return False
+        log(f"Error downloading image: {e}")
+        _remove_partial_download(temp_path)
+        return None
 
 def get_generation_defaults() -> dict:
     """
@@ -106,8 +316,65 @@ def get_generation_defaults() -> dict:
         "seed": Config.DEFAULT_SEED
     }
 
+# Input schema shared by pix_generate and pix_submit
+GENERATION_INPUT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "prompt": {"type": "string", "description": "The main text prompt for image generation."},
+        "negative_prompt": {"type": "string", "description": "Prompt defining elements to avoid."},
+        "width": {"type": "integer", "description": "Output image width (e.g., 1024)."},
+        "height": {"type": "integer", "description": "Output image height (e.g., 1024)."},
+        "num_steps": {"type": "integer", "description": "Number of generation steps (e.g., 20)."},
+        "guidance_scale": {"type": "integer", "description": "Guidance scale for generation (e.g., 5)."},
+        "seed": {"type": "integer", "description": "Random seed for reproducible generation (e.g., 42)."}
+    },
+    "required": ["prompt"]
+}
+
+JOB_ID_INPUT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "job_id": {"type": "string", "description": "Job id returned by pix_submit."}
+    },
+    "required": ["job_id"]
+}
+
+def get_progress_reporter():
+    """
+    Return a progress callback for the tool call being handled.
+    
+    The callback is a coroutine function called as
+    progress(progress, total=None, message=None) that sends an MCP progress
+    notification to the client. Failures to send are logged and ignored, so
+    a client that went away never breaks a generation.
+    
+    Returns:
+        Coroutine function, or None outside a request or when the client did not pass a progressToken
+    """
+    try:
+        ctx = server.request_context
+    except LookupError:
+        return None
+    
+    progress_token = ctx.meta.progressToken if ctx.meta else None
+    if progress_token is None:
+        return None
+    
+    async def report(progress: float, total: float = None, message: str = None):
+        try:
+            await ctx.session.send_progress_notification(
+                progress_token, progress, total=total, message=message, related_request_id=ctx.request_id
+            )
+        except Exception as e:
+            log(f"Could not send progress notification: {e}")
+    
+    return report
+
 @server.list_tools()
 async def list_tools() -> list[types.Tool]:
+    if "first_list_tools" not in _startup_timings:
+        report_startup_timing("first_list_tools", _IMPORT_STARTED)
+    
     return [
         types.Tool(
             name="hallo_pixazo",
@@ -120,24 +387,85 @@ async def list_tools() -> list[types.Tool]:
         types.Tool(
             name="pix_generate",
             description="Generate images using Pixazo API.",
+            inputSchema=GENERATION_INPUT_SCHEMA,
+        ),
+        types.Tool(
+            name="pix_generate_batch",
+            description="Generate several images in parallel using Pixazo API. "
+                        "Items are every combination of prompts, seeds and the widths x heights grid.",
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "prompt": {"type": "string", "description": "The main text prompt for image generation."},
+                    "prompt": {"type": "string", "description": "Prompt shared by every item (use with seeds or a size grid)."},
+                    "prompts": {"type": "array", "items": {"type": "string"}, "description": "List of prompts, one item per prompt."},
+                    "seeds": {"type": "array", "items": {"type": "integer"}, "description": "Seeds to sweep (e.g., [1, 2, 3])."},
+                    "widths": {"type": "array", "items": {"type": "integer"}, "description": "Widths of the size grid (e.g., [768, 1024])."},
+                    "heights": {"type": "array", "items": {"type": "integer"}, "description": "Heights of the size grid (e.g., [1024, 1536])."},
                     "negative_prompt": {"type": "string", "description": "Prompt defining elements to avoid."},
-                    "width": {"type": "integer", "description": "Output image width (e.g., 1024)."},
-                    "height": {"type": "integer", "description": "Output image height (e.g., 1024)."},
+                    "width": {"type": "integer", "description": "Output image width when no widths grid is given."},
+                    "height": {"type": "integer", "description": "Output image height when no heights grid is given."},
                     "num_steps": {"type": "integer", "description": "Number of generation steps (e.g., 20)."},
                     "guidance_scale": {"type": "integer", "description": "Guidance scale for generation (e.g., 5)."},
-                    "seed": {"type": "integer", "description": "Random seed for reproducible generation (e.g., 42)."}
+                    "seed": {"type": "integer", "description": "Seed used when no seeds list is given."},
+                    "concurrency": {"type": "integer", "description": "Maximum parallel requests for this batch (capped by server config)."}
                 },
-                "required": ["prompt"]
             },
+        ),
+        types.Tool(
+            name="pix_history",
+            description="Search past generations, newest first. Supports status, date range, "
+                        "parameter and full-text prompt filters with cursor pagination.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "search": {"type": "string", "description": "Full-text prompt search (e.g., 'red AND castle')."},
+                    "status": {"type": "string", "description": "Only generations with this status (e.g., SUCCESS)."},
+                    "since": {"type": "string", "description": "Only generations at or after this ISO date/timestamp."},
+                    "until": {"type": "string", "description": "Only generations at or before this ISO date/timestamp."},
+                    "parameters": {"type": "object", "description": "Match stored tool arguments (e.g., {\"seed\": 42})."},
+                    "limit": {"type": "integer", "description": "Page size (default 20, max 200)."},
+                    "cursor": {"type": "string", "description": "next_cursor from the previous page."}
+                },
+            },
+        ),
+        types.Tool(
+            name="pix_throttle_status",
+            description="Show the Pixazo rate limiter state: adaptive concurrency, tokens, Retry-After pause and retry counters.",
+            inputSchema={
+                "type": "object",
+                "properties": {},
+            },
+        ),
+        types.Tool(
+            name="pix_cache_status",
+            description="Show the result cache state: entries, disk usage against the budget, and hit, miss and eviction counters.",
+            inputSchema={
+                "type": "object",
+                "properties": {},
+            },
+        ),
+        types.Tool(
+            name="pix_submit",
+            description="Queue an image generation and return a job id immediately. "
+                        "Poll it with pix_status and fetch the outcome with pix_result.",
+            inputSchema=GENERATION_INPUT_SCHEMA,
+        ),
+        types.Tool(
+            name="pix_status",
+            description="Get the status of a job queued with pix_submit.",
+            inputSchema=JOB_ID_INPUT_SCHEMA,
+        ),
+        types.Tool(
+            name="pix_result",
+            description="Get the result of a job queued with pix_submit once it has finished.",
+            inputSchema=JOB_ID_INPUT_SCHEMA,
         )
     ]
 
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
+    await ensure_initialized()
+    
     if name == "hallo_pixazo":
         return [types.TextContent(type="text", text="Pixazo Tool Ready.")]
     elif name == "pix_generate":
@@ -145,114 +473,391 @@ async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
         if "prompt" not in arguments:
             return [types.TextContent(type="text", text="Error: 'prompt' is required for pix_generate tool.")]
         
-        # Construct timestamp for metadata
-        timestamp = datetime.now().isoformat()
+        result = await run_generation(arguments, progress=get_progress_reporter())
+        return [types.TextContent(type="text", text=result['message'])]
+    elif name == "pix_generate_batch":
+        try:
+            items = expand_batch_items(arguments)
+            concurrency = min(int(arguments.get("concurrency") or Config.BATCH_CONCURRENCY), Config.BATCH_CONCURRENCY)
+        except (TypeError, ValueError) as e:
+            return [types.TextContent(type="text", text=f"Error: {e}")]
+        
+        results = await generate_batch(items, concurrency, progress=get_progress_reporter())
         
+        summary = {
+            'total': len(results),
+            'succeeded': sum(1 for result in results if result['status'] == 'SUCCESS'),
+            'results': results,
+        }
+        return [types.TextContent(type="text", text=json.dumps(summary, indent=2))]
+    elif name == "pix_history":
         try:
-            # Load defaults from environment variables
-            defaults = get_generation_defaults()
-            
-            # Merge caller arguments with defaults (caller arguments take precedence)
-            data_payload = defaults.copy()
-            data_payload.update(arguments)
+            history = await asyncio.to_thread(
+                query_generations,
+                Config.DATABASE_PATH,
+                status=arguments.get("status"),
+                since=arguments.get("since"),
+                until=arguments.get("until"),
+                parameters=arguments.get("parameters"),
+                search=arguments.get("search"),
+                limit=arguments.get("limit", 20),
+                cursor=arguments.get("cursor"),
+            )
+        except ValueError as e:
+            return [types.TextContent(type="text", text=f"Error: {e}")]
+        return [types.TextContent(type="text", text=json.dumps(history, indent=2))]
+    elif name == "pix_throttle_status":
+        return [types.TextContent(type="text", text=json.dumps(get_rate_limiter().snapshot(), indent=2))]
+    elif name == "pix_cache_status":
+        stats = await asyncio.to_thread(result_cache.stats)
+        return [types.TextContent(type="text", text=json.dumps(stats, indent=2))]
+    elif name == "pix_submit":
+        if "prompt" not in arguments:
+            return [types.TextContent(type="text", text="Error: 'prompt' is required for pix_submit tool.")]
+        
+        job = await job_manager.submit(arguments)
+        return [types.TextContent(type="text", text=json.dumps({'job_id': job['id'], 'status': job['status']}))]
+    elif name in ("pix_status", "pix_result"):
+        job = await job_manager.get(arguments.get("job_id", ""))
+        if job is None:
+            return [types.TextContent(type="text", text=f"Error: unknown job id '{arguments.get('job_id')}'.")]
+        
+        status = {key: job[key] for key in ('status', 'created_at', 'updated_at') if key in job}
+        status['job_id'] = job['id']
+        for key in ('queue_position', 'progress'):
+            if key in job:
+                status[key] = job[key]
+        
+        if name == "pix_result":
+            if job['result'] is None:
+                return [types.TextContent(type="text", text=f"Job {job['id']} is not finished yet (status: {job['status']}).")]
+            status['result'] = job['result']
+        
+        return [types.TextContent(type="text", text=json.dumps(status, indent=2))]
+    
+    else:
+        raise ValueError(f"Unknown tool: {name}")
+
+PIXAZO_URL = "https://gateway.pixazo.ai/getImage/v1/getSDXLImage"
+
+# HTTP statuses worth retrying: timeouts, throttling and gateway errors
+RETRYABLE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+_rate_limiter = None
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """
+    Return the shared rate limiter that paces requests to the Pixazo gateway.
+    
+    Returns:
+        AdaptiveRateLimiter: Limiter configured from Config.PIXAZO_RATE_* settings
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = AdaptiveRateLimiter(
+            rate=Config.PIXAZO_RATE_LIMIT,
+            burst=Config.PIXAZO_RATE_BURST,
+            max_concurrency=Config.MAX_CONCURRENT_GENERATIONS,
+        )
+    return _rate_limiter
+
+async def post_to_pixazo(data_payload: dict) -> httpx.Response:
+    """
+    Send a generation request to Pixazo through the adaptive rate limiter.
+    
+    Throttled (429/503), timed out and 5xx responses as well as transport
+    errors are retried up to Config.PIXAZO_MAX_RETRIES times. A Retry-After
+    header pauses the limiter for every caller; otherwise the retry waits with
+    exponential backoff.
+    
+    Args:
+        data_payload (dict): Request body (defaults merged with tool arguments)
+    
+    Returns:
+        httpx.Response: Final response, which may still be an error response
+    
+    Raises:
+        httpx.TransportError: If the last attempt failed without a response
+    """
+    headers = {
+        'Content-Type': 'application/json',
+        'Cache-Control': 'no-cache',
+        'Ocp-Apim-Subscription-Key': Config.PIXAZO_API_KEY or '',
+    }
+    limiter = get_rate_limiter()
+    
+    for attempt in range(Config.PIXAZO_MAX_RETRIES + 1):
+        await limiter.acquire()
+        response = None
+        retry_after = None
+        try:
+            response = await get_http_client().post(PIXAZO_URL, headers=headers, json=data_payload)
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        except httpx.TransportError:
+            if attempt == Config.PIXAZO_MAX_RETRIES:
+                raise
+        finally:
+            limiter.release(response.status_code if response is not None else None, retry_after)
+        
+        if response is not None and (response.status_code not in RETRYABLE_STATUS_CODES or attempt == Config.PIXAZO_MAX_RETRIES):
+            return response
+        
+        limiter.retries += 1
+        if retry_after is None:
+            # With Retry-After the limiter itself holds back the next acquire
+            await asyncio.sleep(min(Config.PIXAZO_RETRY_BACKOFF_MAX, Config.PIXAZO_RETRY_BACKOFF_BASE * (2 ** attempt)))
+
+async def run_generation(arguments: dict, progress=None) -> dict:
+    """
+    Run generate_image once a generation slot is free.
+    
+    Cancelling the caller while it waits or runs releases the slot.
+    
+    Args:
+        arguments (dict): pix_generate tool arguments
+        progress: Optional progress callback, see generate_image
+    
+    Returns:
+        dict: Result entry from generate_image
+    """
+    async with get_generation_semaphore():
+        return await generate_image(arguments, progress=progress)
+
+def record_generation(timestamp: str, arguments: dict, image_url: str, status: str):
+    """
+    Save the metadata row for a finished generation attempt.
+    
+    Args:
+        timestamp (str): ISO timestamp of when the generation started
+        arguments (dict): Original tool arguments for this generation
+        image_url (str): Local path or remote URL of the image, if any
+        status (str): Outcome status (SUCCESS, DOWNLOAD_FAILED, HTTP_<code>, EXCEPTION, CANCELLED)
+    """
+    metadata = {
+        'timestamp': timestamp,
+        'prompt': arguments['prompt'],
+        'parameters_json': arguments,  # Store original arguments only
+        'image_url': image_url,
+        'status': status
+    }
+    save_metadata(Config.DATABASE_PATH, metadata)
+
+# Share of the progress scale (0-100) reached before the download starts
+PROGRESS_SUBMITTED = 0
+PROGRESS_UPSTREAM_DONE = 10
+PROGRESS_SAVED = 100
+
+async def generate_image(arguments: dict, progress=None) -> dict:
+    """
+    Run a single Pixazo generation, download the result and record its metadata.
+    
+    When a progress callback is given it is called as
+    progress(progress, total=100, message=...) once the request is submitted,
+    when Pixazo answers, as the image downloads and when it is saved. If the
+    caller is cancelled, the in-flight request is aborted, a CANCELLED row is
+    recorded and the CancelledError propagates.
+    
+    Args:
+        arguments (dict): pix_generate tool arguments (must contain 'prompt')
+        progress: Optional coroutine function receiving progress notifications
+    
+    Returns:
+        dict: Result entry with keys:
+            - status: str (SUCCESS, DOWNLOAD_FAILED, HTTP_<code> or EXCEPTION)
+            - message: str, human readable outcome
+            - local_path: str or None
+            - image_url: str or None, remote URL returned by Pixazo
+            - cached: bool, True when served from the result cache
+    """
+    # Construct timestamp for metadata
+    timestamp = datetime.now().isoformat()
+    result = {'status': None, 'message': None, 'local_path': None, 'image_url': None, 'cached': False}
+    
+    try:
+        # Load defaults from environment variables
+        defaults = get_generation_defaults()
+        
+        # Merge caller arguments with defaults (caller arguments take precedence)
+        data_payload = defaults.copy()
+        data_payload.update(arguments)
+        
+        # Serve deterministic (fixed seed) requests from the result cache
+        cache_key = None
+        if Config.CACHE_ENABLED and is_cacheable(data_payload):
+            cache_key = make_cache_key(data_payload)
+            # SQLite and the file check block, keep them off the event loop
+            cached_path = await asyncio.to_thread(result_cache.lookup, cache_key)
+            if cached_path:
+                record_generation(timestamp, arguments, cached_path, 'CACHE_HIT')
+                result.update(status='SUCCESS', local_path=cached_path, cached=True,
+                              message=f"Image served from cache! Local path: {cached_path}")
+                return result
+        
+        # Make the API request through the rate limiter, retrying transient failures
+        if progress is not None:
+            await progress(PROGRESS_SUBMITTED, 100, "Submitted to Pixazo")
+        response = await post_to_pixazo(data_payload)
+        
+        # Success handling (HTTP 200)
+        if response.status_code == 200:
+            try:
+                response_data = response.json()
+            except json.JSONDecodeError:
+                record_generation(timestamp, arguments, None, f'HTTP_{response.status_code}')
+                result.update(status=f'HTTP_{response.status_code}', message="Error: Invalid JSON response from Pixazo API")
+                return result
             
-            # Define endpoint and headers
-            PIXAZO_URL = "https://gateway.pixazo.ai/getImage/v1/getSDXLImage"
-            headers = {
-                'Content-Type': 'application/json',
-                'Cache-Control': 'no-cache',
-                'Ocp-Apim-Subscription-Key': PIXAZO_API_KEY,
-            }
+            image_url = response_data.get('imageUrl')
+            result['image_url'] = image_url
             
-            # Make the API request
-            response = requests.post(PIXAZO_URL, headers=headers, json=data_payload)
+            download_progress = None
+            if progress is not None:
+                await progress(PROGRESS_UPSTREAM_DONE, 100, "Pixazo finished, downloading image")
+                download_progress = _download_progress_reporter(progress)
             
-            # Success handling (HTTP 200)
-            if response.status_code == 200:
-                try:
-                    response_data = response.json()
-                    image_url = response_data.get('imageUrl')
-                    
-                    # Generate unique filename for local storage
-                    filename = f"pixazo_{uuid.uuid4().hex[:16]}.png"
-                    local_save_path = os.path.join(GENERATED_IMAGES_DIR, filename)
-                    
-                    # Download the image
-                    download_success = download_image(image_url, local_save_path)
-                    
-                    if download_success:
-                        # Save metadata to database with local path
-                        metadata = {
-                            'timestamp': timestamp,
-                            'prompt': arguments['prompt'],
-                            'parameters_json': arguments,  # Store original arguments only
-                            'image_url': local_save_path,  # Store local path
-                            'status': 'SUCCESS'
-                        }
-                        save_metadata(Config.DATABASE_PATH, metadata)
-                        
-                        return [types.TextContent(type="text", text=f"Image generated and saved successfully! Local path: {local_save_path}")]
-                    else:
-                        # Download failed, save error metadata
-                        metadata = {
-                            'timestamp': timestamp,
-                            'prompt': arguments['prompt'],
-                            'parameters_json': arguments,  # Store original arguments only
-                            'image_url': image_url,  # Store remote URL for reference
-                            'status': 'DOWNLOAD_FAILED'
-                        }
-                        save_metadata(Config.DATABASE_PATH, metadata)
-                        
-                        return [types.TextContent(type="text", text=f"Image generated but download failed. Remote URL: {image_url}")]
-                    
-                except json.JSONDecodeError:
-                    error_msg = "Error: Invalid JSON response from Pixazo API"
-                    metadata = {
-                        'timestamp': timestamp,
-                        'prompt': arguments['prompt'],
-                        'parameters_json': arguments,  # Store original arguments only
-                        'image_url': None,
-                        'status': f'HTTP_{response.status_code}'
-                    }
-                    save_metadata(Config.DATABASE_PATH, metadata)
-                    return [types.TextContent(type="text", text=error_msg)]
+            # Generate unique filename for local storage
+            filename = f"pixazo_{uuid.uuid4().hex[:16]}.png"
+            local_save_path = os.path.join(GENERATED_IMAGES_DIR, filename)
             
-            # Error handling (HTTP 4xx/5xx)
+            # Download the image
+            digest = await download_image(image_url, local_save_path, progress=download_progress)
+            if digest:
+                result['sha256'] = digest
+                # Save metadata to database with local path
+                record_generation(timestamp, arguments, local_save_path, 'SUCCESS')
+                if cache_key:
+                    await asyncio.to_thread(result_cache.store, cache_key, local_save_path)
+                if progress is not None:
+                    await progress(PROGRESS_SAVED, 100, f"Saved to {local_save_path}")
+                result.update(status='SUCCESS', local_path=local_save_path,
+                              message=f"Image generated and saved successfully! Local path: {local_save_path}")
             else:
-                try:
-                    error_data = response.json()
-                    error_msg = error_data.get('error', f'HTTP {response.status_code}: {response.reason}')
-                except json.JSONDecodeError:
-                    error_msg = f'HTTP {response.status_code}: {response.reason}'
-                
-                # Save error metadata to database
-                metadata = {
-                    'timestamp': timestamp,
-                    'prompt': arguments['prompt'],
-                    'parameters_json': arguments,  # Store original arguments only
-                    'image_url': None,
-                    'status': f'HTTP_{response.status_code}'
-                }
-                save_metadata(Config.DATABASE_PATH, metadata)
-                
-                return [types.TextContent(type="text", text=f"Error generating image: {error_msg}")]
-                
-        except Exception as e:
-            # Handle any other exceptions
-            metadata = {
-                'timestamp': timestamp,
-                'prompt': arguments['prompt'],
-                'parameters_json': arguments,  # Store original arguments only
-                'image_url': None,
-                'status': 'EXCEPTION'
-            }
-            save_metadata(Config.DATABASE_PATH, metadata)
-            return [types.TextContent(type="text", text=f"Unexpected error: {str(e)}")]
+                # Download failed, store remote URL for reference
+                record_generation(timestamp, arguments, image_url, 'DOWNLOAD_FAILED')
+                result.update(status='DOWNLOAD_FAILED',
+                              message=f"Image generated but download failed. Remote URL: {image_url}")
+            return result
+        
+        # Error handling (HTTP 4xx/5xx)
+        try:
+            error_data = response.json()
+            error_msg = error_data.get('error', f'HTTP {response.status_code}: {response.reason_phrase}')
+        except json.JSONDecodeError:
+            error_msg = f'HTTP {response.status_code}: {response.reason_phrase}'
+        
+        record_generation(timestamp, arguments, None, f'HTTP_{response.status_code}')
+        result.update(status=f'HTTP_{response.status_code}', message=f"Error generating image: {error_msg}")
+        return result
+        
+    except asyncio.CancelledError:
+        # Client cancelled the call; leave a trace and let the cancellation unwind
+        record_generation(timestamp, arguments, None, 'CANCELLED')
+        raise
+    except Exception as e:
+        # Handle any other exceptions
+        record_generation(timestamp, arguments, None, 'EXCEPTION')
+        result.update(status='EXCEPTION', message=f"Unexpected error: {str(e)}")
+        return result
+
+def _download_progress_reporter(progress):
+    """
+    Adapt a generation progress callback to download_image's (received, expected_size)
+    calls, mapping bytes onto the download share of the scale and only
+    reporting whole-percent steps so large images do not flood the client.
+    """
+    last_sent = PROGRESS_UPSTREAM_DONE
     
-    else:
-        raise ValueError(f"Unknown tool: {name}")
+    async def report(received: int, expected_size: int = None):
+        nonlocal last_sent
+        if not expected_size:
+            return
+        span = PROGRESS_SAVED - PROGRESS_UPSTREAM_DONE - 1
+        value = PROGRESS_UPSTREAM_DONE + int(span * min(received, expected_size) / expected_size)
+        # A restarted download goes back to zero bytes; progress must not go backwards
+        if value <= last_sent:
+            return
+        last_sent = value
+        await progress(value, 100, f"Downloaded {received} of {expected_size} bytes")
+    
+    return report
+
+def expand_batch_items(arguments: dict) -> list[dict]:
+    """
+    Expand pix_generate_batch arguments into one pix_generate argument set per item.
+    
+    Items are the cartesian product of the prompts, the seeds and the
+    width/height grid. Any other argument is shared by every item.
+    
+    Args:
+        arguments (dict): pix_generate_batch tool arguments
+    
+    Returns:
+        list[dict]: Argument dicts ready for generate_image
+    
+    Raises:
+        ValueError: If no prompt is given or the batch exceeds Config.BATCH_MAX_ITEMS
+    """
+    prompts = arguments.get("prompts") or ([arguments["prompt"]] if arguments.get("prompt") else [])
+    if not prompts:
+        raise ValueError("'prompt' or 'prompts' is required for pix_generate_batch tool.")
+    
+    seeds = arguments.get("seeds") or [None]
+    widths = arguments.get("widths") or [None]
+    heights = arguments.get("heights") or [None]
+    
+    shared = {key: value for key, value in arguments.items()
+              if key not in ("prompt", "prompts", "seeds", "widths", "heights", "concurrency")}
+    
+    items = []
+    for prompt, seed, width, height in itertools.product(prompts, seeds, widths, heights):
+        item = dict(shared, prompt=prompt)
+        if seed is not None:
+            item["seed"] = seed
+        if width is not None:
+            item["width"] = width
+        if height is not None:
+            item["height"] = height
+        items.append(item)
+    
+    if len(items) > Config.BATCH_MAX_ITEMS:
+        raise ValueError(f"Batch expands to {len(items)} items, the limit is {Config.BATCH_MAX_ITEMS}.")
+    
+    return items
+
+async def generate_batch(items: list[dict], concurrency: int, progress=None) -> list[dict]:
+    """
+    Run several generations in parallel with bounded fan-out.
+    
+    Cancelling the batch cancels every item still waiting or running.
+    
+    Args:
+        items (list[dict]): Argument dicts, one per generation
+        concurrency (int): Maximum number of items in flight for this batch
+        progress: Optional coroutine function, called as
+            progress(completed, total, message) whenever an item finishes
+    
+    Returns:
+        list[dict]: One result entry per item, in the same order as items
+    """
+    batch_semaphore = asyncio.Semaphore(max(1, concurrency))
+    completed = 0
+    
+    async def run_item(index: int, item: dict) -> dict:
+        nonlocal completed
+        async with batch_semaphore:
+            result = await run_generation(item)
+        entry = {'index': index, 'prompt': item['prompt'], 'parameters': item}
+        entry.update(result)
+        
+        completed += 1
+        if progress is not None:
+            await progress(completed, len(items), f"{completed} of {len(items)} images done")
+        return entry
+    
+    return await asyncio.gather(*(run_item(index, item) for index, item in enumerate(items)))
+
+report_startup_timing("import", _IMPORT_STARTED)
 
-import asyncio
 import signal
 from mcp.server.stdio import stdio_server
 from mcp.server.models import InitializationOptions
@@ -268,11 +873,16 @@ async def monitor_stdin(read_stream):
     except asyncio.CancelledError:
         pass
 
+async def start_background_services():
+    """Initialize the server off the event loop and start the job worker pool."""
+    await ensure_initialized()
+    await job_manager.start()
+
 async def main():
     """Main server execution function."""
     # Set up signal handlers
     def signal_handler(signum, frame):
-        print(f"Received signal {signum}, shutting down...")
+        log(f"Received signal {signum}, shutting down...")
         raise KeyboardInterrupt()
     
     signal.signal(signal.SIGINT, signal_handler)
@@ -290,6 +900,10 @@ async def main():
                 )
             )
             
+            # Initialize paths and the database off the event loop, so the
+            # first list_tools does not wait for it, then resume queued jobs
+            init_task = asyncio.create_task(start_background_services())
+            
             # Start monitoring stdin
             monitor_task = asyncio.create_task(monitor_stdin(read_stream))
             
@@ -307,10 +921,19 @@ async def main():
                     await monitor_task
                 except asyncio.CancelledError:
                     pass
+                await asyncio.gather(init_task, return_exceptions=True)
+                if job_manager is not None:
+                    await job_manager.stop()
+                
+                # Release pooled HTTP connections
+                await close_http_client()
+                
+                # Commit any metadata rows still queued in the writer
+                close_writers()
     except KeyboardInterrupt:
-        print("Server shutdown requested by user")
+        log("Server shutdown requested by user")
     except Exception as e:
-        print(f"Server error: {e}")
+        log(f"Server error: {e}")
         raise
 
 if __name__ == "__main__":
@@ -0,0 +1,152 @@
+import time
+import asyncio
+from email.utils import parsedate_to_datetime
+
+def parse_retry_after(value: str):
+    """
+    Parse an HTTP Retry-After header.
+
+    Args:
+        value (str): Header value, either delay seconds or an HTTP date
+
+    Returns:
+        float or None: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket with an adaptive concurrency limit in front of an upstream API.
+
+    Requests take a token (refilled at `rate` per second, up to `burst`) and a
+    concurrency slot. The concurrency limit grows by one after every
+    `increase_after` consecutive successes and halves on a throttling response
+    (HTTP 429/503), never going below 1 or above `max_concurrency`. A
+    Retry-After header pauses all new requests until it expires. A `rate` of
+    0 or less disables the token bucket, leaving only the concurrency limit.
+    """
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int, increase_after: int = 5):
+        """
+        Args:
+            rate (float): Tokens added per second (<= 0 for no rate limit)
+            burst (int): Bucket capacity
+            max_concurrency (int): Upper bound for the adaptive concurrency limit
+            increase_after (int): Consecutive successes before the limit grows by one
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self.increase_after = max(1, increase_after)
+
+        self.concurrency_limit = self.max_concurrency
+        self.in_flight = 0
+        self.tokens = float(self.burst)
+        self.paused_until = 0.0
+        self._last_refill = time.monotonic()
+        self._success_streak = 0
+        self._changed = None
+
+        # Counters exposed through snapshot()
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.failures = 0
+        self.last_throttle_at = None
+
+    def _refill(self, now: float):
+        if self.rate <= 0:
+            self.tokens = float(self.burst)
+        else:
+            self.tokens = min(self.burst, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def acquire(self):
+        """Wait for a token, a free concurrency slot and the end of any Retry-After pause."""
+        if self._changed is None:
+            self._changed = asyncio.Event()
+
+        # All state changes happen on the event loop thread, so checking and
+        # taking a slot without an await in between is atomic
+        while True:
+            now = time.monotonic()
+            self._refill(now)
+
+            if now < self.paused_until:
+                wait = self.paused_until - now
+            elif self.in_flight >= self.concurrency_limit:
+                wait = None
+            elif self.tokens < 1:
+                wait = (1 - self.tokens) / self.rate
+            else:
+                self.tokens -= 1
+                self.in_flight += 1
+                self.requests += 1
+                return
+
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self, status_code: int = None, retry_after: float = None):
+        """
+        Free the concurrency slot and adapt the limit to the upstream response.
+
+        Args:
+            status_code (int): HTTP status of the response, None if the request failed without one
+            retry_after (float): Seconds from the Retry-After header, if present
+        """
+        self.in_flight -= 1
+
+        if status_code in (429, 503):
+            self.throttled += 1
+            self.last_throttle_at = time.time()
+            self._success_streak = 0
+            self.concurrency_limit = max(1, self.concurrency_limit // 2)
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        elif status_code is not None and status_code < 500:
+            self._success_streak += 1
+            if self._success_streak >= self.increase_after and self.concurrency_limit < self.max_concurrency:
+                self.concurrency_limit += 1
+                self._success_streak = 0
+        else:
+            self.failures += 1
+            self._success_streak = 0
+
+        if self._changed is not None:
+            self._changed.set()
+
+    def snapshot(self) -> dict:
+        """
+        Return the current throttle state for diagnostics.
+
+        Returns:
+            dict: Limits, in-flight count, bucket level, pause and counters
+        """
+        now = time.monotonic()
+        self._refill(now)
+        return {
+            'concurrency_limit': self.concurrency_limit,
+            'max_concurrency': self.max_concurrency,
+            'in_flight': self.in_flight,
+            'tokens': round(self.tokens, 2),
+            'rate_per_second': self.rate,
+            'burst': self.burst,
+            'paused_for_seconds': round(max(0.0, self.paused_until - now), 2),
+            'requests': self.requests,
+            'throttled': self.throttled,
+            'retries': self.retries,
+            'failures': self.failures,
+            'last_throttle_at': self.last_throttle_at,
+        }
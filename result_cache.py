@@ -0,0 +1,226 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from db_manager import connect, get_writer
+
+def make_cache_key(payload: dict) -> str:
+    """
+    Build a content-addressed key for a generation payload.
+
+    The payload is normalized before hashing: keys are sorted, None values are
+    dropped and integral floats are written as ints, so equivalent requests
+    (e.g. guidance_scale 8 and 8.0) share one entry.
+
+    Args:
+        payload (dict): Request body sent to Pixazo (defaults merged with arguments)
+
+    Returns:
+        str: Hex SHA-256 of the normalized payload
+    """
+    normalized = {}
+    for key, value in payload.items():
+        if value is None:
+            continue
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        normalized[key] = value
+
+    encoded = json.dumps(normalized, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def is_cacheable(payload: dict) -> bool:
+    """
+    Check whether a payload produces a deterministic image.
+
+    Only requests with a fixed seed are cacheable; a negative seed (the
+    default of -1) asks Pixazo for a random one.
+
+    Args:
+        payload (dict): Request body sent to Pixazo
+
+    Returns:
+        bool: True if the result can be served from the cache
+    """
+    try:
+        return int(payload.get("seed", -1)) >= 0
+    except (TypeError, ValueError):
+        return False
+
+class ResultCache:
+    """
+    Disk-budgeted LRU cache of generated images keyed by payload hash.
+
+    Cached files live under cache_dir as <key>.png, copied from the
+    generated image so that max_bytes bounds the disk the cache really uses
+    (a hard link would keep the bytes alive after eviction while the original
+    exists). The index is kept in memory in LRU order and mirrored to the
+    result_cache table; hit, miss and eviction counters are kept in the
+    cache_stats table. Methods are called from worker threads, so the index
+    is guarded by a lock.
+    """
+
+    def __init__(self, db_path: str, cache_dir: str, max_bytes: int):
+        """
+        Args:
+            db_path (str): Path to the metadata database
+            cache_dir (str): Directory holding cached image files
+            max_bytes (int): Disk budget for cached files
+        """
+        self.db_path = db_path
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # cache_key -> (file_path, size_bytes), oldest first
+        self._total_bytes = 0
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        get_writer(self.db_path)  # make sure the schema exists
+
+        conn = connect(self.db_path)
+        try:
+            rows = conn.execute(
+                "SELECT cache_key, file_path, size_bytes FROM result_cache ORDER BY last_access"
+            ).fetchall()
+        finally:
+            conn.close()
+
+        for cache_key, file_path, size_bytes in rows:
+            self._entries[cache_key] = (file_path, size_bytes)
+            self._total_bytes += size_bytes
+
+    def _count(self, name: str):
+        get_writer(self.db_path).execute('''
+            INSERT INTO cache_stats (name, value) VALUES (?, 1)
+            ON CONFLICT(name) DO UPDATE SET value = value + 1
+        ''', (name,))
+
+    def _forget(self, cache_key: str):
+        file_path, size_bytes = self._entries.pop(cache_key)
+        self._total_bytes -= size_bytes
+        get_writer(self.db_path).execute("DELETE FROM result_cache WHERE cache_key = ?", (cache_key,))
+
+    def lookup(self, cache_key: str):
+        """
+        Return the cached file for a key and mark it as recently used.
+
+        Args:
+            cache_key (str): Key from make_cache_key
+
+        Returns:
+            str or None: Path of the cached image, or None on a miss
+        """
+        with self._lock:
+            return self._lookup(cache_key)
+
+    def _lookup(self, cache_key: str):
+        self._load()
+
+        entry = self._entries.get(cache_key)
+        if entry is not None and not os.path.exists(entry[0]):
+            # File removed behind our back, treat as a miss
+            self._forget(cache_key)
+            entry = None
+
+        if entry is None:
+            self._count("misses")
+            return None
+
+        self._entries.move_to_end(cache_key)
+        get_writer(self.db_path).execute(
+            "UPDATE result_cache SET last_access = ? WHERE cache_key = ?", (time.time(), cache_key)
+        )
+        self._count("hits")
+        return entry[0]
+
+    def store(self, cache_key: str, source_path: str):
+        """
+        Add a generated image to the cache and evict old entries over budget.
+
+        Args:
+            cache_key (str): Key from make_cache_key
+            source_path (str): Path of the freshly generated image
+
+        Returns:
+            str or None: Path of the cached copy, or None if it could not be stored
+        """
+        with self._lock:
+            return self._store(cache_key, source_path)
+
+    def _store(self, cache_key: str, source_path: str):
+        self._load()
+
+        file_path = os.path.join(self.cache_dir, f"{cache_key}.png")
+        try:
+            # Replace rather than overwrite, an entry from an older version may be a hard link
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            shutil.copyfile(source_path, file_path)
+            size_bytes = os.path.getsize(file_path)
+        except OSError as e:
+            print(f"Error storing cache entry: {e}", file=sys.stderr)
+            return None
+
+        if cache_key in self._entries:
+            self._forget(cache_key)
+
+        self._entries[cache_key] = (file_path, size_bytes)
+        self._total_bytes += size_bytes
+        get_writer(self.db_path).execute('''
+            INSERT OR REPLACE INTO result_cache (cache_key, file_path, size_bytes, created_at, last_access)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (cache_key, file_path, size_bytes, datetime.now().isoformat(), time.time()))
+
+        self._evict()
+        return file_path
+
+    def _evict(self):
+        # Drop least recently used entries until the cache fits the budget,
+        # always keeping the newest entry even if it alone exceeds it
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            cache_key = next(iter(self._entries))
+            file_path = self._entries[cache_key][0]
+            self._forget(cache_key)
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            self._count("evictions")
+
+    def stats(self) -> dict:
+        """
+        Return the current cache size and the persisted counters.
+
+        Returns:
+            dict: entries, total_bytes, max_bytes, hits, misses, evictions
+        """
+        with self._lock:
+            self._load()
+            entries, total_bytes = len(self._entries), self._total_bytes
+        get_writer(self.db_path).flush()
+
+        conn = connect(self.db_path)
+        try:
+            counters = dict(conn.execute("SELECT name, value FROM cache_stats").fetchall())
+        finally:
+            conn.close()
+
+        return {
+            'entries': entries,
+            'total_bytes': total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': counters.get('hits', 0),
+            'misses': counters.get('misses', 0),
+            'evictions': counters.get('evictions', 0),
+        }
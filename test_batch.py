@@ -0,0 +1,68 @@
+import unittest
+import json
+from unittest import mock
+import mcp_pixazo
+from config import Config
+
+class TestExpandBatchItems(unittest.TestCase):
+
+    def test_cartesian_product(self):
+        items = mcp_pixazo.expand_batch_items({
+            'prompts': ['cat', 'dog'], 'seeds': [1, 2], 'widths': [768, 1024], 'heights': [1024],
+            'num_steps': 30, 'concurrency': 2,
+        })
+        self.assertEqual(len(items), 8)
+        self.assertEqual(items[0], {'prompt': 'cat', 'seed': 1, 'width': 768, 'height': 1024, 'num_steps': 30})
+        self.assertEqual(items[-1], {'prompt': 'dog', 'seed': 2, 'width': 1024, 'height': 1024, 'num_steps': 30})
+
+    def test_single_prompt_keeps_shared_arguments(self):
+        items = mcp_pixazo.expand_batch_items({'prompt': 'cat', 'seed': 7, 'width': 512})
+        self.assertEqual(items, [{'prompt': 'cat', 'seed': 7, 'width': 512}])
+
+    def test_prompt_required(self):
+        with self.assertRaises(ValueError):
+            mcp_pixazo.expand_batch_items({'seeds': [1]})
+
+    def test_item_limit(self):
+        with mock.patch.object(Config, 'BATCH_MAX_ITEMS', 3):
+            with self.assertRaises(ValueError):
+                mcp_pixazo.expand_batch_items({'prompt': 'cat', 'seeds': [1, 2, 3, 4]})
+
+class TestGenerateBatch(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        async def run_generation(arguments, progress=None):
+            if arguments['seed'] == 2:
+                return {'status': 'HTTP_500', 'message': 'Error generating image: boom', 'local_path': None, 'image_url': None, 'cached': False}
+            if arguments['seed'] == 3:
+                return {'status': 'DOWNLOAD_FAILED', 'message': 'download failed', 'local_path': None, 'image_url': 'https://img/3', 'cached': False}
+            return {'status': 'SUCCESS', 'message': 'ok', 'local_path': f"/tmp/{arguments['seed']}.png", 'image_url': 'https://img', 'cached': False}
+        patcher = mock.patch.object(mcp_pixazo, 'run_generation', side_effect=run_generation)
+        self.run_generation = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_per_item_results_when_some_fail(self):
+        progress = mock.AsyncMock()
+        items = mcp_pixazo.expand_batch_items({'prompt': 'cat', 'seeds': [1, 2, 3]})
+        results = await mcp_pixazo.generate_batch(items, 2, progress=progress)
+
+        self.assertEqual([result['index'] for result in results], [0, 1, 2])
+        self.assertEqual([result['status'] for result in results], ['SUCCESS', 'HTTP_500', 'DOWNLOAD_FAILED'])
+        self.assertEqual(results[0]['local_path'], '/tmp/1.png')
+        self.assertEqual(results[1]['parameters'], {'prompt': 'cat', 'seed': 2})
+        self.assertEqual(progress.await_args_list[-1].args[:2], (3, 3))
+
+    async def test_tool_reports_summary(self):
+        with mock.patch.object(mcp_pixazo, 'initialize'):
+            content = await mcp_pixazo.call_tool('pix_generate_batch', {'prompt': 'cat', 'seeds': [1, 2, 3], 'concurrency': None})
+        summary = json.loads(content[0].text)
+        self.assertEqual((summary['total'], summary['succeeded']), (3, 1))
+
+    async def test_invalid_concurrency(self):
+        with mock.patch.object(mcp_pixazo, 'initialize'):
+            content = await mcp_pixazo.call_tool('pix_generate_batch', {'prompt': 'cat', 'concurrency': [2]})
+        self.assertTrue(content[0].text.startswith('Error:'))
+        self.run_generation.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import os
+import io
+import hashlib
+import tempfile
+from unittest import mock
+from contextlib import redirect_stdout
+import httpx
+import mcp_pixazo
+from config import Config
+
+IMAGE = bytes(range(256)) * 1024  # 256 KiB
+URL = 'https://cdn.pixazo.test/image.png'
+# Read size download_image picks for IMAGE; a dropped body keeps only whole reads
+CHUNK = 64 * 1024
+
+class DroppedStream(httpx.AsyncByteStream):
+    """Body that sends `data` and then drops the connection."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def __aiter__(self):
+        yield self.data
+        raise httpx.ReadError("connection reset by peer")
+
+def full(request):
+    return httpx.Response(200, headers={'Content-Length': str(len(IMAGE))}, content=IMAGE)
+
+def dropped(size):
+    def respond(request):
+        return httpx.Response(200, headers={'Content-Length': str(len(IMAGE))}, stream=DroppedStream(IMAGE[:size]))
+    return respond
+
+def partial(request):
+    start = int(request.headers['Range'][len('bytes='):-1])
+    return httpx.Response(206, headers={
+        'Content-Length': str(len(IMAGE) - start),
+        'Content-Range': f'bytes {start}-{len(IMAGE) - 1}/{len(IMAGE)}',
+    }, content=IMAGE[start:])
+
+class TestDownloadImage(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.save_path = os.path.join(tmp.name, 'image.png')
+        self.requests = []
+        self.responses = []
+
+        def handler(request):
+            self.requests.append(request)
+            return self.responses.pop(0)(request)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        self.addAsyncCleanup(client.aclose)
+        for patcher in (
+            mock.patch.object(mcp_pixazo, '_http_client', client),
+            mock.patch.object(Config, 'DOWNLOAD_BACKOFF_BASE', 0),
+            mock.patch.object(Config, 'DOWNLOAD_MAX_RETRIES', 3),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def download(self, *responses):
+        self.responses = list(responses)
+        return await mcp_pixazo.download_image(URL, self.save_path)
+
+    def assertSaved(self, digest):
+        self.assertEqual(digest, hashlib.sha256(IMAGE).hexdigest())
+        with open(self.save_path, 'rb') as f:
+            self.assertEqual(f.read(), IMAGE)
+        self.assertFalse(os.path.exists(f'{self.save_path}.part'))
+
+    async def test_single_request(self):
+        self.assertSaved(await self.download(full))
+        self.assertNotIn('Range', self.requests[0].headers)
+
+    async def test_resume_with_range(self):
+        digest = await self.download(dropped(CHUNK * 2), partial)
+        self.assertSaved(digest)
+        self.assertEqual(self.requests[1].headers['Range'], f'bytes={CHUNK * 2}-')
+
+    async def test_range_ignored_restarts(self):
+        digest = await self.download(dropped(CHUNK * 2), full)
+        self.assertSaved(digest)
+        self.assertEqual(self.requests[1].headers['Range'], f'bytes={CHUNK * 2}-')
+
+    async def test_range_not_satisfiable_restarts(self):
+        digest = await self.download(dropped(CHUNK * 2), lambda request: httpx.Response(416), full)
+        self.assertSaved(digest)
+        self.assertEqual(len(self.requests), 3)
+        self.assertNotIn('Range', self.requests[2].headers)
+
+    async def test_repeated_disconnects(self):
+        digest = await self.download(dropped(CHUNK * 2), dropped(CHUNK), partial)
+        self.assertSaved(digest)
+        # The second response ignored Range, so the download restarted from zero before resuming
+        self.assertEqual(self.requests[2].headers['Range'], f'bytes={CHUNK}-')
+
+    async def test_gives_up_and_cleans_up(self):
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            digest = await self.download(*[dropped(CHUNK * 2)] * 4)
+        self.assertIsNone(digest)
+        # stdout carries the MCP protocol, diagnostics go to stderr
+        self.assertEqual(stdout.getvalue(), '')
+        self.assertEqual(len(self.requests), 4)
+        self.assertFalse(os.path.exists(self.save_path))
+        self.assertFalse(os.path.exists(f'{self.save_path}.part'))
+
+    async def test_client_error_is_not_retried(self):
+        digest = await self.download(lambda request: httpx.Response(404))
+        self.assertIsNone(digest)
+        self.assertEqual(len(self.requests), 1)
+        self.assertFalse(os.path.exists(f'{self.save_path}.part'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import os
+import tempfile
+from unittest import mock
+import mcp_pixazo
+from config import Config
+from db_manager import save_metadata, close_writers, query_generations
+
+ROWS = [
+    ('2024-05-01T09:00:00', 'red castle at dawn', {'prompt': 'red castle at dawn', 'seed': 1, 'width': 768}, 'SUCCESS'),
+    ('2024-05-01T18:30:00', 'blue castle in fog', {'prompt': 'blue castle in fog', 'seed': 42, 'width': 1024}, 'SUCCESS'),
+    ('2024-05-02T08:15:00', 'red dragon', {'prompt': 'red dragon', 'seed': 42, 'upscale': True}, 'HTTP_429'),
+    ('2024-05-03T12:00:00', 'green forest', {'prompt': 'green forest', 'seed': 7, 'style': None}, 'SUCCESS'),
+    ('2024-05-03T12:00:00', 'red forest', {'prompt': 'red forest', 'seed': 7, 'upscale': False}, 'SUCCESS'),
+]
+
+class TestQueryGenerations(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.db_path = os.path.join(cls.tmp.name, 'metadata.db')
+        for timestamp, prompt, parameters, status in ROWS:
+            save_metadata(cls.db_path, {'timestamp': timestamp, 'prompt': prompt, 'parameters_json': parameters, 'status': status})
+
+    @classmethod
+    def tearDownClass(cls):
+        close_writers()
+        cls.tmp.cleanup()
+
+    def prompts(self, **filters):
+        return [item['prompt'] for item in query_generations(self.db_path, limit=200, **filters)['items']]
+
+    def test_keyset_pagination(self):
+        pages = []
+        cursor = None
+        while True:
+            page = query_generations(self.db_path, limit=2, cursor=cursor)
+            pages.append([item['prompt'] for item in page['items']])
+            self.assertEqual(page['has_more'], page['next_cursor'] is not None)
+            if not page['has_more']:
+                break
+            cursor = page['next_cursor']
+
+        # Newest first; rows sharing a timestamp are ordered by id
+        self.assertEqual(pages, [
+            ['red forest', 'green forest'],
+            ['red dragon', 'blue castle in fog'],
+            ['red castle at dawn'],
+        ])
+
+    def test_cursor_keeps_filters(self):
+        page = query_generations(self.db_path, status='SUCCESS', limit=3)
+        self.assertTrue(page['has_more'])
+        rest = query_generations(self.db_path, status='SUCCESS', limit=3, cursor=page['next_cursor'])
+        self.assertEqual([item['prompt'] for item in rest['items']], ['red castle at dawn'])
+        self.assertFalse(rest['has_more'])
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            query_generations(self.db_path, cursor='not-a-cursor')
+
+    def test_full_text_search(self):
+        self.assertEqual(self.prompts(search='red'), ['red forest', 'red dragon', 'red castle at dawn'])
+        self.assertEqual(self.prompts(search='red AND castle'), ['red castle at dawn'])
+        self.assertEqual(self.prompts(search='castle', status='SUCCESS'), ['blue castle in fog', 'red castle at dawn'])
+
+    def test_since_and_until(self):
+        self.assertEqual(self.prompts(since='2024-05-02'), ['red forest', 'green forest', 'red dragon'])
+        # A bare until date covers the whole day
+        self.assertEqual(self.prompts(until='2024-05-01'), ['blue castle in fog', 'red castle at dawn'])
+        self.assertEqual(self.prompts(since='2024-05-01T12:00:00', until='2024-05-02T08:15:00'), ['red dragon', 'blue castle in fog'])
+
+    def test_parameter_filters(self):
+        self.assertEqual(self.prompts(parameters={'seed': 42}), ['red dragon', 'blue castle in fog'])
+        self.assertEqual(self.prompts(parameters={'seed': 42, 'width': 1024}), ['blue castle in fog'])
+        self.assertEqual(self.prompts(parameters={'upscale': True}), ['red dragon'])
+        self.assertEqual(self.prompts(parameters={'upscale': False}), ['red forest'])
+        self.assertEqual(self.prompts(parameters={'style': None}), ['green forest'])
+
+    def test_non_scalar_parameter_values(self):
+        for parameters in ({'seed': [1, 2]}, {'seed': {'gt': 1}}, ['seed']):
+            with self.subTest(parameters=parameters):
+                with self.assertRaises(ValueError):
+                    query_generations(self.db_path, parameters=parameters)
+        with self.assertRaises(ValueError):
+            query_generations(self.db_path, parameters={'seed)': 1})
+
+class TestPixHistoryTool(unittest.IsolatedAsyncioTestCase):
+
+    async def test_invalid_parameters_return_an_error(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(close_writers)
+        db_path = os.path.join(tmp.name, 'metadata.db')
+
+        with mock.patch.object(mcp_pixazo, 'initialize'), mock.patch.object(Config, 'DATABASE_PATH', db_path):
+            content = await mcp_pixazo.call_tool('pix_history', {'parameters': {'seed': [1, 2]}})
+        self.assertEqual(content[0].text, "Error: Parameter 'seed' must be a string, number, boolean or null")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import os
+import json
+import asyncio
+import tempfile
+from unittest import mock
+import mcp_pixazo
+from db_manager import save_job, flush_metadata, close_writers, load_job
+from job_manager import JobManager
+
+def stored_job(job_id: str, status: str, prompt: str, minute: int) -> dict:
+    return {
+        'id': job_id,
+        'status': status,
+        'created_at': f'2024-05-01T10:{minute:02d}:00',
+        'updated_at': f'2024-05-01T10:{minute:02d}:30',
+        'arguments': {'prompt': prompt},
+        'result': None,
+    }
+
+class TestJobRecovery(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(close_writers)
+        self.db_path = os.path.join(tmp.name, 'metadata.db')
+
+        # Left behind by a server that stopped mid-way
+        save_job(self.db_path, stored_job('a', 'RUNNING', 'interrupted', 1))
+        save_job(self.db_path, stored_job('b', 'QUEUED', 'waiting', 2))
+        save_job(self.db_path, dict(stored_job('c', 'COMPLETED', 'done', 3), result={'status': 'SUCCESS'}))
+        flush_metadata(self.db_path)
+
+        self.runs = []
+        async def runner(arguments, progress=None):
+            self.runs.append(arguments['prompt'])
+            await progress(100, 100, 'done')
+            return {'status': 'SUCCESS', 'message': f"generated {arguments['prompt']}", 'local_path': '/tmp/x.png'}
+        self.manager = JobManager(self.db_path, runner, workers=2)
+        self.addAsyncCleanup(self.manager.stop)
+
+    async def wait_finished(self, job_id: str) -> dict:
+        for _ in range(200):
+            job = await self.manager.get(job_id)
+            if job['status'] in ('COMPLETED', 'FAILED'):
+                return job
+            await asyncio.sleep(0.01)
+        self.fail(f"job {job_id} did not finish")
+
+    async def test_unfinished_jobs_are_requeued_after_restart(self):
+        await self.manager.start()
+
+        for job_id in ('a', 'b'):
+            job = await self.wait_finished(job_id)
+            self.assertEqual(job['status'], 'COMPLETED')
+        self.assertEqual(sorted(self.runs), ['interrupted', 'waiting'])
+        self.assertEqual(load_job(self.db_path, 'a')['result']['message'], 'generated interrupted')
+
+        with mock.patch.object(mcp_pixazo, 'initialize'), mock.patch.object(mcp_pixazo, 'job_manager', self.manager):
+            content = await mcp_pixazo.call_tool('pix_result', {'job_id': 'b'})
+        result = json.loads(content[0].text)
+        self.assertEqual(result['status'], 'COMPLETED')
+        self.assertEqual(result['result']['message'], 'generated waiting')
+
+    async def test_failed_job_reaches_terminal_state(self):
+        async def runner(arguments, progress=None):
+            raise RuntimeError('gateway down')
+        self.manager.runner = runner
+        await self.manager.start()
+
+        job = await self.wait_finished('a')
+        self.assertEqual(job['status'], 'FAILED')
+        self.assertEqual(job['result'], {'status': 'EXCEPTION', 'message': 'Unexpected error: gateway down'})
+
+if __name__ == '__main__':
+    unittest.main()
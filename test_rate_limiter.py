@@ -0,0 +1,130 @@
+import unittest
+import time
+import asyncio
+from unittest import mock
+from types import SimpleNamespace
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+import rate_limiter
+from rate_limiter import AdaptiveRateLimiter, parse_retry_after
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestParseRetryAfter(unittest.TestCase):
+
+    def test_delta_seconds(self):
+        self.assertEqual(parse_retry_after('120'), 120.0)
+        self.assertEqual(parse_retry_after(' 0 '), 0.0)
+
+    def test_http_date(self):
+        when = datetime.now(timezone.utc) + timedelta(seconds=30)
+        self.assertAlmostEqual(parse_retry_after(format_datetime(when, usegmt=True)), 30, delta=2)
+
+    def test_http_date_in_the_past(self):
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+
+    def test_missing_or_invalid(self):
+        for value in (None, '', 'soon', '-5'):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_retry_after(value))
+
+class TestAdaptiveRateLimiter(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        # Only the limiter sees the fake clock, the event loop keeps real time
+        patcher = mock.patch.object(rate_limiter, 'time', SimpleNamespace(monotonic=self.clock, time=time.time))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_token_refill(self):
+        limiter = AdaptiveRateLimiter(rate=2, burst=3, max_concurrency=10)
+        for _ in range(3):
+            await limiter.acquire()
+            limiter.release(200)
+        self.assertEqual(limiter.snapshot()['tokens'], 0)
+
+        self.clock.now += 0.25
+        self.assertEqual(limiter.snapshot()['tokens'], 0.5)
+        self.clock.now += 10
+        # Never more than the burst
+        self.assertEqual(limiter.snapshot()['tokens'], 3)
+
+    async def test_waits_for_a_token(self):
+        limiter = AdaptiveRateLimiter(rate=2, burst=1, max_concurrency=10)
+        await limiter.acquire()
+        limiter.release(200)
+
+        waits = []
+        async def wait_for(awaitable, timeout):
+            # Time passes while the limiter sleeps
+            awaitable.close()
+            waits.append(timeout)
+            self.clock.now += timeout
+            raise asyncio.TimeoutError
+        with mock.patch.object(rate_limiter.asyncio, 'wait_for', wait_for):
+            await limiter.acquire()
+        self.assertEqual(waits, [0.5])
+
+    async def test_zero_rate_is_unlimited(self):
+        limiter = AdaptiveRateLimiter(rate=0, burst=1, max_concurrency=10)
+        for _ in range(20):
+            await asyncio.wait_for(limiter.acquire(), timeout=1)
+            limiter.release(200)
+        self.assertEqual(limiter.requests, 20)
+
+    async def test_throttling_halves_concurrency_and_recovers(self):
+        limiter = AdaptiveRateLimiter(rate=0, burst=1, max_concurrency=8, increase_after=2)
+
+        async def request(status_code, retry_after=None):
+            await limiter.acquire()
+            limiter.release(status_code, retry_after)
+
+        await request(429)
+        self.assertEqual(limiter.concurrency_limit, 4)
+        await request(503)
+        await request(429)
+        await request(429)
+        # Never below one
+        self.assertEqual(limiter.concurrency_limit, 1)
+        self.assertEqual(limiter.throttled, 4)
+
+        for _ in range(6):
+            await request(200)
+        self.assertEqual(limiter.concurrency_limit, 4)
+        # A server error is a failure, not throttling, and resets the streak
+        await request(200)
+        await request(500)
+        await request(200)
+        self.assertEqual(limiter.concurrency_limit, 4)
+        self.assertEqual(limiter.failures, 1)
+        for _ in range(20):
+            await request(200)
+        self.assertEqual(limiter.concurrency_limit, 8)
+
+    async def test_concurrency_limit_blocks_until_release(self):
+        limiter = AdaptiveRateLimiter(rate=0, burst=1, max_concurrency=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        self.assertFalse(waiter.done())
+        limiter.release(200)
+        await asyncio.wait_for(waiter, timeout=1)
+        self.assertEqual(limiter.in_flight, 1)
+
+    async def test_retry_after_pauses_new_requests(self):
+        limiter = AdaptiveRateLimiter(rate=0, burst=1, max_concurrency=4)
+        await limiter.acquire()
+        limiter.release(429, retry_after=5)
+        self.assertEqual(limiter.snapshot()['paused_for_seconds'], 5)
+
+        self.clock.now += 5
+        await asyncio.wait_for(limiter.acquire(), timeout=1)
+
+if __name__ == '__main__':
+    unittest.main()
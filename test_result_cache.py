@@ -0,0 +1,114 @@
+import unittest
+import os
+import json
+import tempfile
+import httpx
+from unittest import mock
+import mcp_pixazo
+from config import Config
+from db_manager import close_writers
+from result_cache import ResultCache, make_cache_key
+
+class TestResultCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(close_writers)
+        self.tmp = tmp.name
+        self.cache = ResultCache(os.path.join(self.tmp, 'metadata.db'), os.path.join(self.tmp, 'cache'), 1024)
+
+    def image(self, name, size):
+        path = os.path.join(self.tmp, name)
+        with open(path, 'wb') as f:
+            f.write(b'x' * size)
+        return path
+
+    async def test_pix_cache_status(self):
+        first, second = make_cache_key({'prompt': 'cat', 'seed': 1}), make_cache_key({'prompt': 'cat', 'seed': 2})
+        self.assertIsNone(self.cache.lookup(first))
+        self.cache.store(first, self.image('1.png', 600))
+        self.assertIsNotNone(self.cache.lookup(first))
+        # Over the 1024 byte budget, the older entry is evicted
+        self.cache.store(second, self.image('2.png', 600))
+
+        with mock.patch.object(mcp_pixazo, 'initialize'), mock.patch.object(mcp_pixazo, 'result_cache', self.cache):
+            content = await mcp_pixazo.call_tool('pix_cache_status', {})
+        self.assertEqual(json.loads(content[0].text), {
+            'entries': 1, 'total_bytes': 600, 'max_bytes': 1024, 'hits': 1, 'misses': 1, 'evictions': 1,
+        })
+
+    def test_least_recently_used_is_evicted_first(self):
+        a, b, c, d = (make_cache_key({'prompt': 'cat', 'seed': seed}) for seed in range(4))
+        for key, name in ((a, 'a.png'), (b, 'b.png'), (c, 'c.png')):
+            self.cache.store(key, self.image(name, 300))
+        # Touching a makes b the oldest entry
+        self.cache.lookup(a)
+        self.cache.store(d, self.image('d.png', 300))
+
+        self.assertIsNone(self.cache.lookup(b))
+        for key in (a, c, d):
+            self.assertIsNotNone(self.cache.lookup(key))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, 'cache', f'{b}.png')))
+
+    def test_entries_are_copies(self):
+        key = make_cache_key({'prompt': 'cat', 'seed': 1})
+        source = self.image('1.png', 600)
+        cached = self.cache.store(key, source)
+        # The budget counts bytes only the cache holds, so evicting really frees them
+        self.assertNotEqual(os.stat(source).st_ino, os.stat(cached).st_ino)
+        os.remove(source)
+        self.assertEqual(self.cache.lookup(key), cached)
+
+class TestGenerateImageCache(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(close_writers)
+        db_path = os.path.join(tmp.name, 'metadata.db')
+        self.cache = ResultCache(db_path, os.path.join(tmp.name, 'cache'), 1024 * 1024)
+
+        async def download_image(url, save_path, progress=None):
+            with open(save_path, 'wb') as f:
+                f.write(b'png')
+            return 'digest'
+
+        self.post = mock.AsyncMock(return_value=httpx.Response(200, json={'imageUrl': 'https://cdn.pixazo.test/1.png'}))
+        for patcher in (
+            mock.patch.object(mcp_pixazo, 'result_cache', self.cache),
+            mock.patch.object(mcp_pixazo, 'GENERATED_IMAGES_DIR', tmp.name),
+            mock.patch.object(mcp_pixazo, 'post_to_pixazo', self.post),
+            mock.patch.object(mcp_pixazo, 'download_image', download_image),
+            mock.patch.object(Config, 'DATABASE_PATH', db_path),
+            mock.patch.object(Config, 'CACHE_ENABLED', True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_fixed_seed_is_served_from_the_cache(self):
+        first = await mcp_pixazo.generate_image({'prompt': 'cat', 'seed': 42})
+        self.assertEqual((first['status'], first['cached']), ('SUCCESS', False))
+
+        second = await mcp_pixazo.generate_image({'prompt': 'cat', 'seed': 42.0})
+        self.assertEqual((second['status'], second['cached']), ('SUCCESS', True))
+        self.assertEqual(self.post.await_count, 1)
+        with open(second['local_path'], 'rb') as f:
+            self.assertEqual(f.read(), b'png')
+
+        # Another seed is another image
+        third = await mcp_pixazo.generate_image({'prompt': 'cat', 'seed': 7})
+        self.assertFalse(third['cached'])
+        self.assertEqual(self.post.await_count, 2)
+        self.assertEqual((self.cache.stats()['hits'], self.cache.stats()['misses']), (1, 2))
+
+    async def test_random_seed_skips_the_cache(self):
+        for _ in range(2):
+            result = await mcp_pixazo.generate_image({'prompt': 'cat', 'seed': -1})
+            self.assertEqual((result['status'], result['cached']), ('SUCCESS', False))
+        self.assertEqual(self.post.await_count, 2)
+        stats = self.cache.stats()
+        self.assertEqual((stats['entries'], stats['hits'], stats['misses']), (0, 0, 0))
+
+if __name__ == '__main__':
+    unittest.main()
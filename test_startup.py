@@ -0,0 +1,40 @@
+import unittest
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+from unittest import mock
+import mcp_pixazo
+
+class TestLazyStartup(unittest.TestCase):
+
+    def test_import_does_not_read_dotenv(self):
+        script = (
+            "import dotenv\n"
+            "dotenv.load_dotenv = lambda *a, **k: (_ for _ in ()).throw(AssertionError('load_dotenv on import'))\n"
+            "import mcp_pixazo\n"
+        )
+        result = subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+class TestEnsureInitialized(unittest.IsolatedAsyncioTestCase):
+
+    async def test_call_tool_waits_off_the_event_loop(self):
+        release = threading.Event()
+
+        def initialize():
+            # Stands in for start_background_services() holding the lock
+            release.wait(5)
+
+        with mock.patch.object(mcp_pixazo, 'initialize', side_effect=initialize):
+            call = asyncio.create_task(mcp_pixazo.call_tool('hallo_pixazo', {}))
+            # The loop keeps running while the tool call waits
+            await asyncio.sleep(0.05)
+            self.assertFalse(call.done())
+            release.set()
+            content = await asyncio.wait_for(call, 5)
+        self.assertEqual(content[0].text, 'Pixazo Tool Ready.')
+
+if __name__ == '__main__':
+    unittest.main()